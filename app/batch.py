@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from query_chain import execute_query, stream_response
+from query_validator import QueryClassification, classify_query
+
+# Most questions accepted in one POST /batch
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+# Questions of a batch inside an LLM stage (intent/SQL generation, luggage extraction, response) at once
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.split()).casefold()
+
+
+class SharedQueryExecutor:
+    """
+    Drop-in for `execute_query` within one batch: each distinct (sql,
+    parameters) runs once, and every question that generated the same query
+    awaits the same result.
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def __call__(self, sql: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        key = (" ".join(sql.split()).rstrip(";"), tuple(sorted((parameters or {}).items())))
+        result = self._results.get(key)
+        if result is None:
+            self.executed += 1
+            result = self._results[key] = asyncio.ensure_future(execute_query(sql, parameters))
+        else:
+            self.shared += 1
+        # One waiter giving up must not cancel the query for the others
+        return await asyncio.shield(result)
+
+
+async def _answer(
+    question: str,
+    classification: QueryClassification,
+    llm_slot: asyncio.Semaphore,
+    executor: SharedQueryExecutor,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    sql: List[str] = []
+    answer: List[str] = []
+    error = None
+    async for raw_event in stream_response(
+        question, classification=classification, llm_slot=llm_slot, execute=executor, stream_sql=False
+    ):
+        event = json.loads(raw_event)
+        if event["type"] == "sql":
+            sql.append(event["content"])
+        elif event["type"] == "answer":
+            answer.append(event["content"])
+        elif event["type"] == "error" and error is None:
+            error = event["content"]
+    return {
+        "type": "result",
+        "question": question,
+        "sql": "".join(sql) or None,
+        "answer": "".join(answer) or None,
+        "error": error,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_batch(questions: List[str]) -> AsyncGenerator[str, None]:
+    """
+    Answer a list of questions as NDJSON: one "result" line per distinct
+    question as soon as it completes, with the input positions it answers,
+    then a "stats" line.
+
+    Every question is classified before any LLM call, so off-topic ones
+    return at once. The rest run concurrently and overlap: while some wait
+    on SQL generation, others execute or stream their response. At most
+    BATCH_LLM_CONCURRENCY of them are inside an LLM stage at a time, and
+    identical SQL runs once for the whole batch.
+    """
+    started = time.perf_counter()
+    positions: Dict[str, List[int]] = {}
+    unique: List[str] = []
+    for index, question in enumerate(questions):
+        key = normalize_question(question)
+        if key not in positions:
+            positions[key] = []
+            unique.append(question)
+        positions[key].append(index)
+
+    classifications = [classify_query(question) for question in unique]
+    llm_slot = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    executor = SharedQueryExecutor()
+    tasks = [
+        asyncio.create_task(_answer(question, classification, llm_slot, executor))
+        for question, classification in zip(unique, classifications)
+    ]
+    answered = errors = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            result["indexes"] = positions[normalize_question(result["question"])]
+            if result["error"] is None:
+                answered += 1
+            else:
+                errors += 1
+            yield json.dumps(result) + "\n"
+    finally:
+        # The client went away: stop the questions still in flight
+        for task in tasks:
+            task.cancel()
+
+    seconds = time.perf_counter() - started
+    yield json.dumps({
+        "type": "stats",
+        "questions": len(questions),
+        "unique_questions": len(unique),
+        "answered": answered,
+        "errors": errors,
+        "queries_executed": executor.executed,
+        "queries_shared": executor.shared,
+        "seconds": round(seconds, 3),
+        "questions_per_second": round(len(questions) / seconds, 2) if seconds else None,
+    }) + "\n"
@@ -0,0 +1,58 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; '7.5' and "passenger's" stay one token."""
+    return _WORD.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of texts, backed by an inverted
+    token -> [(doc_id, term frequency)] index so a query only touches
+    the documents that contain one of its tokens.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for token, frequency in counts.items():
+                self.postings.setdefault(token, []).append((doc_id, frequency))
+
+        self.doc_count = len(self.doc_lengths)
+        self.avg_length = (sum(self.doc_lengths) / self.doc_count) if self.doc_count else 0.0
+        self.idf = {
+            token: math.log(1 + (self.doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self.postings.items()
+        }
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score of every document sharing at least one token with `query`."""
+        scores: Dict[int, float] = {}
+        k1, b, avg_length = self.k1, self.b, self.avg_length or 1.0
+        for token in set(tokenize(query)):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = self.idf[token]
+            for doc_id, frequency in docs:
+                norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+        return scores
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Top `k` (doc_id, score) pairs, best first; ties keep document order."""
+        scores = self.scores(query)
+        return heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
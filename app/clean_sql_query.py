@@ -1,65 +1,128 @@
 import re
+from typing import Iterable, Set
+
+from schema_names import SCHEMA_TABLES
+
+# Keywords normalized to uppercase. Single words only; multi-word keywords
+# such as ORDER BY are covered word by word.
+SQL_KEYWORDS = frozenset({
+    'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'IN', 'IS', 'NULL', 'LIKE',
+    'BETWEEN', 'ORDER', 'GROUP', 'BY', 'HAVING', 'LIMIT', 'OFFSET', 'ASC', 'DESC',
+    'AS', 'ON', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'UNION', 'ALL',
+    'DISTINCT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'WITH', 'EXISTS',
+    'INSERT', 'INTO', 'UPDATE', 'DELETE', 'SET', 'VALUES',
+})
+
+
+def _schema_identifiers() -> Set[str]:
+    names = set()
+    for table, columns in SCHEMA_TABLES.items():
+        names.add(table.lower())
+        names.update(column.lower() for column in columns)
+    return names
+
+
+# Double-quoted names that are real identifiers; any other double-quoted text
+# is a string literal the LLM quoted the wrong way.
+KNOWN_IDENTIFIERS = _schema_identifiers()
+
+# Body of the first markdown code fence, if the model wrapped its answer in one
+_CODE_FENCE = re.compile(r"```(?:sql)?[ \t]*\n?(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_ANSWER_LABEL = re.compile(r"^\s*(?:SQLQuery|SQL Query|SQL)\s*:\s*", re.IGNORECASE)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternation shaped as a prefix trie ('s(?:elect|et)'), much cheaper to scan than a flat list."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        alternation = "|".join(branches)
+        if "" in node:
+            return f"(?:{alternation})?"
+        return alternation if len(branches) == 1 else f"(?:{alternation})"
+
+    return render(trie)
+
+
+_KEYWORD_PATTERN = _trie_pattern(sorted(keyword.lower() for keyword in SQL_KEYWORDS))
+
+# Whitespace, comments, special tokens such as <|END_RESPONSE|>, and backticks
+_GAP = r"(?:\s|--[^\n]*|/\*.*?(?:\*/|$)|<\|.*?\|>|`)"
+
+_SPECIAL_ONLY = re.compile(r"(?:<\|.*?\|>|`)+", re.DOTALL)
+
+# A single scan over the query. String literals are matched first so nothing
+# inside them is rewritten. Text that is already canonical (single spaces,
+# ", " after commas, uppercase keywords) is not matched at all, so the
+# replacement callback only runs where something has to change.
+_TOKEN = re.compile(
+    rf"""
+      (?P<single>'[^']*(?:''[^']*)*(?:'|$))
+    | (?P<double>"[^"]*(?:""[^"]*)*(?:"|$))
+    | (?P<comma>,(?!\x20[^\s\-/<`,]){_GAP}*)
+    | (?P<gap>(?=[\s\-/<`])(?!\x20[^\s\-/<`,]){_GAP}+(?P<gap_comma>,{_GAP}*)?)
+    | (?P<keyword>\b(?=[A-Z]*[a-z])(?i:{_KEYWORD_PATTERN})\b)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def _double_quoted(token: str, identifiers: Iterable[str]) -> str:
+    body = token[1:-1] if len(token) > 1 and token.endswith('"') else token[1:]
+    body = body.replace('""', '"')
+    if body.lower() in identifiers:
+        return '"' + body.replace('"', '""') + '"'
+    return "'" + body.replace("'", "''") + "'"
+
+
+def _normalize_token(match: re.Match) -> str:
+    kind = match.lastgroup
+    token = match.group()
+    if kind == "single":
+        return token
+    if kind == "double":
+        return _double_quoted(token, KNOWN_IDENTIFIERS)
+    if kind == "comma":
+        # No space before a comma, exactly one after it
+        return ", "
+    if kind == "gap":
+        if match.group("gap_comma") is not None:
+            return ", "
+        # Special tokens and backticks vanish; whitespace and comments become one space
+        if _SPECIAL_ONLY.fullmatch(token):
+            return ""
+        return " "
+    return token.upper()
+
 
 def clean_sql_query(query: str) -> str:
+    """
+    Normalize LLM-generated SQL in a single tokenizing pass: drop special
+    tokens, code fences, comments and backticks, collapse whitespace, tidy
+    comma spacing, uppercase keywords and turn double-quoted text into
+    single-quoted literals. String literals are copied through untouched.
+    """
 
     # Handle case where query might be None or not a string
     if not isinstance(query, str):
         return ""
 
-    def remove_special_tokens(sql):
-        # Remove the END_RESPONSE token and any similar markers
-        sql = re.sub(r'<\|END_RESPONSE\|>', '', sql)
-        sql = re.sub(r'<\|.*?\|>', '', sql)  # Remove any similar tokens
-        return sql
-
-    def remove_sql_comments(sql):
-        # Remove single line comments
-        sql = re.sub(r'--.*$', '', sql, flags=re.MULTILINE)
-        # Remove multi-line comments
-        sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.DOTALL)
-        return sql
-
-    def standardize_whitespace(sql):
-        # Replace multiple spaces with single space
-        sql = re.sub(r'\s+', ' ', sql)
-        # Add space after commas if missing
-        sql = re.sub(r',(?!\s)', ', ', sql)
-        # Remove space before commas
-        sql = re.sub(r'\s+,', ',', sql)
-        return sql.strip()
-
-    def remove_code_blocks(sql):
-        # Remove markdown code blocks
-        sql = re.sub(r'```sql\s*', '', sql)
-        sql = re.sub(r'```.*', '', sql)
-        # Remove backticks
-        sql = sql.replace('`', '')
-        return sql
-
-    def fix_quotes(sql):
-        # Standardize quotes for string literals
-        sql = re.sub(r'"([^"]*)"', r"'\1'", sql)
-        # Fix cases where there might be nested quotes
-        sql = re.sub(r"''", "'", sql)
-        return sql
-
-    def normalize_keywords(sql):
-        # Common SQL keywords to uppercase
-        keywords = ['SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'ORDER BY', 
-                   'GROUP BY', 'LIMIT', 'JOIN', 'LEFT JOIN', 'RIGHT JOIN',
-                   'INNER JOIN', 'HAVING', 'UPDATE', 'DELETE', 'INSERT INTO']
-
-        # Case-insensitive replacement of keywords
-        pattern = r'\b(' + '|'.join(re.escape(word) for word in keywords) + r')\b'
-        sql = re.sub(pattern, lambda m: m.group(0).upper(), sql, flags=re.IGNORECASE)
-        return sql
-
-    # Apply cleaning steps in sequence
-    query = remove_special_tokens(query)
-    query = remove_code_blocks(query)
-    query = remove_sql_comments(query)
-    query = standardize_whitespace(query)
-    query = fix_quotes(query)
-    query = normalize_keywords(query)
-
-    return query
+    fenced = _CODE_FENCE.search(query)
+    if fenced:
+        query = fenced.group(1)
+    query = _ANSWER_LABEL.sub("", query, count=1)
+
+    return _TOKEN.sub(_normalize_token, query).strip()
+
+
+def sql_cache_key(query: str) -> str:
+    """Canonical form of a generated query, suitable as a cache key."""
+    return clean_sql_query(query).rstrip("; ")
@@ -1,30 +1,58 @@
 import logging
 import os
+from functools import lru_cache
 from llm import get_llm
-from sqlalchemy import create_engine
-from langchain_community.utilities import SQLDatabase
 
-from paths import get_sqlite_db_path
+from paths import GenerationCache, get_sqlite_db_path, resolve_database
 
 # LLM setup
 default_platform = os.getenv('DEFAULT_LLM_PLATFORM', 'LMSTUDIO_OPENAI')
 
-flight_llm = get_llm(
-    model_name=os.getenv('FLIGHT_LLM_MODEL', 'qwen/qwen3-30b-a3b-2507'),
-    platform_name=os.getenv('FLIGHT_LLM_PLATFORM', default_platform),
-)
-luggage_llm = get_llm(
-    model_name=os.getenv('LUGGAGE_LLM_MODEL', 'lmstudio-community/Meta-Llama-3.1-8B-Instruct-GGUF'),
-    platform_name=os.getenv('LUGGAGE_LLM_PLATFORM', default_platform),
-)
+FLIGHT_LLM_MODEL = os.getenv('FLIGHT_LLM_MODEL', 'qwen/qwen3-30b-a3b-2507')
+FLIGHT_LLM_PLATFORM = os.getenv('FLIGHT_LLM_PLATFORM', default_platform)
+LUGGAGE_LLM_MODEL = os.getenv('LUGGAGE_LLM_MODEL', 'lmstudio-community/Meta-Llama-3.1-8B-Instruct-GGUF')
+LUGGAGE_LLM_PLATFORM = os.getenv('LUGGAGE_LLM_PLATFORM', default_platform)
+
+
+# Clients are built on first use so importing the app does not load every
+# provider SDK before the server can start.
+@lru_cache(maxsize=None)
+def get_flight_llm():
+    return get_llm(model_name=FLIGHT_LLM_MODEL, platform_name=FLIGHT_LLM_PLATFORM)
+
+
+@lru_cache(maxsize=None)
+def get_luggage_llm():
+    return get_llm(model_name=LUGGAGE_LLM_MODEL, platform_name=LUGGAGE_LLM_PLATFORM)
+
 
 # Database setup
-URL = f"sqlite:///{get_sqlite_db_path()}"
-engine = create_engine(URL, echo=False)
-db = SQLDatabase(engine)
+SQLITE_DB_PATH = get_sqlite_db_path()
+URL = f"sqlite:///{SQLITE_DB_PATH}"
+
+
+def _build_sql_database(sqlite_file: str):
+    from sqlalchemy import create_engine
+    from langchain_community.utilities import SQLDatabase
+
+    engine = create_engine(f"sqlite:///{sqlite_file}", echo=False)
+    return SQLDatabase(engine)
+
+
+# One SQLDatabase per snapshot generation; closed once its generation file is removed
+_sql_databases = GenerationCache(_build_sql_database, lambda db: db._engine.dispose())
+
+
+def get_db():
+    """SQLDatabase over the generation of the flights database the current request reads."""
+    return _sql_databases.get(resolve_database(SQLITE_DB_PATH))
+
 
 # Maximum number of SQL generation attempts
 MAX_ATTEMPTS = 3
 
-logging.basicConfig(level=logging.ERROR)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "ERROR").upper())
 logger = logging.getLogger(__name__)
+# Per-request traces and client disconnects, shown without the INFO-level SQL prompt dumps
+trace_logger = logging.getLogger("request_trace")
+trace_logger.setLevel(os.getenv("TRACE_LOG_LEVEL", "INFO").upper())
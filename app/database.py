@@ -1,17 +1,52 @@
 import json
+import math
+import os
+import re
 import sqlite3
+import statistics
 import time
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from sqlalchemy import REAL, Column, Integer, String, create_engine
+from sqlalchemy import REAL, Column, Index, Integer, String, create_engine, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from paths import resolve_database
+
 # 1. Define the Database Model (Table Structure)
 Base = declarative_base()
 
 SYNC_KEY_LAST_SUCCESS_EPOCH = "last_successful_online_sync_epoch"
+# Incremented in the same transaction as every write to flights
+SYNC_KEY_DATA_VERSION = "data_version"
+# Lease row naming the one worker process that runs the online sync
+SYNC_KEY_SYNC_LEASE = "sync_leader_lease"
+
+# Source name of rows loaded from data/flight_data.json
+STATIC_SOURCE = "static"
+# When two sources report the same flight, the one listed first wins; unlisted sources rank last
+FLIGHT_PROVIDER_PRECEDENCE = [
+    name.strip().lower()
+    for name in os.getenv("FLIGHT_PROVIDER_PRECEDENCE", f"amadeus,{STATIC_SOURCE},fake").split(",")
+    if name.strip()
+]
+# Width of the price buckets in canonical flight keys, in percent
+FLIGHT_DEDUP_PRICE_BUCKET_PERCENT = float(os.getenv("FLIGHT_DEDUP_PRICE_BUCKET_PERCENT", "5"))
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# "4h 15m", "4 hours 15 minutes" and ISO 8601 "PT4H15M"
+_DURATION_PART = re.compile(r"(\d+)\s*([hm])", re.IGNORECASE)
+
+# SQLite caps bound parameters per statement (999 on older builds)
+_IN_CHUNK_SIZE = 900
+
+# Callbacks run with the sqlite file path after flight data or schema changes,
+# used to drop in-process caches derived from the database.
+_data_change_listeners: List[Callable[[str], None]] = []
 
 
 class Flight(Base):
@@ -20,6 +55,7 @@ class Flight(Base):
     uuid = Column(String, primary_key=True)
     airline = Column(String)
     date = Column(String)
+    departureTime = Column(String)  # HH:MM local time; NULL for sources that only report the day
     duration = Column(String)
     flightType = Column(String)
     price = Column(Integer)
@@ -30,13 +66,114 @@ class Flight(Base):
     link = Column(String)
     rainProbability = Column(REAL)
     freeMeal = Column(Integer)
+    canonicalKey = Column(String, index=True)
+    source = Column(String)
+    # Typed copies of duration and date that range filters can use an index for
+    durationMinutes = Column(Integer, index=True)
+    departureDay = Column(Integer, index=True)  # days since 1970-01-01
+
+    __table_args__ = (
+        Index("ix_flights_route_date", "origin", "destination", "date"),
+        # Keyset pages of /flights/search on a route are range scans of this index
+        Index("ix_flights_route_price", "origin", "destination", "price", "uuid"),
+    )
 
 
-def _coerce_flight(item: Dict[str, Any]) -> Dict[str, Any]:
-    return {
+class PriceObservation(Base):
+    """A flight's price from the moment it was first seen or changed; unchanged prices add no rows."""
+    __tablename__ = 'price_observations'
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    flightUuid = Column(String, primary_key=True)
+    observedAt = Column(Integer, primary_key=True)  # epoch seconds
+    price = Column(Integer, nullable=False)
+
+
+class RouteFareCalendar(Base):
+    """Cheapest fare per route and departure date, kept in step with `flights` by upsert_flights."""
+    __tablename__ = 'route_fare_calendar'
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    origin = Column(String, primary_key=True)
+    destination = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)
+    departureDay = Column(Integer)
+    minPrice = Column(Integer)
+    airline = Column(String)  # of the cheapest flight
+    flightUuid = Column(String)  # the cheapest flight
+    flights = Column(Integer)
+    updatedAt = Column(Integer)
+
+
+class RouteDailyPrice(Base):
+    """Cheapest and median fare on a route as seen by the ingestion on `day`."""
+    __tablename__ = 'route_daily_prices'
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    origin = Column(String, primary_key=True)
+    destination = Column(String, primary_key=True)
+    day = Column(String, primary_key=True)  # YYYY-MM-DD the prices were observed
+    minPrice = Column(Integer)
+    medianPrice = Column(Integer)
+    flights = Column(Integer)
+    updatedAt = Column(Integer)
+
+
+def source_rank(source: Optional[str]) -> int:
+    """Position of `source` in FLIGHT_PROVIDER_PRECEDENCE; lower wins."""
+    try:
+        return FLIGHT_PROVIDER_PRECEDENCE.index((source or "").lower())
+    except ValueError:
+        return len(FLIGHT_PROVIDER_PRECEDENCE)
+
+
+def _price_bucket(price: Optional[int]) -> str:
+    if not price or price <= 0:
+        return "-"
+    # Logarithmic buckets so the tolerance is relative to the fare
+    return str(int(math.log(price) / math.log1p(FLIGHT_DEDUP_PRICE_BUCKET_PERCENT / 100)))
+
+
+def canonical_flight_key(item: Dict[str, Any]) -> str:
+    """
+    Source-independent identity of a flight: route, departure day, airline
+    and price bucket. The bundled JSON only has the day, so the departure
+    time is left out of the key and compared by `same_departure` instead.
+    """
+    parts = [item.get("origin"), item.get("destination"), item.get("date"), item.get("airline")]
+    return "|".join(str(part or "").strip().lower() for part in parts) + "|" + _price_bucket(item.get("price"))
+
+
+def same_departure(time_a: Optional[str], time_b: Optional[str]) -> bool:
+    """Two rows under one canonical key are the same flight unless both carry a departure time and they differ."""
+    return not (time_a and time_b and time_a != time_b)
+
+
+def duration_to_minutes(duration: Optional[str]) -> Optional[int]:
+    if not duration:
+        return None
+    parts = _DURATION_PART.findall(duration)
+    if not parts:
+        return None
+    return sum(int(value) * (60 if unit.lower() == "h" else 1) for value, unit in parts)
+
+
+def departure_day(day: Optional[str]) -> Optional[int]:
+    """Days since 1970-01-01 for a YYYY-MM-DD date; SQLite: CAST(julianday(day) - 2440587.5 AS INTEGER)."""
+    if not day:
+        return None
+    try:
+        return date.fromisoformat(day[:10]).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+
+def _coerce_flight(item: Dict[str, Any], source: Optional[str] = None) -> Dict[str, Any]:
+    flight = {
         "uuid": item["uuid"],
         "airline": item.get("airline"),
         "date": item.get("date"),
+        "departureTime": item.get("departureTime"),
         "duration": item.get("duration"),
         "flightType": item.get("flightType"),
         "price": int(item["price"]) if item.get("price") is not None else None,
@@ -47,11 +184,25 @@ def _coerce_flight(item: Dict[str, Any]) -> Dict[str, Any]:
         "link": item.get("link"),
         "rainProbability": float(item["rainProbability"]) if item.get("rainProbability") is not None else None,
         "freeMeal": int(bool(item.get("freeMeal"))) if item.get("freeMeal") is not None else None,
+        "source": (item.get("source") or source or STATIC_SOURCE).lower(),
     }
+    flight["canonicalKey"] = canonical_flight_key(flight)
+    flight["durationMinutes"] = duration_to_minutes(flight["duration"])
+    flight["departureDay"] = departure_day(flight["date"])
+    return flight
+
+
+def add_data_change_listener(callback: Callable[[str], None]) -> None:
+    _data_change_listeners.append(callback)
+
+
+def notify_data_changed(sqlite_file: str) -> None:
+    for callback in _data_change_listeners:
+        callback(sqlite_file)
 
 
 def _ensure_sync_metadata_table(sqlite_file: str) -> None:
-    conn = sqlite3.connect(sqlite_file)
+    conn = sqlite3.connect(resolve_database(sqlite_file))
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -70,7 +221,7 @@ def _ensure_sync_metadata_table(sqlite_file: str) -> None:
 
 def get_sync_metadata(key: str, sqlite_file: str) -> Optional[str]:
     _ensure_sync_metadata_table(sqlite_file)
-    conn = sqlite3.connect(sqlite_file)
+    conn = sqlite3.connect(resolve_database(sqlite_file))
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT value FROM sync_metadata WHERE key=?", (key,))
@@ -82,7 +233,7 @@ def get_sync_metadata(key: str, sqlite_file: str) -> Optional[str]:
 
 def set_sync_metadata(key: str, value: str, sqlite_file: str) -> None:
     _ensure_sync_metadata_table(sqlite_file)
-    conn = sqlite3.connect(sqlite_file)
+    conn = sqlite3.connect(resolve_database(sqlite_file))
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -100,8 +251,78 @@ def set_sync_metadata(key: str, value: str, sqlite_file: str) -> None:
         conn.close()
 
 
+def get_data_version(sqlite_file: str) -> int:
+    """Counter bumped by every committed write to flights; 0 before the first one."""
+    return int(get_sync_metadata(SYNC_KEY_DATA_VERSION, sqlite_file) or 0)
+
+
+def try_acquire_lease(key: str, owner: str, ttl_seconds: int, sqlite_file: str) -> bool:
+    """
+    Take or renew the lease row `key` for `owner`; True while `owner` holds it.
+
+    A single upsert decides it: the row is written only if it is missing,
+    already ours, or its last heartbeat is older than `ttl_seconds`. Calling
+    this again before the lease expires is the heartbeat.
+    """
+    _ensure_sync_metadata_table(sqlite_file)
+    now = int(time.time())
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        cursor = conn.execute(
+            """
+            INSERT INTO sync_metadata(key, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at
+            WHERE sync_metadata.value = excluded.value OR sync_metadata.updated_at < ?
+            """,
+            (key, owner, now, now - ttl_seconds),
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def release_lease(key: str, owner: str, sqlite_file: str) -> None:
+    """Give up the lease if `owner` holds it, so another worker can take over without waiting for expiry."""
+    _ensure_sync_metadata_table(sqlite_file)
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        conn.execute("DELETE FROM sync_metadata WHERE key=? AND value=?", (key, owner))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class DataVersionWatcher:
+    """
+    Data-change listeners only run in the process that wrote. Polling the
+    data version lets every worker refresh its caches after a sync run by
+    another one; changes this process already notified about are skipped.
+    """
+
+    def __init__(self, sqlite_file: str):
+        self.sqlite_file = sqlite_file
+        self.seen: Optional[int] = None
+        add_data_change_listener(self._changed_here)
+
+    def _changed_here(self, sqlite_file: Optional[str] = None) -> None:
+        # Listeners already ran; take the next version read as the baseline.
+        # Writes to an unpublished snapshot generation do not count.
+        if sqlite_file is None or sqlite_file == self.sqlite_file:
+            self.seen = None
+
+    def poll(self) -> bool:
+        """Notify listeners if another process changed the data since the last poll."""
+        version = get_data_version(self.sqlite_file)
+        changed = self.seen is not None and version != self.seen
+        if changed:
+            notify_data_changed(self.sqlite_file)
+        self.seen = version
+        return changed
+
+
 def get_flight_count(sqlite_file: str) -> int:
-    conn = sqlite3.connect(sqlite_file)
+    conn = sqlite3.connect(resolve_database(sqlite_file))
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='flights'")
@@ -116,29 +337,333 @@ def get_flight_count(sqlite_file: str) -> int:
         conn.close()
 
 
-def upsert_flights(flights: Iterable[Dict[str, Any]], sqlite_file: str) -> Dict[str, int]:
-    """Insert or update flights by uuid."""
-    engine = create_engine(f"sqlite:///{sqlite_file}")
+def _add_canonical_keys(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(flights)")}
+    if "canonicalKey" not in columns:
+        conn.execute('ALTER TABLE flights ADD COLUMN "canonicalKey" VARCHAR')
+    if "source" not in columns:
+        conn.execute('ALTER TABLE flights ADD COLUMN "source" VARCHAR')
+
+    # Online rows use a 32-char sha256 prefix as uuid; bundled JSON rows use UUID4 strings
+    rows = conn.execute(
+        "SELECT rowid, uuid, origin, destination, date, airline, price, source FROM flights"
+    ).fetchall()
+    updates = []
+    for rowid, uuid, origin, destination, day, airline, price, source in rows:
+        if not source:
+            source = "amadeus" if uuid and len(uuid) == 32 and "-" not in uuid else STATIC_SOURCE
+        item = {"origin": origin, "destination": destination, "date": day, "airline": airline, "price": price}
+        updates.append((canonical_flight_key(item), source, rowid))
+    conn.executemany('UPDATE flights SET "canonicalKey"=?, source=? WHERE rowid=?', updates)
+
+    # Collapse each key across sources: keep the rows of the highest-precedence
+    # source (ties go to the source of the oldest row) and drop the other
+    # sources' rows. Rows of one source are distinct offers and all stay.
+    rows_by_key: Dict[str, List[Tuple[str, int]]] = {}
+    for key, source, rowid in conn.execute('SELECT "canonicalKey", source, rowid FROM flights ORDER BY rowid'):
+        rows_by_key.setdefault(key, []).append((source, rowid))
+    duplicates: List[int] = []
+    for key_rows in rows_by_key.values():
+        kept = min((source for source, _ in key_rows), key=source_rank)
+        duplicates.extend(rowid for source, rowid in key_rows if source != kept)
+    conn.executemany("DELETE FROM flights WHERE rowid=?", [(rowid,) for rowid in duplicates])
+    conn.execute('CREATE INDEX IF NOT EXISTS "ix_flights_canonicalKey" ON flights ("canonicalKey")')
+
+
+def _add_departure_time(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(flights)")}
+    if "departureTime" not in columns:
+        conn.execute('ALTER TABLE flights ADD COLUMN "departureTime" VARCHAR')
+    # Rows written while keys included the departure time go back to day keys
+    rows = conn.execute("SELECT rowid, origin, destination, date, airline, price FROM flights").fetchall()
+    conn.executemany(
+        'UPDATE flights SET "canonicalKey"=? WHERE rowid=?',
+        [
+            (canonical_flight_key(
+                {"origin": origin, "destination": destination, "date": day, "airline": airline, "price": price}
+            ), rowid)
+            for rowid, origin, destination, day, airline, price in rows
+        ],
+    )
+
+
+def _seed_price_observations(conn: sqlite3.Connection) -> None:
+    conn.execute('CREATE INDEX IF NOT EXISTS "ix_flights_route_date" ON flights (origin, destination, date)')
+    # Start every existing flight's history at its current price
+    conn.execute(
+        'INSERT OR IGNORE INTO price_observations ("flightUuid", "observedAt", price) '
+        "SELECT uuid, ?, price FROM flights WHERE price IS NOT NULL",
+        (int(time.time()),),
+    )
+
+
+def _add_typed_columns(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(flights)")}
+    if "durationMinutes" not in columns:
+        conn.execute('ALTER TABLE flights ADD COLUMN "durationMinutes" INTEGER')
+    if "departureDay" not in columns:
+        conn.execute('ALTER TABLE flights ADD COLUMN "departureDay" INTEGER')
+    rows = conn.execute("SELECT rowid, duration, date FROM flights").fetchall()
+    conn.executemany(
+        'UPDATE flights SET "durationMinutes"=?, "departureDay"=? WHERE rowid=?',
+        [(duration_to_minutes(duration), departure_day(day), rowid) for rowid, duration, day in rows],
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS "ix_flights_durationMinutes" ON flights ("durationMinutes")')
+    conn.execute('CREATE INDEX IF NOT EXISTS "ix_flights_departureDay" ON flights ("departureDay")')
+
+
+# SQLite returns the bare columns (uuid, airline) of the row that holds MIN(price)
+_FARE_CALENDAR_SELECT = """
+    SELECT origin, destination, date, "departureDay", MIN(price), airline, uuid, COUNT(*), :now
+    FROM flights
+    WHERE price IS NOT NULL AND origin IS NOT NULL AND destination IS NOT NULL AND date IS NOT NULL
+"""
+
+
+def _build_fare_calendar(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO route_fare_calendar "
+        '(origin, destination, date, "departureDay", "minPrice", airline, "flightUuid", flights, "updatedAt") '
+        + _FARE_CALENDAR_SELECT + " GROUP BY origin, destination, date",
+        {"now": int(time.time())},
+    )
+
+
+def _add_route_price_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS "ix_flights_route_price" ON flights (origin, destination, price, uuid)'
+    )
+
+
+# Applied in order after create_all; PRAGMA user_version records how many have run on a file
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _add_canonical_keys,
+    _seed_price_observations,
+    _add_typed_columns,
+    _build_fare_calendar,
+    _add_route_price_index,
+    _add_departure_time,
+]
+
+
+def ensure_schema(sqlite_file: str) -> Engine:
+    """Create missing tables and apply pending migrations; returns an engine for the file."""
+    engine = create_engine(f"sqlite:///{resolve_database(sqlite_file)}")
     Base.metadata.create_all(engine)
+    migrate_database(sqlite_file)
+    return engine
+
+
+def migrate_database(sqlite_file: str) -> int:
+    """Bring an existing flights table up to the current schema; returns the number of migrations applied."""
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='flights'")
+        if cursor.fetchone() is None:
+            return 0
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        pending = MIGRATIONS[version:]
+        for number, migration in enumerate(pending, start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+    finally:
+        conn.close()
+
+    if pending:
+        notify_data_changed(sqlite_file)
+    return len(pending)
+
+
+def _chunks(values: Sequence[str]) -> Iterable[Sequence[str]]:
+    for start in range(0, len(values), _IN_CHUNK_SIZE):
+        yield values[start:start + _IN_CHUNK_SIZE]
+
+
+def _upsert_rows(session: Any, model: Any, rows: List[Dict[str, Any]]) -> None:
+    """INSERT ... ON CONFLICT(primary key) DO UPDATE for a batch of mappings."""
+    if not rows:
+        return
+    keys = [column.name for column in model.__table__.primary_key.columns]
+    statement = sqlite_insert(model)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: statement.excluded[name] for name in rows[0] if name not in keys},
+        ),
+        rows,
+    )
+
+
+def _fare_calendar_cells(session: Any, items: Iterable[Dict[str, Any]], now: int) -> List[Dict[str, Any]]:
+    # One grouped ix_flights_route_date range read per route over the dates the batch touched
+    date_ranges: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for item in items:
+        if item["price"] is None or not (item["origin"] and item["destination"] and item["date"]):
+            continue
+        route = (item["origin"], item["destination"])
+        low, high = date_ranges.get(route, (item["date"], item["date"]))
+        date_ranges[route] = (min(low, item["date"]), max(high, item["date"]))
+
+    cells = []
+    for (origin, destination), (low, high) in sorted(date_ranges.items()):
+        result = session.execute(
+            text(
+                _FARE_CALENDAR_SELECT
+                + " AND origin = :origin AND destination = :destination AND date BETWEEN :low AND :high"
+                + " GROUP BY date"
+            ),
+            {"now": now, "origin": origin, "destination": destination, "low": low, "high": high},
+        )
+        for row in result:
+            cells.append(dict(zip(
+                ("origin", "destination", "date", "departureDay", "minPrice", "airline", "flightUuid", "flights", "updatedAt"),
+                row,
+            )))
+    return cells
+
+
+def _route_daily_prices(session: Any, routes: Iterable[Tuple[str, str]], now: int) -> List[Dict[str, Any]]:
+    # Recomputed from every upcoming fare on the route (an ix_flights_route_date
+    # range read), so partial batches do not skew the day's figures
+    day = date.fromtimestamp(now).isoformat()
+    aggregates = []
+    for origin, destination in routes:
+        prices = [
+            price
+            for (price,) in session.query(Flight.price).filter(
+                Flight.origin == origin,
+                Flight.destination == destination,
+                Flight.date >= day,
+                Flight.price.isnot(None),
+            )
+        ]
+        if not prices:
+            continue
+        aggregates.append({
+            "origin": origin,
+            "destination": destination,
+            "day": day,
+            "minPrice": min(prices),
+            "medianPrice": int(statistics.median(prices)),
+            "flights": len(prices),
+            "updatedAt": now,
+        })
+    return aggregates
+
+
+def upsert_flights(
+    flights: Iterable[Dict[str, Any]],
+    sqlite_file: str,
+    source: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Insert or update flights by uuid, deduplicated by canonical key across sources.
+
+    A flight already stored by another source under the same key (and the
+    same departure time, when both rows have one) is updated in place when the incoming row's source has higher precedence, and
+    skipped otherwise. Rows of the same source never replace each other.
+    `source` applies to rows that do not carry one.
+
+    New prices are appended to `price_observations`, today's row in
+    `route_daily_prices` is replaced for every route in the batch, and the
+    `route_fare_calendar` cells for the batch's routes and dates are
+    recomputed. The data version in `sync_metadata` is bumped in the same
+    transaction.
+    """
+    engine = ensure_schema(sqlite_file)
+    _ensure_sync_metadata_table(sqlite_file)
+
+    # Collapse the batch first: last row wins per uuid. Rows of different
+    # sources that are the same flight keep the best source's row; rows of
+    # one source are distinct offers.
+    by_uuid: Dict[str, Dict[str, Any]] = {}
+    for raw_item in flights:
+        item = _coerce_flight(raw_item, source)
+        by_uuid[item["uuid"]] = item
+    batch: Dict[str, List[Dict[str, Any]]] = {}
+    deduplicated = 0
+    for item in by_uuid.values():
+        current = batch.setdefault(item["canonicalKey"], [])
+        matches = [
+            other for other in current
+            if other["source"] != item["source"] and same_departure(other["departureTime"], item["departureTime"])
+        ]
+        if matches:
+            if source_rank(item["source"]) >= min(source_rank(other["source"]) for other in matches):
+                deduplicated += 1
+                continue
+            deduplicated += len(matches)
+            current[:] = [other for other in current if not any(other is match for match in matches)]
+        current.append(item)
+    items = [item for key_items in batch.values() for item in key_items]
 
     Session = sessionmaker(bind=engine)
     session = Session()
 
-    inserted = 0
-    updated = 0
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    observations: List[Dict[str, Any]] = []
+    now = int(time.time())
 
     try:
-        for raw_item in flights:
-            item = _coerce_flight(raw_item)
-            existing = session.query(Flight).filter_by(uuid=item['uuid']).first()
-            if existing:
-                for key, value in item.items():
-                    setattr(existing, key, value)
-                updated += 1
+        uuids = [item["uuid"] for item in items]
+        stored_prices: Dict[str, Optional[int]] = {}
+        for chunk in _chunks(uuids):
+            stored_prices.update(session.query(Flight.uuid, Flight.price).filter(Flight.uuid.in_(chunk)))
+
+        keys = sorted({item["canonicalKey"] for item in items if item["uuid"] not in stored_prices})
+        stored_by_key: Dict[str, List[Tuple[str, str, Optional[int], Optional[str]]]] = {}
+        for chunk in _chunks(keys):
+            query = session.query(
+                Flight.canonicalKey, Flight.uuid, Flight.source, Flight.price, Flight.departureTime
+            ).filter(Flight.canonicalKey.in_(chunk))
+            for key, *stored in query:
+                stored_by_key.setdefault(key, []).append(tuple(stored))
+
+        claimed = set(stored_prices)
+        for item in items:
+            if item["uuid"] in stored_prices:
+                row, previous_price = item, stored_prices[item["uuid"]]
+                updates.append(row)
             else:
-                session.add(Flight(**item))
-                inserted += 1
+                # Only a row of another source can be the same flight
+                candidates = [
+                    stored for stored in stored_by_key.get(item["canonicalKey"], ())
+                    if stored[1] != item["source"]
+                    and stored[0] not in claimed
+                    and same_departure(stored[3], item["departureTime"])
+                ]
+                stored = min(candidates, key=lambda candidate: source_rank(candidate[1]), default=None)
+                if stored is None:
+                    row, previous_price = item, None
+                    inserts.append(row)
+                elif source_rank(item["source"]) <= source_rank(stored[1]):
+                    # Same flight from a preferred source: refresh the stored row, keep its uuid
+                    row, previous_price = {**item, "uuid": stored[0]}, stored[2]
+                    claimed.add(stored[0])
+                    updates.append(row)
+                else:
+                    deduplicated += 1
+                    continue
+            if row["price"] is not None and row["price"] != previous_price:
+                observations.append({"flightUuid": row["uuid"], "observedAt": now, "price": row["price"]})
 
+        session.bulk_insert_mappings(Flight, inserts)
+        session.bulk_update_mappings(Flight, updates)
+        _upsert_rows(session, PriceObservation, observations)
+        routes = {(item["origin"], item["destination"]) for item in items if item["origin"] and item["destination"]}
+        _upsert_rows(session, RouteDailyPrice, _route_daily_prices(session, sorted(routes), now))
+        _upsert_rows(session, RouteFareCalendar, _fare_calendar_cells(session, items, now))
+        if inserts or updates:
+            session.execute(
+                text(
+                    "INSERT INTO sync_metadata(key, value, updated_at) VALUES (:key, '1', :now) "
+                    "ON CONFLICT(key) DO UPDATE SET value=CAST(value AS INTEGER) + 1, updated_at=excluded.updated_at"
+                ),
+                {"key": SYNC_KEY_DATA_VERSION, "now": now},
+            )
         session.commit()
     except Exception as e:
         session.rollback()
@@ -146,7 +671,13 @@ def upsert_flights(flights: Iterable[Dict[str, Any]], sqlite_file: str) -> Dict[
     finally:
         session.close()
 
-    return {"inserted": inserted, "updated": updated}
+    notify_data_changed(sqlite_file)
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "deduplicated": deduplicated,
+        "price_changes": len(observations),
+    }
 
 
 def json_to_sqlite(json_file: str, sqlite_file: str) -> Dict[str, int]:
@@ -159,9 +690,9 @@ def json_to_sqlite(json_file: str, sqlite_file: str) -> Dict[str, int]:
     with open(json_file, 'r', encoding='utf-8') as file:
         data: List[Dict[str, Any]] = json.load(file)
 
-    stats = upsert_flights(data, sqlite_file)
+    stats = upsert_flights(data, sqlite_file, source=STATIC_SOURCE)
     print(
         f"Database operation complete. Inserted {stats['inserted']} new records, "
-        f"updated {stats['updated']} existing records."
+        f"updated {stats['updated']} existing records, skipped {stats['deduplicated']} duplicates."
     )
     return stats
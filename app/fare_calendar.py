@@ -0,0 +1,54 @@
+import sqlite3
+from datetime import date
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from paths import resolve_database
+
+CALENDAR_FIELDS = ("date", "minPrice", "airline", "flights", "flightUuid")
+
+
+class CalendarDay(NamedTuple):
+    date: str
+    min_price: int
+    airline: Optional[str]
+    flights: int
+    flight_uuid: Optional[str]
+
+
+def get_fare_calendar(
+    origin: str,
+    destination: str,
+    sqlite_file: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[CalendarDay]:
+    """Cheapest fare per departure date on a route, read from the materialized route_fare_calendar."""
+    sql = (
+        'SELECT date, "minPrice", airline, flights, "flightUuid" FROM route_fare_calendar '
+        "WHERE origin=? AND destination=?"
+    )
+    parameters: List[Any] = [origin, destination]
+    if date_from:
+        sql += " AND date >= ?"
+        parameters.append(date_from.isoformat())
+    if date_to:
+        sql += " AND date <= ?"
+        parameters.append(date_to.isoformat())
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        rows = conn.execute(sql + " ORDER BY date", parameters).fetchall()
+    finally:
+        conn.close()
+    return [CalendarDay(*row) for row in rows]
+
+
+def calendar_payload(origin: str, destination: str, days: List[CalendarDay]) -> Dict[str, Any]:
+    """Column-oriented JSON: field names once, then one short array per day."""
+    cheapest = min(days, key=lambda day: day.min_price) if days else None
+    return {
+        "origin": origin,
+        "destination": destination,
+        "fields": list(CALENDAR_FIELDS),
+        "days": [list(day) for day in days],
+        "cheapest": list(cheapest) if cheapest else None,
+    }
@@ -0,0 +1,142 @@
+import base64
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from sqlalchemy import create_engine, select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from database import Flight, add_data_change_listener, departure_day, get_data_version
+from models import FlightSearchRequest
+from paths import GenerationCache, resolve_database
+from sql_builder import DIRECT_FLIGHT_TYPES, FLIGHT_COLUMNS, canonical_city
+
+_COLUMNS = [getattr(Flight, name) for name in FLIGHT_COLUMNS]
+_PRICE = FLIGHT_COLUMNS.index("price")
+_UUID = FLIGHT_COLUMNS.index("uuid")
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued by /flights/search for the same sort order."""
+
+
+def _create_engine(sqlite_file: str) -> Engine:
+    return create_engine(f"sqlite:///{sqlite_file}")
+
+
+# One engine per snapshot generation; disposed once its generation file is removed
+_engines = GenerationCache(_create_engine, Engine.dispose)
+
+
+def encode_cursor(sort: str, price: int, uuid: str) -> str:
+    """Opaque keyset cursor: the (price, uuid) of the last row of a page."""
+    return base64.urlsafe_b64encode(orjson.dumps([sort, price, uuid])).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[int, str]:
+    try:
+        cursor_sort, price, uuid = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if cursor_sort != sort or not isinstance(price, int) or not isinstance(uuid, str):
+        raise InvalidCursor("Cursor does not belong to this sort order")
+    return price, uuid
+
+
+def build_search_statement(request: FlightSearchRequest) -> Select:
+    """
+    Parameterized SELECT over the Flight model for one page of results.
+
+    Pages are ordered by (price, uuid) and continue after the cursor's key
+    instead of using OFFSET, so every page costs the same. With a route
+    given, ix_flights_route_price serves both the filter and the order.
+    """
+    # Rows without a price have no place in the (price, uuid) order
+    conditions = [Flight.price.isnot(None)]
+    if request.origin:
+        conditions.append(Flight.origin == canonical_city(request.origin))
+    if request.destination:
+        conditions.append(Flight.destination == canonical_city(request.destination))
+    if request.date_from:
+        conditions.append(Flight.departureDay >= departure_day(request.date_from.isoformat()))
+    if request.date_to:
+        conditions.append(Flight.departureDay <= departure_day(request.date_to.isoformat()))
+    if request.max_price is not None:
+        conditions.append(Flight.price <= request.max_price)
+    if request.nonstop:
+        conditions.append(Flight.flightType.in_(DIRECT_FLIGHT_TYPES))
+    if request.free_meal:
+        conditions.append(Flight.freeMeal == 1)
+    if request.max_rain_probability is not None:
+        conditions.append(Flight.rainProbability < request.max_rain_probability)
+
+    descending = request.sort == "price_desc"
+    if request.cursor:
+        key = tuple_(Flight.price, Flight.uuid)
+        after = tuple_(*decode_cursor(request.cursor, request.sort))
+        conditions.append(key < after if descending else key > after)
+    order = (Flight.price.desc(), Flight.uuid.desc()) if descending else (Flight.price, Flight.uuid)
+    # One extra row tells whether there is a next page
+    return select(*_COLUMNS).where(*conditions).order_by(*order).limit(request.limit + 1)
+
+
+def search_flights(request: FlightSearchRequest, sqlite_file: str) -> Dict[str, Any]:
+    """One page of flights as {"flights": [...], "next_cursor": ...}; raises InvalidCursor."""
+    statement = build_search_statement(request)
+    with _engines.get(resolve_database(sqlite_file)).connect() as conn:
+        rows = conn.execute(statement).all()
+    next_cursor = None
+    if len(rows) > request.limit:
+        rows = rows[:request.limit]
+        next_cursor = encode_cursor(request.sort, rows[-1][_PRICE], rows[-1][_UUID])
+    return {"flights": [dict(zip(FLIGHT_COLUMNS, row)) for row in rows], "next_cursor": next_cursor}
+
+
+_data_versions: Dict[str, int] = {}
+_lock = threading.Lock()
+_generation = 0
+
+
+def current_data_version(sqlite_file: str) -> int:
+    """The data version of `sqlite_file`, cached until the next data-change notification."""
+    key = os.path.realpath(sqlite_file)
+    version = _data_versions.get(key)
+    if version is not None:
+        return version
+
+    with _lock:
+        generation = _generation
+    version = get_data_version(sqlite_file)
+    with _lock:
+        # Drop the result if the data changed while it was being read.
+        if generation == _generation:
+            _data_versions[key] = version
+    return version
+
+
+def forget_data_version(sqlite_file: Optional[str] = None) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        if sqlite_file is None:
+            _data_versions.clear()
+        else:
+            _data_versions.pop(os.path.realpath(sqlite_file), None)
+
+
+add_data_change_listener(forget_data_version)
+
+
+def search_etag(request: FlightSearchRequest, data_version: int) -> str:
+    """Same request against the same data version, same body: the ETag needs no query."""
+    digest = hashlib.sha1(request.model_dump_json().encode()).hexdigest()[:16]
+    return f'"{data_version}-{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
@@ -1,18 +1,22 @@
 from typing import Tuple
 from sqlite3 import Error as SQLiteError
-from langchain.chains import create_sql_query_chain # pylint: disable=no-name-in-module
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 from clean_sql_query import clean_sql_query
-from sql_prompt import sql_prompt
+from sql_prompt import sql_prompt, SQL_TOP_K
 from verify_sql_prompt import verify_sql_prompt
 from strip_think_tags import strip_think_tags
-from config import flight_llm, db, MAX_ATTEMPTS, logger
+from schema_snapshot import get_schema_snapshot
+from config import get_flight_llm, SQLITE_DB_PATH, MAX_ATTEMPTS, logger
+from metrics import record_llm_usage, stage_timer
 
-async def get_table_info():
-    """Get database schema information"""
+async def get_table_info() -> str:
+    """
+    Get database schema information from the cached schema snapshot, so the
+    prompt prefix stays byte-identical until the data or schema changes
+    """
     try:
-        return db.get_table_info()
+        return get_schema_snapshot(SQLITE_DB_PATH)
     except (SQLAlchemyError, SQLiteError) as e:
         raise HTTPException(
             status_code=500,
@@ -20,18 +24,18 @@ async def get_table_info():
         ) from e
 
 class LoggingSQLChain:
-    def __init__(self, chain, _db):
-        self.chain = chain
-        self.db = _db
+    """Render the SQL prompt (static prefix first, question last) and invoke the LLM."""
+
+    def __init__(self, llm):
+        self.llm = llm
 
     async def ainvoke(self, inputs):
-        # Get the actual table info from the database
-        table_info = self.db.get_table_info()
+        table_info = await get_table_info()
 
         # Format the prompt with all variables
         formatted_prompt = sql_prompt.format(
             input=inputs["question"],
-            top_k=10,  # or whatever default you want
+            top_k=SQL_TOP_K,
             table_info=table_info
         )
 
@@ -40,7 +44,7 @@ class LoggingSQLChain:
         logger.info(formatted_prompt)
         logger.info("\n=== END RUNTIME SQL PROMPT ===\n")
 
-        return await self.chain.ainvoke(inputs)
+        return await self.llm.ainvoke(formatted_prompt, stop=["\nSQLResult:"])
 
 async def verify_sql(question: str, sql_query: str) -> Tuple[bool, str]:
     # Generate natural language response
@@ -49,7 +53,9 @@ async def verify_sql(question: str, sql_query: str) -> Tuple[bool, str]:
         "sql_query": sql_query,
     }
     verification_prompt = verify_sql_prompt.format(**sql_verify_input)
-    verification_response = await flight_llm.ainvoke(verification_prompt)
+    with stage_timer("verify_sql"):
+        verification_response = await get_flight_llm().ainvoke(verification_prompt)
+    record_llm_usage("verify_sql", verification_response)
     response_text = strip_think_tags(verification_response).strip().upper()
 
     if response_text.startswith("VALID"):
@@ -67,11 +73,12 @@ async def generate_sql(question: str, attempt: int = 1) -> str:
         raise ValueError(f"Failed to generate valid SQL query after {MAX_ATTEMPTS} attempts")
 
     # Initialize SQL generation chain with logging wrapper
-    sql_chain = create_sql_query_chain(llm=flight_llm, db=db, prompt=sql_prompt)
-    logging_chain = LoggingSQLChain(sql_chain, db)
+    logging_chain = LoggingSQLChain(get_flight_llm())
 
     # Generate SQL query
-    sql_query_response = await logging_chain.ainvoke({"question": question})
+    with stage_timer("generate_sql"):
+        sql_query_response = await logging_chain.ainvoke({"question": question})
+    record_llm_usage("generate_sql", sql_query_response)
     sql_query = strip_think_tags(sql_query_response)
     cleaned_query = clean_sql_query(sql_query)
 
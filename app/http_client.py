@@ -0,0 +1,42 @@
+import os
+from functools import lru_cache
+
+# Connection pool shared by every LLM and embedding backend
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32"))
+# Idle connections kept open for reuse, and for how long
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "16"))
+LLM_HTTP_KEEPALIVE_SECONDS = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "120"))
+# A local model can take minutes to load and answer; connecting should not
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "600"))
+LLM_HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+
+
+# httpx is imported on first use, like the provider SDKs in llm.py
+@lru_cache(maxsize=None)
+def get_http_transport():
+    """The keep-alive connection pool (httpx.AsyncHTTPTransport); SDKs that cannot take a client share this."""
+    import httpx
+
+    return httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_async_http_client():
+    """
+    One async HTTP client for all LLM and embedding calls, so requests to
+    the same server reuse warm connections instead of each SDK client
+    keeping its own pool.
+    """
+    import httpx
+
+    return httpx.AsyncClient(
+        transport=get_http_transport(),
+        timeout=httpx.Timeout(LLM_HTTP_TIMEOUT_SECONDS, connect=LLM_HTTP_CONNECT_TIMEOUT_SECONDS),
+        follow_redirects=True,
+    )
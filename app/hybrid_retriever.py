@@ -0,0 +1,154 @@
+import asyncio
+import math
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from bm25 import BM25Index
+from config import logger
+from policy_store import LoadedPolicy, PolicyStore, normalize_airline
+
+# hybrid: BM25 and embeddings fused with RRF; dense: embeddings only (BM25
+# while the embedding server is unavailable); bm25: no embedding server needed
+LUGGAGE_RETRIEVAL_MODE = os.getenv("LUGGAGE_RETRIEVAL_MODE", "hybrid").lower()
+LUGGAGE_CHUNK_TOKENS = int(os.getenv("LUGGAGE_CHUNK_TOKENS", "200"))
+LUGGAGE_CHUNK_OVERLAP_TOKENS = int(os.getenv("LUGGAGE_CHUNK_OVERLAP_TOKENS", "30"))
+
+# Standard reciprocal-rank-fusion constant; damps the weight of the very top ranks
+RRF_K = 60
+# After the embedding server fails, retrieval is lexical-only for this long
+DENSE_RETRY_SECONDS = 60.0
+
+Chunker = Callable[[str, int, int], List[str]]
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class ChunkIndex(NamedTuple):
+    version: Tuple[str, int, int]
+    chunks: List[str]
+    bm25: BM25Index
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _top_k(scores: Sequence[float], k: int) -> List[int]:
+    return sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[int]:
+    """Merge ranked lists of chunk ids; a chunk scores sum(1 / (k + rank)) over the lists."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=lambda chunk_id: (-fused[chunk_id], chunk_id))
+
+
+class HybridRetriever:
+    """
+    Luggage-policy retrieval over token-bounded chunks of each airline's policy.
+
+    The chunk set is built from the policy store on first use and rebuilt when
+    the policy file changes. BM25 and cosine similarity over chunk embeddings
+    run concurrently and their rankings are fused with reciprocal-rank fusion.
+    """
+
+    def __init__(
+        self,
+        store: PolicyStore,
+        chunker: Chunker,
+        embed: Embedder,
+        mode: str = LUGGAGE_RETRIEVAL_MODE,
+        chunk_tokens: int = LUGGAGE_CHUNK_TOKENS,
+        overlap_tokens: int = LUGGAGE_CHUNK_OVERLAP_TOKENS,
+    ):
+        self.store = store
+        self.chunker = chunker
+        self.embed = embed
+        self.mode = mode
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self._indexes: Dict[str, ChunkIndex] = {}
+        # Chunk embeddings per policy version, built once by a shared task
+        self._vectors: Dict[Tuple[str, int, int], "asyncio.Task[List[List[float]]]"] = {}
+        self._dense_disabled_until = 0.0
+
+    def _build_index(self, policy: LoadedPolicy) -> ChunkIndex:
+        text = "\n\n".join(policy.sections)
+        try:
+            chunks = self.chunker(text, self.chunk_tokens, self.overlap_tokens)
+        except Exception as exc:
+            # e.g. the tokenizer files cannot be downloaded; sections are the next best unit
+            logger.error("Chunking %s policy failed, using sections: %s", policy.name, exc)
+            chunks = list(policy.sections)
+        return ChunkIndex((policy.path, policy.mtime_ns, policy.size), chunks, BM25Index(chunks))
+
+    async def chunk_index(self, airline: str) -> Optional[ChunkIndex]:
+        policy = self.store.get(airline)
+        if policy is None:
+            return None
+        key = normalize_airline(airline)
+        index = self._indexes.get(key)
+        if index is None or index.version != (policy.path, policy.mtime_ns, policy.size):
+            stale = index.version if index else None
+            index = await asyncio.to_thread(self._build_index, policy)
+            self._indexes[key] = index
+            if stale is not None:
+                self._vectors.pop(stale, None)
+        return index
+
+    async def _chunk_vectors(self, index: ChunkIndex) -> List[List[float]]:
+        task = self._vectors.get(index.version)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            async def embed_chunks() -> List[List[float]]:
+                return [_normalize(vector) for vector in await self.embed(index.chunks)]
+
+            task = asyncio.ensure_future(embed_chunks())
+            self._vectors[index.version] = task
+        return await asyncio.shield(task)
+
+    def _lexical(self, index: ChunkIndex, query: str, candidates: int) -> List[int]:
+        return [chunk_id for chunk_id, _ in index.bm25.search(query, candidates)]
+
+    async def _dense(self, index: ChunkIndex, query: str, candidates: int) -> List[int]:
+        if time.monotonic() < self._dense_disabled_until:
+            return []
+        try:
+            chunk_vectors, query_vectors = await asyncio.gather(
+                self._chunk_vectors(index), self.embed([query])
+            )
+        except Exception as exc:
+            logger.error("Embedding request failed, using BM25 only: %s", exc)
+            self._dense_disabled_until = time.monotonic() + DENSE_RETRY_SECONDS
+            return []
+        query_vector = _normalize(query_vectors[0])
+        scores = [sum(a * b for a, b in zip(query_vector, vector)) for vector in chunk_vectors]
+        return _top_k(scores, candidates)
+
+    async def retrieve(self, airline: str, query: str, k: int = 3) -> Optional[List[str]]:
+        """
+        The `k` most relevant chunks of the airline's policy. Returns None when
+        there is no policy for the airline and an empty list when nothing matches.
+        """
+        index = await self.chunk_index(airline)
+        if index is None:
+            return None
+        candidates = max(k * 3, 10)
+        if self.mode == "bm25":
+            ranked = self._lexical(index, query, candidates)
+        elif self.mode == "dense":
+            ranked = await self._dense(index, query, candidates)
+            if not ranked:
+                ranked = self._lexical(index, query, candidates)
+        else:
+            # BM25 scores the chunks on a worker thread, so the loop can send
+            # the embedding request and wait for it at the same time
+            lexical, dense = await asyncio.gather(
+                asyncio.to_thread(self._lexical, index, query, candidates),
+                self._dense(index, query, candidates),
+            )
+            ranked = reciprocal_rank_fusion([lexical, dense])
+        return [index.chunks[chunk_id] for chunk_id in ranked[:k]]
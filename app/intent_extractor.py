@@ -0,0 +1,49 @@
+import os
+import re
+from datetime import date
+from typing import Optional
+
+from pydantic import ValidationError
+
+from config import get_flight_llm, logger
+from intent_prompt import intent_prompt
+from metrics import record_llm_usage, stage_timer
+from models import FlightIntent
+from strip_think_tags import strip_think_tags
+
+# One structured LLM call replaces SQL generation, SQL verification and
+# luggage-question extraction when it yields a usable intent.
+ENABLE_INTENT_EXTRACTION = os.getenv("ENABLE_INTENT_EXTRACTION", "false").lower() == "true"
+
+# Outermost {...} in the reply; models sometimes wrap the JSON in prose or a code fence
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def parse_intent(text: str) -> Optional[FlightIntent]:
+    """Validate the JSON object in an LLM reply; None if there is none or it does not fit the schema."""
+    match = _JSON_OBJECT.search(text)
+    if not match:
+        logger.warning("Intent extraction returned no JSON object")
+        return None
+    try:
+        return FlightIntent.model_validate_json(match.group())
+    except ValidationError as e:
+        logger.warning("Intent extraction returned invalid JSON: %s", e)
+        return None
+
+
+async def extract_intent(question: str) -> Optional[FlightIntent]:
+    """
+    Extract route, dates, sort order, filters and the luggage sub-question
+    in a single LLM call. Returns None on failure so callers can fall back
+    to generate_sql and extract_luggage_query.
+    """
+    prompt = intent_prompt.format(today=date.today().isoformat(), question=question)
+    try:
+        with stage_timer("intent_extraction"):
+            response = await get_flight_llm().ainvoke(prompt)
+    except Exception as e:
+        logger.error("Intent extraction failed: %s", e)
+        return None
+    record_llm_usage("intent_extraction", response)
+    return parse_intent(strip_think_tags(response))
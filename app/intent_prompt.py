@@ -0,0 +1,49 @@
+from langchain_core.prompts import PromptTemplate
+
+# Static instructions first and the question last, like sql_prompt, so local
+# servers can reuse their KV cache for the prefix.
+intent_prompt = PromptTemplate(
+    input_variables=["today", "question"],
+    template="""
+Read a flight search question and return a single JSON object describing it. Use exactly these keys:
+
+{{
+  "origin": city the user departs from, or null,
+  "destination": city the user flies to, or null,
+  "date_from": earliest (outbound) departure date as YYYY-MM-DD, or null,
+  "date_to": latest (outbound) departure date as YYYY-MM-DD, or null,
+  "sort": one of "price_asc", "price_desc", "date_asc", "date_desc", or null,
+  "limit": number of flights the user asked for, or null,
+  "filters": {{
+    "airline": airline name, or null,
+    "direct_only": true if the user wants direct / non-stop flights,
+    "free_meal": true if the user wants a free or included meal,
+    "min_price": lowest acceptable price as a number, or null,
+    "max_price": highest acceptable price as a number, or null,
+    "max_rain_probability": highest acceptable chance of rain in percent, or null,
+    "max_duration_minutes": longest acceptable flight time in minutes, or null
+  }},
+  "round_trip": true if the user wants a return flight as well,
+  "stay_days_min": shortest stay between outbound and return flight in days, or null,
+  "stay_days_max": longest stay between outbound and return flight in days, or null,
+  "luggage_question": the part of the question about luggage or baggage, rephrased as a short question, or null
+}}
+
+Rules:
+- Cities: New Delhi, Mumbai, Bangalore, Kolkata, Ahmedabad, Hanoi, Ho Chi Minh City, Da Nang. Write them exactly like this ("Delhi" is "New Delhi", "Saigon" is "Ho Chi Minh City").
+- A single day ("on 5 August") sets date_from and date_to to the same date; a month sets the first and last day of that month.
+- "cheapest", "lowest price" or "best price" means "sort": "price_asc".
+- "low chance of rain" means "max_rain_probability": 40.
+- "under 5 hours" means "max_duration_minutes": 300.
+- "round trip", "return flight" or "and back" means "round_trip": true; "for a week" sets stay_days_min and stay_days_max to 7, "5 to 7 days" to 5 and 7.
+- Leave a key null when the question does not mention it; do not guess.
+- Output only the JSON object, no explanations.
+
+Example:
+Question: cheapest direct flights from Delhi to Hanoi in August 2025 and what's the cabin baggage limit?
+{{"origin": "New Delhi", "destination": "Hanoi", "date_from": "2025-08-01", "date_to": "2025-08-31", "sort": "price_asc", "limit": null, "filters": {{"airline": null, "direct_only": true, "free_meal": false, "min_price": null, "max_price": null, "max_rain_probability": null, "max_duration_minutes": null}}, "round_trip": false, "stay_days_min": null, "stay_days_max": null, "luggage_question": "what is the cabin baggage limit"}}
+
+Today's date: {today}
+Question: {question}
+"""
+)
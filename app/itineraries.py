@@ -0,0 +1,287 @@
+import heapq
+import os
+import re
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from datetime import date
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from database import add_data_change_listener, departure_day
+from models import FlightIntent
+from paths import resolve_database
+from sql_builder import CITY_ALIASES, FLIGHT_COLUMNS, canonical_city
+
+# Most flights in one itinerary
+ITINERARY_MAX_LEGS = int(os.getenv("ITINERARY_MAX_LEGS", "3"))
+# Minimum connection time added to a leg's duration before the next leg may leave
+ITINERARY_MIN_CONNECTION_MINUTES = int(os.getenv("ITINERARY_MIN_CONNECTION_MINUTES", "90"))
+# Extra days a traveller may wait at a connecting city after the earliest possible connection
+ITINERARY_MAX_LAYOVER_DAYS = int(os.getenv("ITINERARY_MAX_LAYOVER_DAYS", "2"))
+ITINERARY_TOP_K = int(os.getenv("ITINERARY_TOP_K", "5"))
+# Upper bound on partial itineraries expanded per search
+ITINERARY_MAX_EXPANSIONS = int(os.getenv("ITINERARY_MAX_EXPANSIONS", "20000"))
+
+DAY_MINUTES = 24 * 60
+
+_FASTEST_WORDS = re.compile(r"\b(fastest|quickest|shortest)\b", re.IGNORECASE)
+
+
+# A leg is a plain (departureDay, durationMinutes, price, destination, row)
+# tuple rather than a NamedTuple: CPython stops tracking exact tuples of
+# atoms in the cyclic GC, so full collections skip the index instead of
+# walking every leg (hundreds of ms per collection at 500k flights).
+DAY, MINUTES, PRICE, DESTINATION, ROW = range(5)
+Leg = Tuple[int, int, int, str, Tuple[Any, ...]]
+
+
+class Itinerary(NamedTuple):
+    total_price: int
+    # Departure day of the first leg to landing of the last, in minutes
+    total_minutes: int
+    legs: Tuple[Tuple[Any, ...], ...]
+
+
+def earliest_connection_day(leg: Leg) -> int:
+    """
+    First day a connecting flight may leave after `leg`.
+
+    Connections are made on a later day than the departure: at least the
+    next day, later still when the flight plus the minimum connection time
+    runs past midnight. Rows from the bundled JSON have no departure time,
+    and provider rows give `departureTime` in the origin's local time with
+    no UTC offset, so an arrival cannot be placed on the next city's clock
+    and same-day connections are not offered.
+    """
+    return leg[DAY] + max(1, -(-(leg[MINUTES] + ITINERARY_MIN_CONNECTION_MINUTES) // DAY_MINUTES))
+
+
+class ItineraryIndex:
+    """
+    In-memory adjacency index over `flights`: per origin, departures sorted
+    by (departureDay, price) with a parallel day list for bisecting, plus the
+    reverse city graph used to prune cities that cannot reach a destination.
+    """
+
+    def __init__(self, rows: Sequence[Tuple[Any, ...]]):
+        departures: Dict[str, List[Leg]] = defaultdict(list)
+        self._inbound: Dict[str, Set[str]] = defaultdict(set)
+        price = FLIGHT_COLUMNS.index("price")
+        origin = FLIGHT_COLUMNS.index("origin")
+        destination = FLIGHT_COLUMNS.index("destination")
+        # rows are (departureDay, durationMinutes, *flight columns)
+        for day, minutes, *flight in rows:
+            leg = (day, minutes or 0, flight[price], flight[destination], tuple(flight))
+            departures[flight[origin]].append(leg)
+            self._inbound[flight[destination]].add(flight[origin])
+        self._departures: Dict[str, Tuple[Tuple[int, ...], Tuple[Leg, ...]]] = {}
+        for city, legs in departures.items():
+            legs.sort(key=lambda leg: (leg[DAY], leg[PRICE]))
+            # Tuples all the way down, so the GC untracks the whole index
+            self._departures[city] = (tuple(leg[DAY] for leg in legs), tuple(legs))
+        self.flights = len(rows)
+        self.cities = frozenset(self._departures) | frozenset(self._inbound)
+        self._city_pattern = re.compile(
+            r"\b("
+            + "|".join(sorted(map(re.escape, [*self.cities, *CITY_ALIASES]), key=len, reverse=True))
+            + r")\b",
+            re.IGNORECASE,
+        ) if self.cities else None
+
+    @classmethod
+    def from_database(cls, sqlite_file: str) -> "ItineraryIndex":
+        conn = sqlite3.connect(resolve_database(sqlite_file))
+        try:
+            rows = conn.execute(
+                f'SELECT "departureDay", "durationMinutes", {", ".join(FLIGHT_COLUMNS)} FROM flights '
+                'WHERE price IS NOT NULL AND "departureDay" IS NOT NULL'
+            ).fetchall()
+        finally:
+            conn.close()
+        return cls(rows)
+
+    def find_cities(self, question: str) -> List[str]:
+        """Cities of the index named in the question, in order of appearance."""
+        cities: List[str] = []
+        if self._city_pattern is None:
+            return cities
+        for match in self._city_pattern.finditer(question):
+            city = canonical_city(match.group())
+            if city not in self.cities:
+                # Alias or different casing of a stored name
+                city = next((name for name in self.cities if name.lower() == city.lower()), city)
+            if city in self.cities and city not in cities:
+                cities.append(city)
+        return cities
+
+    def _legs_to_destination(self, destination: str, max_legs: int) -> Dict[str, int]:
+        # Fewest legs from each city to the destination, breadth-first over the reverse graph
+        distance = {destination: 0}
+        queue = deque([destination])
+        while queue:
+            city = queue.popleft()
+            if distance[city] == max_legs:
+                continue
+            for origin in self._inbound.get(city, ()):
+                if origin not in distance:
+                    distance[origin] = distance[city] + 1
+                    queue.append(origin)
+        return distance
+
+    def _window(self, city: str, first_day: Optional[int], last_day: Optional[int]) -> Tuple[Leg, ...]:
+        days, legs = self._departures.get(city, ((), ()))
+        start = bisect_left(days, first_day) if first_day is not None else 0
+        end = bisect_right(days, last_day) if last_day is not None else len(days)
+        return legs[start:end]
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        optimize: str = "price",
+        k: int = ITINERARY_TOP_K,
+        max_legs: int = ITINERARY_MAX_LEGS,
+    ) -> List[Itinerary]:
+        """
+        The k best itineraries from origin to destination, cheapest first or,
+        with optimize="duration", shortest from first departure to last landing.
+
+        Best-first search over partial itineraries (Dijkstra generalised to k
+        paths): both costs only grow as legs are added, so itineraries reach
+        the destination in cost order. Each (city, connecting day) is expanded
+        at most k times, cities are not revisited, and cities that cannot
+        reach the destination within the remaining legs are never entered.
+        """
+        if origin == destination or k <= 0 or origin not in self._departures:
+            return []
+        remaining = self._legs_to_destination(destination, max_legs)
+        if origin not in remaining:
+            return []
+
+        def cost(legs: Tuple[Leg, ...]) -> Tuple[int, int]:
+            # (objective, tie-break): price then duration, or duration then price
+            minutes = (legs[-1][DAY] - legs[0][DAY]) * DAY_MINUTES + legs[-1][MINUTES]
+            price = sum(leg[PRICE] for leg in legs)
+            return (minutes, price) if optimize == "duration" else (price, minutes)
+
+        heap: List[Tuple[Tuple[int, int], int, Tuple[Leg, ...]]] = []
+        counter = 0
+        for leg in self._window(origin, departure_day(date_from and date_from.isoformat()),
+                                departure_day(date_to and date_to.isoformat())):
+            if remaining.get(leg[DESTINATION], max_legs + 1) <= max_legs - 1:
+                heap.append((cost((leg,)), counter, (leg,)))
+                counter += 1
+        heapq.heapify(heap)
+
+        expanded: Dict[Tuple[str, int], int] = defaultdict(int)
+        results: List[Itinerary] = []
+        expansions = 0
+        while heap and len(results) < k and expansions < ITINERARY_MAX_EXPANSIONS:
+            _, _, legs = heapq.heappop(heap)
+            last = legs[-1]
+            if last[DESTINATION] == destination:
+                total_minutes = (last[DAY] - legs[0][DAY]) * DAY_MINUTES + last[MINUTES]
+                results.append(Itinerary(sum(leg[PRICE] for leg in legs), total_minutes, tuple(leg[ROW] for leg in legs)))
+                continue
+            # Nodes of the time-expanded graph are (city, first connecting day); past
+            # k visits every further path through a node continues no better
+            first_day = earliest_connection_day(last)
+            node = (last[DESTINATION], first_day)
+            expanded[node] += 1
+            if expanded[node] > k:
+                continue
+            expansions += 1
+            visited = {origin, *(leg[DESTINATION] for leg in legs)}
+            legs_left = max_legs - len(legs) - 1
+            for leg in self._window(last[DESTINATION], first_day, first_day + ITINERARY_MAX_LAYOVER_DAYS):
+                if leg[DESTINATION] in visited or remaining.get(leg[DESTINATION], max_legs + 1) > legs_left:
+                    continue
+                path = legs + (leg,)
+                heapq.heappush(heap, (cost(path), counter, path))
+                counter += 1
+        return results
+
+
+_indexes: Dict[str, ItineraryIndex] = {}
+_lock = threading.Lock()
+_generation = 0
+
+
+def get_itinerary_index(sqlite_file: str) -> ItineraryIndex:
+    """Return the cached index for `sqlite_file`, building it on first use."""
+    key = os.path.realpath(sqlite_file)
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+
+    with _lock:
+        generation = _generation
+    index = ItineraryIndex.from_database(sqlite_file)
+    with _lock:
+        # Drop the result if the data changed while it was being built.
+        if generation == _generation:
+            _indexes[key] = index
+    return index
+
+
+def refresh_itinerary_index(sqlite_file: Optional[str] = None) -> None:
+    """Data-change listener: rebuild an index that is in use so the next search does not pay for it."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if sqlite_file is None:
+            _indexes.clear()
+            return
+        stale = _indexes.pop(os.path.realpath(sqlite_file), None)
+    if stale is not None:
+        get_itinerary_index(sqlite_file)
+
+
+add_data_change_listener(refresh_itinerary_index)
+
+
+def search_itineraries(
+    sqlite_file: str,
+    origin: str,
+    destination: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    optimize: str = "price",
+    k: int = ITINERARY_TOP_K,
+) -> List[Itinerary]:
+    return get_itinerary_index(sqlite_file).search(origin, destination, date_from, date_to, optimize, k)
+
+
+def find_itineraries(
+    question: str,
+    intent: Optional[FlightIntent],
+    sqlite_file: str,
+    k: int = ITINERARY_TOP_K,
+) -> List[Itinerary]:
+    """Connecting itineraries for a question whose route has no direct flights."""
+    index = get_itinerary_index(sqlite_file)
+    if intent is not None and intent.origin and intent.destination:
+        origin, destination = canonical_city(intent.origin), canonical_city(intent.destination)
+        date_from, date_to = intent.date_from, intent.date_to
+    else:
+        cities = index.find_cities(question)
+        if len(cities) < 2:
+            return []
+        origin, destination = cities[0], cities[1]
+        date_from = date_to = None
+    optimize = "duration" if _FASTEST_WORDS.search(question) else "price"
+    return index.search(origin, destination, date_from, date_to, optimize, k)
+
+
+def itineraries_for_prompt(itineraries: Sequence[Itinerary]) -> List[dict]:
+    return [
+        {
+            "total_price": itinerary.total_price,
+            "total_hours": round(itinerary.total_minutes / 60, 1),
+            "legs": [dict(zip(FLIGHT_COLUMNS, leg)) for leg in itinerary.legs],
+        }
+        for itinerary in itineraries
+    ]
@@ -1,29 +1,41 @@
 import os
-from langchain_ollama import ChatOllama
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
+from http_client import get_async_http_client, get_http_transport
+
 load_dotenv()
 
+# Provider packages are imported inside get_llm so only the configured
+# backend is loaded; each one pulls in its own SDK and adds to startup time.
+# Async calls of every backend go through the shared pool in http_client.
 def get_llm(model_name, platform_name="OLLAMA"):
     if platform_name == "OLLAMA":
+        from langchain_ollama import ChatOllama
         return ChatOllama(
             model=model_name,
             temperature=0.2,
+            # The ollama SDK builds its own httpx clients; hand them the shared pool.
+            # The app only calls models asynchronously, so the sync client never uses it.
+            client_kwargs={"transport": get_http_transport()},
         )
     elif platform_name == "GROQ":
+        from langchain_groq import ChatGroq
         return ChatGroq(
             temperature=1,
             model=model_name,
-            groq_api_key=os.getenv("GROQ_API_KEY")
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            http_async_client=get_async_http_client(),
         )
     elif platform_name == "LMSTUDIO_OPENAI":
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(
             model=model_name,
             temperature=0.2,
             api_key=os.getenv("LMSTUDIO_API_KEY", "lm-studio"),
             base_url=os.getenv("LMSTUDIO_OPENAI_BASE_URL", "http://127.0.0.1:1234/v1"),
+            # Report token usage on the final chunk of streamed responses too
+            stream_usage=True,
+            http_async_client=get_async_http_client(),
         )
 
     raise ValueError(f"Unsupported platform_name: {platform_name}")
@@ -0,0 +1,195 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from paths import get_luggage_cache_db_path
+from policy_store import normalize_airline
+
+LUGGAGE_ANSWER_CACHE_ENABLED = os.getenv("ENABLE_LUGGAGE_ANSWER_CACHE", "true").lower() == "true"
+LUGGAGE_CACHE_TTL_SECONDS = int(os.getenv("LUGGAGE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LUGGAGE_CACHE_MAX_ENTRIES = int(os.getenv("LUGGAGE_CACHE_MAX_ENTRIES", "2000"))
+# SQLite-tier hits queue their last-use time; this many queued touches are written in one commit
+_TOUCH_FLUSH_SIZE = 100
+
+# Words that do not change what a luggage question asks about
+_FILLER_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "what", "whats", "what's", "how", "much", "many",
+    "can", "could", "do", "does", "i", "my", "me", "we", "our", "you", "your",
+    "please", "tell", "about", "for", "on", "of", "there", "any", "it",
+})
+_WORD = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*")
+
+
+def normalize_luggage_query(query: str) -> str:
+    """
+    Canonical form of an extracted luggage question: lowercase words without
+    punctuation or filler, so "What's the cabin bag weight?" and
+    "cabin bag weight" share an entry.
+    """
+    words = _WORD.findall(query.lower())
+    content = [word for word in words if word not in _FILLER_WORDS]
+    return " ".join(content or words)
+
+
+class AnswerKey(NamedTuple):
+    airline: str
+    query: str
+    policy_sha256: str
+
+
+def answer_key(airline: str, luggage_query: str, policy_sha256: str) -> AnswerKey:
+    return AnswerKey(normalize_airline(airline), normalize_luggage_query(luggage_query), policy_sha256)
+
+
+class LuggageAnswerCache:
+    """
+    LRU + TTL cache of luggage-LLM answers, persisted in its own SQLite file.
+
+    The most recently used entries are also kept in memory; misses fall
+    through to SQLite so answers survive restarts. Reads never commit: the
+    last-use times of SQLite hits are written in batches. Methods block on
+    disk, so async callers run them with `asyncio.to_thread`. Keys include the policy
+    file's hash, and `invalidate_airline` drops answers for older versions.
+    """
+
+    def __init__(self, sqlite_file: str, ttl_seconds: int, max_entries: int):
+        self.sqlite_file = sqlite_file
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[AnswerKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self._pending_touches: Dict[AnswerKey, float] = {}
+        self._conn = sqlite3.connect(sqlite_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS luggage_answers (
+                airline TEXT NOT NULL,
+                query TEXT NOT NULL,
+                policy_sha256 TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (airline, query, policy_sha256)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_luggage_answers_last_used ON luggage_answers(last_used_at)"
+        )
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl_seconds
+
+    def _remember(self, key: AnswerKey, answer: str, created_at: float) -> None:
+        self._memory[key] = (answer, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: AnswerKey) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                answer, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    return answer
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM luggage_answers WHERE airline=? AND query=? AND policy_sha256=?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            answer, created_at = row
+            if self._expired(created_at, now):
+                # Expired rows are deleted by the next prune
+                return None
+            self._pending_touches[key] = now
+            if len(self._pending_touches) >= _TOUCH_FLUSH_SIZE:
+                self._flush_touches()
+                self._conn.commit()
+            self._remember(key, answer, created_at)
+            return answer
+
+    def _flush_touches(self) -> None:
+        self._conn.executemany(
+            "UPDATE luggage_answers SET last_used_at=? WHERE airline=? AND query=? AND policy_sha256=?",
+            [(used_at, *key) for key, used_at in self._pending_touches.items()],
+        )
+        self._pending_touches.clear()
+
+    def put(self, key: AnswerKey, answer: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, answer, now)
+            self._conn.execute(
+                """
+                INSERT INTO luggage_answers(airline, query, policy_sha256, answer, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(airline, query, policy_sha256) DO UPDATE SET
+                    answer=excluded.answer,
+                    created_at=excluded.created_at,
+                    last_used_at=excluded.last_used_at
+                """,
+                (*key, answer, now, now),
+            )
+            self._pending_touches.pop(key, None)
+            self._flush_touches()
+            self._puts_since_prune += 1
+            # Trim the file in batches rather than on every write
+            if self._puts_since_prune >= max(self.max_entries // 10, 1):
+                self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now: float) -> None:
+        self._puts_since_prune = 0
+        self._conn.execute("DELETE FROM luggage_answers WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            """
+            DELETE FROM luggage_answers WHERE rowid IN (
+                SELECT rowid FROM luggage_answers ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def invalidate_airline(self, airline_key: str, current_sha256: Optional[str] = None) -> None:
+        """Drop answers for `airline_key` that were generated from any other policy version."""
+        with self._lock:
+            for key in [key for key in self._memory if key.airline == airline_key and key.policy_sha256 != current_sha256]:
+                del self._memory[key]
+            self._conn.execute(
+                "DELETE FROM luggage_answers WHERE airline=? AND policy_sha256 IS NOT ?",
+                (airline_key, current_sha256),
+            )
+            self._conn.commit()
+
+    def retain_versions(self, versions: Dict[str, str]) -> None:
+        """Drop answers generated from policy versions that are no longer loaded."""
+        for airline_key, sha256 in versions.items():
+            self.invalidate_airline(airline_key, sha256)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM luggage_answers").fetchone()[0]
+            return {"memory_entries": len(self._memory), "stored_entries": stored}
+
+
+@lru_cache(maxsize=None)
+def get_luggage_answer_cache() -> LuggageAnswerCache:
+    return LuggageAnswerCache(
+        get_luggage_cache_db_path(),
+        ttl_seconds=LUGGAGE_CACHE_TTL_SECONDS,
+        max_entries=LUGGAGE_CACHE_MAX_ENTRIES,
+    )
@@ -1,5 +1,6 @@
 from typing import Optional
-from config import luggage_llm
+from config import get_luggage_llm
+from metrics import record_llm_usage, stage_timer
 
 async def extract_luggage_query(user_query: str) -> Optional[str]:
     """
@@ -25,7 +26,9 @@ async def extract_luggage_query(user_query: str) -> Optional[str]:
     Return only the extracted question or "NONE", without any additional text or explanation.
     """
 
-    response = await luggage_llm.ainvoke(prompt)
+    with stage_timer("luggage_extraction"):
+        response = await get_luggage_llm().ainvoke(prompt)
+    record_llm_usage("luggage_extraction", response)
     extracted = response.content.strip()
 
     return None if extracted == "NONE" else extracted
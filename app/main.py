@@ -1,17 +1,41 @@
 import asyncio
 import os
+import socket
 import sqlite3
+import time
+import uuid
+from datetime import date
 from pathlib import Path
+from typing import Literal, Optional
 
 import uvicorn
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from sse_starlette.sse import EventSourceResponse
 
-from database import json_to_sqlite
-from paths import get_sqlite_db_path
+from batch import BATCH_MAX_QUESTIONS, run_batch
+from database import (
+    SYNC_KEY_SYNC_LEASE,
+    DataVersionWatcher,
+    ensure_schema,
+    json_to_sqlite,
+    release_lease,
+    try_acquire_lease,
+)
+from fare_calendar import calendar_payload, get_fare_calendar
+from flight_search import InvalidCursor, current_data_version, etag_matches, search_etag, search_flights
+from itineraries import ITINERARY_TOP_K, itineraries_for_prompt, search_itineraries
+from metrics import render_prometheus
+from models import BatchRequest, FlightSearchRequest, FlightSearchResponse
+from paths import get_sqlite_db_path, pinned_generation, resolve_database
+from policy_store import POLICY_RELOAD_INTERVAL_SECONDS
 from query_chain import stream_response
+from schema_snapshot import get_schema_snapshot
+from sql_builder import canonical_city
 from sync_flights import sync_online_flights
+from vector_db import get_policy_store
+from warmup import LLM_WARMUP, warm_up_models
 
 # Initialize the FastAPI app
 app = FastAPI(title="Flight Query API")
@@ -29,59 +53,305 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def pin_database_generation(request: Request, call_next):
+    # Every query of one request reads the same database generation, even if
+    # a snapshot sync publishes a new one halfway through a streamed answer
+    with pinned_generation(SQLITE_DB_PATH):
+        return await call_next(request)
+
 sync_task = None
+bootstrap_task = None
+watch_task = None
+policy_watch_task = None
+warmup_task = None
+data_ready = False
+# With LLM_WARMUP=false there is nothing to wait for
+models_ready = not LLM_WARMUP
+warmup_status = {}
 SQLITE_DB_PATH = get_sqlite_db_path()
 
+# uvicorn worker processes; with more than one, a lease elects the worker that syncs
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# A sync leader that misses heartbeats for this long is replaced
+FLIGHT_SYNC_LEASE_SECONDS = int(os.getenv("FLIGHT_SYNC_LEASE_SECONDS", "60"))
+# How often workers check whether another worker changed the flight data
+DATA_VERSION_POLL_SECONDS = float(os.getenv("DATA_VERSION_POLL_SECONDS", "5"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+data_version_watcher = DataVersionWatcher(SQLITE_DB_PATH)
+
+
+def prepare_database():
+    """Seed the database if it is empty, otherwise bring it up to the current schema."""
+    db_path = Path(SQLITE_DB_PATH)
+    # Check if database file exists and is empty
+    if is_database_empty(db_path):
+        json_to_sqlite('./data/flight_data.json', SQLITE_DB_PATH)
+    else:
+        # Files from older versions get new tables and columns before the snapshot is taken
+        ensure_schema(SQLITE_DB_PATH)
+
+
+def bootstrap_database():
+    """Prepare the database, then build the schema snapshot and policy index."""
+    global data_ready
+
+    prepare_database()
+    # Baseline for watch_data_version, read before any cache is built from the data
+    data_version_watcher.poll()
+
+    # Build the schema snapshot shown to the SQL LLM once, before the first question
+    get_schema_snapshot(SQLITE_DB_PATH)
+    # Load and index the luggage policies so questions never touch the disk
+    get_policy_store()
+    data_ready = True
+
+
+async def ensure_data_ready():
+    """Start the database bootstrap if it is not running yet and wait for it to finish."""
+    global bootstrap_task
+
+    if data_ready:
+        return
+    if bootstrap_task is None or bootstrap_task.done():
+        bootstrap_task = asyncio.create_task(asyncio.to_thread(bootstrap_database))
+    # Shield so a disconnecting client does not cancel the shared bootstrap
+    await asyncio.shield(bootstrap_task)
+
+
+async def warm_up():
+    global models_ready, warmup_status
+
+    warmup_status = await warm_up_models()
+    print(f"Model warm-up: {warmup_status}")
+    models_ready = True
+
+
+@app.get("/ready")
+async def readiness():
+    """200 once the flight data is loaded and the model warm-up has finished, 503 before."""
+    body = {"ready": data_ready and models_ready, "data": data_ready, "models": models_ready}
+    if warmup_status:
+        body["warmup"] = warmup_status
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Pipeline stage latencies, time to first token and LLM token counts for Prometheus."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/calendar")
+async def route_fare_calendar(
+    origin: str = Query(...),
+    destination: str = Query(...),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+):
+    """Cheapest fare per departure date on a route, without going through the LLM."""
+    try:
+        await ensure_data_ready()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Flight data is not available: {exc}") from exc
+
+    origin, destination = canonical_city(origin), canonical_city(destination)
+    days = await asyncio.to_thread(get_fare_calendar, origin, destination, SQLITE_DB_PATH, date_from, date_to)
+    return JSONResponse(calendar_payload(origin, destination, days))
+
+
+@app.post("/flights/search", response_model=FlightSearchResponse)
+async def flight_search(request: FlightSearchRequest, if_none_match: Optional[str] = Header(None)):
+    """
+    Filtered, price-ordered flights without going through the LLM. Pass the
+    response's next_cursor back as `cursor` for the next page; a matching
+    If-None-Match answers 304 until the flight data changes.
+    """
+    try:
+        await ensure_data_ready()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Flight data is not available: {exc}") from exc
+
+    data_version = await asyncio.to_thread(current_data_version, SQLITE_DB_PATH)
+    etag = search_etag(request, data_version)
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        page = await asyncio.to_thread(search_flights, request, SQLITE_DB_PATH)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    page["data_version"] = data_version
+    return ORJSONResponse(page, headers={"ETag": etag})
+
+
+@app.get("/itineraries")
+async def route_itineraries(
+    origin: str = Query(...),
+    destination: str = Query(...),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    optimize: Literal["price", "duration"] = Query("price"),
+    k: int = Query(ITINERARY_TOP_K, ge=1, le=50),
+):
+    """Top-k itineraries, including connections, between two cities without going through the LLM."""
+    try:
+        await ensure_data_ready()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Flight data is not available: {exc}") from exc
+
+    origin, destination = canonical_city(origin), canonical_city(destination)
+    itineraries = await asyncio.to_thread(
+        search_itineraries, SQLITE_DB_PATH, origin, destination, date_from, date_to, optimize, k
+    )
+    return JSONResponse({
+        "origin": origin,
+        "destination": destination,
+        "optimize": optimize,
+        "itineraries": itineraries_for_prompt(itineraries),
+    })
+
 
 @app.get("/stream")
 async def stream_query(question: str = Query(...)):
+    try:
+        await ensure_data_ready()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Flight data is not available: {exc}") from exc
+
     return EventSourceResponse(
         stream_response(question),
         media_type="text/event-stream"
     )
 
 
+@app.post("/batch")
+async def batch_questions(request: BatchRequest):
+    """Answer many questions in one request; NDJSON lines arrive as each question completes."""
+    if len(request.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUESTIONS} questions per batch")
+    try:
+        await ensure_data_ready()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Flight data is not available: {exc}") from exc
+
+    return StreamingResponse(run_batch(request.questions), media_type="application/x-ndjson")
+
+
+async def hold_sync_lease() -> bool:
+    try:
+        return await asyncio.to_thread(
+            try_acquire_lease, SYNC_KEY_SYNC_LEASE, WORKER_ID, FLIGHT_SYNC_LEASE_SECONDS, SQLITE_DB_PATH
+        )
+    except sqlite3.Error as exc:
+        print(f"Sync lease check failed: {exc}")
+        return False
+
+
+async def renew_sync_lease(heartbeat_seconds: float):
+    # Keeps the lease while a long sync runs in its thread
+    while True:
+        await asyncio.sleep(heartbeat_seconds)
+        await hold_sync_lease()
+
+
 async def run_online_sync_loop():
+    """
+    Sync on the worker that holds the lease in sync_metadata. Every worker
+    runs this loop, but the others only retry the lease, taking over when the
+    leader stops renewing it.
+    """
     interval_minutes = int(os.getenv("FLIGHT_SYNC_CHECK_INTERVAL_MINUTES", os.getenv("FLIGHT_SYNC_INTERVAL_MINUTES", "5")))
+    heartbeat_seconds = max(FLIGHT_SYNC_LEASE_SECONDS / 3, 1)
+    await ensure_data_ready()
+    next_sync = 0.0
     while True:
+        if await hold_sync_lease() and time.monotonic() >= next_sync:
+            next_sync = time.monotonic() + interval_minutes * 60
+            heartbeat = asyncio.create_task(renew_sync_lease(heartbeat_seconds))
+            try:
+                stats = await asyncio.to_thread(sync_online_flights, SQLITE_DB_PATH)
+                if stats.get("skipped"):
+                    print(
+                        "Online sync skipped (recently updated). "
+                        f"Remaining seconds={stats.get('remaining_seconds', 0)}"
+                    )
+                else:
+                    print(f"Online sync complete. Inserted={stats['inserted']}, Updated={stats['updated']}")
+            except Exception as exc:
+                print(f"Online sync skipped/failed: {exc}")
+            finally:
+                heartbeat.cancel()
+        await asyncio.sleep(heartbeat_seconds)
+
+
+async def watch_data_version():
+    """Refresh this worker's caches when another worker's sync changes the flight data."""
+    while True:
+        await asyncio.sleep(DATA_VERSION_POLL_SECONDS)
+        if not data_ready:
+            continue
         try:
-            stats = await asyncio.to_thread(sync_online_flights, SQLITE_DB_PATH)
-            if stats.get("skipped"):
-                print(
-                    "Online sync skipped (recently updated). "
-                    f"Remaining seconds={stats.get('remaining_seconds', 0)}"
-                )
-            else:
-                print(f"Online sync complete. Inserted={stats['inserted']}, Updated={stats['updated']}")
-        except Exception as exc:
-            print(f"Online sync skipped/failed: {exc}")
-        await asyncio.sleep(interval_minutes * 60)
+            if await asyncio.to_thread(data_version_watcher.poll):
+                print("Flight data changed in another worker; caches refreshed")
+        except sqlite3.Error as exc:
+            print(f"Data version check failed: {exc}")
+
+
+async def watch_policy_files():
+    """Reload edited luggage policy files off the event loop, so questions only read memory."""
+    while True:
+        await asyncio.sleep(POLICY_RELOAD_INTERVAL_SECONDS)
+        if not data_ready:
+            continue
+        try:
+            await asyncio.to_thread(get_policy_store().refresh)
+        except (OSError, UnicodeDecodeError) as exc:
+            print(f"Policy reload failed: {exc}")
 
 
 # Event handlers for startup and shutdown
 @app.on_event("startup")
 async def startup_event():
-    global sync_task
+    global sync_task, bootstrap_task, watch_task, policy_watch_task, warmup_task
 
-    db_path = Path(SQLITE_DB_PATH)
-    # Check if database file exists and is empty
-    if is_database_empty(db_path):
-        json_to_sqlite('./data/flight_data.json', SQLITE_DB_PATH)
+    # Load data in the background so the server accepts connections immediately;
+    # with BOOTSTRAP_DATA_ON_STARTUP=false the first /stream request triggers it.
+    if os.getenv("BOOTSTRAP_DATA_ON_STARTUP", "true").lower() == "true":
+        bootstrap_task = asyncio.create_task(asyncio.to_thread(bootstrap_database))
+    # Load the models on the model server and open pooled connections before the first question
+    if LLM_WARMUP:
+        warmup_task = asyncio.create_task(warm_up())
 
-    if os.getenv("ENABLE_ONLINE_FLIGHT_SYNC", "false").lower() == "true":
+    sync_enabled = os.getenv("ENABLE_ONLINE_FLIGHT_SYNC", "false").lower() == "true"
+    if sync_enabled:
         sync_task = asyncio.create_task(run_online_sync_loop())
+    if sync_enabled or WEB_CONCURRENCY > 1:
+        watch_task = asyncio.create_task(watch_data_version())
+    if POLICY_RELOAD_INTERVAL_SECONDS > 0:
+        policy_watch_task = asyncio.create_task(watch_policy_files())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     if sync_task:
         sync_task.cancel()
+        # Hand the sync to another worker now rather than after the lease expires
+        await asyncio.to_thread(release_lease, SYNC_KEY_SYNC_LEASE, WORKER_ID, SQLITE_DB_PATH)
+    if watch_task:
+        watch_task.cancel()
+    if policy_watch_task:
+        policy_watch_task.cancel()
+    if bootstrap_task:
+        bootstrap_task.cancel()
+    if warmup_task:
+        warmup_task.cancel()
 
 
 def is_database_empty(db_path):
     conn = None
     try:
-        conn = sqlite3.connect(db_path)
+        conn = sqlite3.connect(resolve_database(db_path))
         cursor = conn.cursor()
 
         # Check if flights table exists first
@@ -106,4 +376,13 @@ def is_database_empty(db_path):
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WEB_CONCURRENCY > 1:
+        # Seed and migrate once before the workers start, and let readers in
+        # every worker proceed while the sync leader writes
+        prepare_database()
+        conn = sqlite3.connect(resolve_database(SQLITE_DB_PATH))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Add a "trace_id" field to every SSE event of a request
+ENABLE_TRACE_IDS = os.getenv("ENABLE_TRACE_IDS", "false").lower() == "true"
+
+# Prometheus' default buckets, extended for multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: (per-bucket counts with a final +Inf slot, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(entry[0]) if entry else 0
+
+    def mean(self, **labels: str) -> Optional[float]:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        if not entry or not sum(entry[0]):
+            return None
+        return entry[1][0] / sum(entry[0])
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                cumulative += counts[-1]
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+_registry: List[Any] = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render_prometheus() -> str:
+    """All registered metrics in the Prometheus text exposition format (0.0.4)."""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = register(Histogram(
+    "flight_query_stage_seconds",
+    "Time spent in each stage of the question pipeline.",
+    ["stage"],
+))
+TIME_TO_FIRST_TOKEN_SECONDS = register(Histogram(
+    "flight_query_time_to_first_token_seconds",
+    "Time from receiving a question to sending the first answer token.",
+))
+REQUESTS_TOTAL = register(Counter(
+    "flight_query_requests_total",
+    "Questions handled, by outcome.",
+    ["outcome"],
+))
+LLM_CALLS_TOTAL = register(Counter(
+    "llm_calls_total",
+    "LLM calls made, by pipeline call site.",
+    ["call"],
+))
+LLM_TOKENS_TOTAL = register(Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM provider, by call site and kind (prompt or completion).",
+    ["call", "kind"],
+))
+ANSWERED_SECONDS = register(Histogram(
+    "flight_query_answered_seconds",
+    "Time from receiving a question to the end of its answer, for questions answered in full.",
+))
+CANCELLED_TOTAL = register(Counter(
+    "flight_query_cancelled_total",
+    "Questions abandoned by their client, by the last pipeline stage they entered.",
+    ["stage"],
+))
+CANCELLED_SECONDS_SAVED_TOTAL = register(Counter(
+    "flight_query_cancelled_seconds_saved_total",
+    "Estimated pipeline seconds not spent on abandoned questions.",
+))
+CANCELLED_TOKENS_SAVED_TOTAL = register(Counter(
+    "llm_tokens_saved_total",
+    "Estimated response tokens not generated for abandoned questions, by kind (prompt or completion).",
+    ["kind"],
+))
+
+
+class Trace:
+    """Stage timings and token counts of one request."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.first_token_at: Optional[float] = None
+        # Last stage entered, kept after it ends
+        self.stage: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "stages_ms": [(stage, round(seconds * 1000, 2)) for stage, seconds in self.stages],
+            "tokens": self.tokens,
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stages.append((stage, seconds))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the enclosed block as `stage`; works around awaits as well as plain code."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stage = stage
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def mark_first_token() -> None:
+    trace = _current_trace.get()
+    if trace is not None and trace.first_token_at is None:
+        trace.first_token_at = time.perf_counter()
+        TIME_TO_FIRST_TOKEN_SECONDS.observe(trace.first_token_at - trace.started)
+
+
+def record_llm_usage(call: str, message: Any) -> None:
+    """
+    Count one LLM call and the tokens in its `usage_metadata`, when the
+    provider reports them (LangChain AIMessage / aggregated stream chunks).
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    record_llm_tokens(call, int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0))
+
+
+def record_llm_tokens(call: str, prompt_tokens: int, completion_tokens: int) -> None:
+    LLM_CALLS_TOTAL.inc(call=call)
+    if prompt_tokens:
+        LLM_TOKENS_TOTAL.inc(prompt_tokens, call=call, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS_TOTAL.inc(completion_tokens, call=call, kind="completion")
+    trace = _current_trace.get()
+    if trace is not None:
+        counts = trace.tokens.setdefault(call, {"prompt": 0, "completion": 0})
+        counts["prompt"] += prompt_tokens
+        counts["completion"] += completion_tokens
+
+
+def record_cancellation(trace: Trace, response_tokens: Optional[int]) -> None:
+    """
+    Count a question whose client went away and estimate the work saved by
+    stopping it: the mean time of fully answered questions minus the time
+    it ran, and the mean tokens of a response call minus the tokens it had
+    already streamed. `response_tokens` is None if the response call had
+    not started, in which case its prompt is saved too.
+    """
+    elapsed = time.perf_counter() - trace.started
+    CANCELLED_TOTAL.inc(stage=trace.stage or "classify")
+    mean_seconds = ANSWERED_SECONDS.mean()
+    if mean_seconds is not None:
+        CANCELLED_SECONDS_SAVED_TOTAL.inc(max(mean_seconds - elapsed, 0.0))
+    calls = LLM_CALLS_TOTAL.value(call="response")
+    if calls:
+        if response_tokens is None:
+            CANCELLED_TOKENS_SAVED_TOTAL.inc(LLM_TOKENS_TOTAL.value(call="response", kind="prompt") / calls, kind="prompt")
+        mean_completion = LLM_TOKENS_TOTAL.value(call="response", kind="completion") / calls
+        CANCELLED_TOKENS_SAVED_TOTAL.inc(max(mean_completion - (response_tokens or 0), 0.0), kind="completion")
@@ -1,5 +1,8 @@
 # models.py
-from pydantic import BaseModel
+from datetime import date
+from typing import Any, List, Literal, Optional
+
+from pydantic import BaseModel, Field, field_validator
 
 class QueryRequest(BaseModel):
     question: str
@@ -7,3 +10,109 @@ class QueryRequest(BaseModel):
 class QueryResponse(BaseModel):
     final_response: str
     sql_query: str
+
+
+class BatchRequest(BaseModel):
+    questions: List[str] = Field(min_length=1)
+
+
+class FlightSearchRequest(BaseModel):
+    """Body of POST /flights/search; every filter is optional."""
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    max_price: Optional[int] = Field(default=None, ge=0)
+    nonstop: bool = False
+    free_meal: bool = False
+    max_rain_probability: Optional[float] = Field(default=None, ge=0, le=100)
+    sort: Literal["price_asc", "price_desc"] = "price_asc"
+    limit: int = Field(default=50, ge=1, le=500)
+    # next_cursor of the previous page
+    cursor: Optional[str] = None
+
+
+class FlightRecord(BaseModel):
+    uuid: str
+    airline: Optional[str] = None
+    date: Optional[str] = None
+    duration: Optional[str] = None
+    flightType: Optional[str] = None
+    price: Optional[int] = None
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    link: Optional[str] = None
+    rainProbability: Optional[float] = None
+    freeMeal: Optional[int] = None
+
+
+class FlightSearchResponse(BaseModel):
+    flights: List[FlightRecord]
+    next_cursor: Optional[str] = None
+    data_version: int
+
+
+def _blank_to_none(value: Any) -> Any:
+    # Models write "", "null" or "N/A" for fields they have no value for
+    if isinstance(value, str) and value.strip().lower() in {"", "null", "none", "n/a", "any"}:
+        return None
+    return value
+
+
+_SORT_SYNONYMS = {
+    "price_asc": "price_asc", "cheapest": "price_asc", "lowest_price": "price_asc",
+    "price_desc": "price_desc", "most_expensive": "price_desc",
+    "date_asc": "date_asc", "earliest": "date_asc", "soonest": "date_asc",
+    "date_desc": "date_desc", "latest": "date_desc",
+}
+
+
+class IntentFilters(BaseModel):
+    airline: Optional[str] = None
+    direct_only: bool = False
+    free_meal: bool = False
+    min_price: Optional[int] = Field(default=None, ge=0)
+    max_price: Optional[int] = Field(default=None, ge=0)
+    max_rain_probability: Optional[float] = Field(default=None, ge=0, le=100)
+    max_duration_minutes: Optional[int] = Field(default=None, ge=0)
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def blank_to_none(cls, value: Any, info) -> Any:
+        value = _blank_to_none(value)
+        if value is None and info.field_name in {"direct_only", "free_meal"}:
+            return False
+        return value
+
+
+class FlightIntent(BaseModel):
+    """Structured reading of a flight question, produced by one intent-extraction LLM call."""
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    sort: Optional[Literal["price_asc", "price_desc", "date_asc", "date_desc"]] = None
+    limit: Optional[int] = Field(default=None, ge=1)
+    filters: IntentFilters = Field(default_factory=IntentFilters)
+    round_trip: bool = False
+    stay_days_min: Optional[int] = Field(default=None, ge=0)
+    stay_days_max: Optional[int] = Field(default=None, ge=0)
+    luggage_question: Optional[str] = None
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def blank_to_none(cls, value: Any, info) -> Any:
+        value = _blank_to_none(value)
+        if value is None and info.field_name == "filters":
+            return IntentFilters()
+        if value is None and info.field_name == "round_trip":
+            return False
+        return value
+
+    @field_validator("sort", mode="before")
+    @classmethod
+    def normalize_sort(cls, value: Any) -> Any:
+        if not isinstance(value, str):
+            return None
+        value = value.strip().lower()
+        return _SORT_SYNONYMS.get(value, value if value in _SORT_SYNONYMS.values() else None)
@@ -1,5 +1,18 @@
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# (database path, generation file) every read of the current request goes to
+_pinned_generation: ContextVar[Optional[Tuple[str, str]]] = ContextVar("pinned_generation", default=None)
+# pointer file -> ((inode, mtime), generation file it names)
+_pointers: Dict[str, Tuple[Tuple[int, int], str]] = {}
+# Every GenerationCache, so removing generation files can close what was opened on them
+_generation_caches: List["GenerationCache"] = []
 
 
 def get_sqlite_db_path() -> str:
@@ -11,3 +24,91 @@ def get_sqlite_db_path() -> str:
     repo_root = Path(__file__).resolve().parent.parent
     return str((repo_root / "flights.db").resolve())
 
+
+def get_luggage_cache_db_path() -> str:
+    """Return the SQLite file that persists cached luggage answers."""
+    from_env = os.getenv("LUGGAGE_CACHE_DB_PATH")
+    if from_env:
+        return str(Path(from_env).expanduser().resolve())
+
+    return str(Path(get_sqlite_db_path()).with_name("luggage_cache.db"))
+
+
+def generation_pointer_path(sqlite_file: str) -> str:
+    """File naming the published snapshot generation of `sqlite_file`; see snapshots.py."""
+    return f"{sqlite_file}.current"
+
+
+def current_generation(sqlite_file: str) -> str:
+    """The database file published for `sqlite_file`: the generation its pointer names, or the file itself."""
+    pointer = generation_pointer_path(sqlite_file)
+    try:
+        stat = os.stat(pointer)
+    except FileNotFoundError:
+        return sqlite_file
+    # The pointer is replaced, never rewritten, so a new inode means a new generation
+    version = (stat.st_ino, stat.st_mtime_ns)
+    cached = _pointers.get(pointer)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with open(pointer, encoding="utf-8") as handle:
+        generation = os.path.join(os.path.dirname(sqlite_file), handle.read().strip())
+    _pointers[pointer] = (version, generation)
+    return generation
+
+
+def resolve_database(sqlite_file: str) -> str:
+    """The file to open for `sqlite_file`: the generation pinned for this request, else the published one."""
+    pinned = _pinned_generation.get()
+    if pinned is not None and pinned[0] == sqlite_file:
+        return pinned[1]
+    return current_generation(sqlite_file)
+
+
+@contextmanager
+def pinned_generation(sqlite_file: str) -> Iterator[str]:
+    """Read one generation of `sqlite_file` for the whole block, even if a sync publishes a new one meanwhile."""
+    token = _pinned_generation.set((sqlite_file, current_generation(sqlite_file)))
+    try:
+        yield _pinned_generation.get()[1]
+    finally:
+        _pinned_generation.reset(token)
+
+
+class GenerationCache(Generic[T]):
+    """
+    One object (engine, SQLDatabase, ...) per database generation file.
+
+    Entries for generation files that no longer exist are closed with `close`
+    before a new one is built, and by `close_removed_generations` right after
+    a sync deletes old generations, so no pool stays open on a deleted file.
+    """
+
+    def __init__(self, factory: Callable[[str], T], close: Callable[[T], None]):
+        self._factory = factory
+        self._close = close
+        self._items: Dict[str, T] = {}
+        self._lock = threading.Lock()
+        _generation_caches.append(self)
+
+    def get(self, sqlite_file: str) -> T:
+        with self._lock:
+            item = self._items.get(sqlite_file)
+            if item is None:
+                self._prune()
+                item = self._items[sqlite_file] = self._factory(sqlite_file)
+            return item
+
+    def _prune(self) -> None:
+        for path in [path for path in self._items if not os.path.exists(path)]:
+            self._close(self._items.pop(path))
+
+    def prune(self) -> None:
+        with self._lock:
+            self._prune()
+
+
+def close_removed_generations() -> None:
+    """Close cached engines whose generation file has been deleted."""
+    for cache in _generation_caches:
+        cache.prune()
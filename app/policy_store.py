@@ -0,0 +1,163 @@
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from bm25 import BM25Index
+from config import logger
+
+# Seconds between background checks of the policy files' modification times; 0 or negative disables them
+POLICY_RELOAD_INTERVAL_SECONDS = float(os.getenv("POLICY_RELOAD_INTERVAL_SECONDS", "5"))
+
+_SECTION_SEPARATOR = re.compile(r"\n\s*\n")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_airline(name: str) -> str:
+    """'VietJet Air', 'vietjet-air' and 'vietjet_air' all map to 'vietjet_air'."""
+    return _NON_ALNUM.sub("_", name.lower()).strip("_")
+
+
+class PolicySource(NamedTuple):
+    name: str
+    path: str
+
+
+class LoadedPolicy(NamedTuple):
+    name: str
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    sections: List[str]
+    lowered_sections: List[str]
+    index: BM25Index
+
+
+def load_policy(source: PolicySource) -> LoadedPolicy:
+    with open(source.path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        data = file.read()
+    text = data.decode("utf-8")
+    sections = [section.strip() for section in _SECTION_SEPARATOR.split(text) if section.strip()]
+    lowered = [section.lower() for section in sections]
+    return LoadedPolicy(
+        source.name, source.path, stat.st_mtime_ns, stat.st_size, hashlib.sha256(data).hexdigest(),
+        sections, lowered, BM25Index(lowered),
+    )
+
+
+class PolicyStore:
+    """
+    Airline policies held in memory, one BM25 index per airline.
+
+    Policies come from the `documents` registry and, optionally, from every
+    `*.txt` file in `policy_dir` (named e.g. `thai_airasia_policy.txt`).
+    `get` and `search` only read memory; calling `refresh` (the app does so
+    from a background task every POLICY_RELOAD_INTERVAL_SECONDS) picks up
+    changed, new and deleted files without a restart.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[Dict],
+        base_dir: str,
+        policy_dir: Optional[str] = None,
+    ):
+        self.registry = [
+            PolicySource(doc["name"], os.path.normpath(os.path.join(base_dir, doc["policy_file"])))
+            for doc in documents
+        ]
+        self.policy_dir = policy_dir
+        self._policies: Dict[str, LoadedPolicy] = {}
+        self._lock = threading.Lock()
+        self._change_listeners: List[Callable[[str, Optional[str]], None]] = []
+        self.refresh()
+
+    def _sources(self) -> Dict[str, PolicySource]:
+        sources: Dict[str, PolicySource] = {}
+        if self.policy_dir and os.path.isdir(self.policy_dir):
+            for entry in os.scandir(self.policy_dir):
+                if entry.is_file() and entry.name.endswith(".txt"):
+                    stem = Path(entry.name).stem
+                    if stem.endswith("_policy"):
+                        stem = stem[:-len("_policy")]
+                    sources[normalize_airline(stem)] = PolicySource(stem, entry.path)
+        # Registry entries carry the display name and win over directory files
+        for source in self.registry:
+            sources[normalize_airline(source.name)] = source
+        return sources
+
+    def add_change_listener(self, callback: Callable[[str, Optional[str]], None]) -> None:
+        """Call `callback(airline_key, sha256)` when a policy is reloaded; sha256 is None when removed."""
+        self._change_listeners.append(callback)
+
+    def versions(self) -> Dict[str, str]:
+        """Content hash of every loaded policy, keyed by normalized airline name."""
+        return {key: policy.sha256 for key, policy in self._policies.items()}
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Reload policies whose file changed; returns counts of loaded and removed
+        policies. A file that cannot be read or decoded keeps its previously
+        loaded version and does not stop the others from reloading.
+        """
+        changed: Dict[str, Optional[str]] = {}
+        with self._lock:
+            sources = self._sources()
+            policies = dict(self._policies)
+            loaded = 0
+            for key, source in sources.items():
+                current = policies.get(key)
+                try:
+                    stat = os.stat(source.path)
+                except FileNotFoundError:
+                    if current is not None:
+                        del policies[key]
+                        changed[key] = None
+                    continue
+                if (
+                    current is None
+                    or current.path != source.path
+                    or current.mtime_ns != stat.st_mtime_ns
+                    or current.size != stat.st_size
+                ):
+                    try:
+                        policy = load_policy(source)
+                    except (OSError, UnicodeDecodeError) as exc:
+                        # Keep serving the last good version; the next refresh retries
+                        logger.error("Could not load policy %s: %s", source.path, exc)
+                        continue
+                    policies[key] = policy
+                    loaded += 1
+                    if current is None or current.sha256 != policy.sha256:
+                        changed[key] = policy.sha256
+            removed = [key for key in policies if key not in sources]
+            for key in removed:
+                del policies[key]
+                changed[key] = None
+            # Readers keep using the old mapping until this swap
+            self._policies = policies
+        for key, sha256 in changed.items():
+            for callback in self._change_listeners:
+                callback(key, sha256)
+        return {"loaded": loaded, "removed": sum(sha256 is None for sha256 in changed.values())}
+
+    def get(self, airline: str) -> Optional[LoadedPolicy]:
+        return self._policies.get(normalize_airline(airline))
+
+    def airlines(self) -> List[str]:
+        return sorted(policy.name for policy in self._policies.values())
+
+    def search(self, airline: str, query: str, k: int = 3) -> Optional[List[str]]:
+        """
+        The `k` sections of the airline's policy most relevant to `query`.
+        Returns None when there is no policy for the airline and an empty
+        list when nothing in the policy matches.
+        """
+        policy = self.get(airline)
+        if policy is None:
+            return None
+        return [policy.sections[doc_id] for doc_id, _ in policy.index.search(query, k)]
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from paths import resolve_database
+
+# Observations newer than this are kept as recorded; older ones are thinned
+# to the last price per flight and day.
+PRICE_HISTORY_FULL_RESOLUTION_DAYS = int(os.getenv("PRICE_HISTORY_FULL_RESOLUTION_DAYS", "14"))
+# Observations and route aggregates older than this are deleted.
+PRICE_HISTORY_RETENTION_DAYS = int(os.getenv("PRICE_HISTORY_RETENTION_DAYS", "365"))
+
+DAY_SECONDS = 24 * 3600
+
+
+class RouteDay(NamedTuple):
+    day: str
+    min_price: int
+    median_price: int
+    flights: int
+
+
+def get_price_history(flight_uuid: str, sqlite_file: str) -> List[Tuple[int, int]]:
+    """(observedAt epoch seconds, price) pairs for one flight, oldest first."""
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        return conn.execute(
+            'SELECT "observedAt", price FROM price_observations WHERE "flightUuid"=? ORDER BY "observedAt"',
+            (flight_uuid,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def get_route_price_trend(
+    origin: str,
+    destination: str,
+    sqlite_file: str,
+    days: int = 30,
+    today: Optional[date] = None,
+) -> List[RouteDay]:
+    """Daily cheapest/median fares observed on a route over the last `days` days, oldest first."""
+    since = ((today or date.today()) - timedelta(days=days)).isoformat()
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        rows = conn.execute(
+            'SELECT day, "minPrice", "medianPrice", flights FROM route_daily_prices '
+            "WHERE origin=? AND destination=? AND day>=? ORDER BY day",
+            (origin, destination, since),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [RouteDay(*row) for row in rows]
+
+
+def compact_price_history(sqlite_file: str, now: Optional[int] = None) -> Dict[str, int]:
+    """
+    Apply the retention policy: drop observations and route aggregates past
+    PRICE_HISTORY_RETENTION_DAYS, and keep only the last observation per
+    flight and day once it is older than PRICE_HISTORY_FULL_RESOLUTION_DAYS.
+    """
+    now = int(now if now is not None else time.time())
+    retention_cutoff = now - PRICE_HISTORY_RETENTION_DAYS * DAY_SECONDS
+    downsample_cutoff = now - PRICE_HISTORY_FULL_RESOLUTION_DAYS * DAY_SECONDS
+
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        expired = conn.execute(
+            'DELETE FROM price_observations WHERE "observedAt" < ?', (retention_cutoff,)
+        ).rowcount
+        # The primary key (flightUuid, observedAt) serves the correlated lookup
+        downsampled = conn.execute(
+            """
+            DELETE FROM price_observations
+            WHERE "observedAt" < ?
+              AND EXISTS (
+                SELECT 1 FROM price_observations AS later
+                WHERE later."flightUuid" = price_observations."flightUuid"
+                  AND later."observedAt" > price_observations."observedAt"
+                  AND later."observedAt" < (price_observations."observedAt" / ? + 1) * ?
+              )
+            """,
+            (downsample_cutoff, DAY_SECONDS, DAY_SECONDS),
+        ).rowcount
+        expired_days = conn.execute(
+            "DELETE FROM route_daily_prices WHERE day < ?",
+            (date.fromtimestamp(retention_cutoff).isoformat(),),
+        ).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return {"expired": expired, "downsampled": downsampled, "expired_route_days": expired_days}
@@ -0,0 +1,27 @@
+from typing import Callable, Dict, List
+
+from providers.amadeus import AmadeusProvider
+from providers.base import FetchResult, FlightProvider, ProviderError
+from providers.fake import FakeFlightProvider
+
+_registry: Dict[str, Callable[[], FlightProvider]] = {}
+
+
+def register_provider(name: str, factory: Callable[[], FlightProvider]) -> None:
+    """Make a provider selectable by name in FLIGHT_SYNC_PROVIDERS."""
+    _registry[name.strip().lower()] = factory
+
+
+def available_providers() -> List[str]:
+    return sorted(_registry)
+
+
+def get_provider(name: str) -> FlightProvider:
+    factory = _registry.get(name.strip().lower())
+    if factory is None:
+        raise ValueError(f"Unknown flight provider '{name}'. Available: {', '.join(available_providers())}")
+    return factory()
+
+
+register_provider("amadeus", AmadeusProvider)
+register_provider("fake", FakeFlightProvider.from_env)
@@ -2,7 +2,9 @@ import hashlib
 import os
 from datetime import date, datetime, timedelta
 from functools import lru_cache
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
+
+from providers.base import FlightProvider, ProviderError
 
 INR_TO_EUR_FALLBACK = 90.0
 INR_TO_HUF_FALLBACK = 4.3
@@ -124,6 +126,66 @@ def _airline_name_for_code(carrier_code: str) -> str:
     return fallback_name
 
 
+def offer_to_row(
+    offer: Dict[str, Any],
+    origin_iata: str,
+    destination_iata: str,
+    origin: str,
+    destination: str,
+    airline_name: Callable[[str], str] = _airline_name_for_code,
+) -> Dict[str, Any]:
+    """Convert one Flight Offers Search result into a `flights` table row."""
+    itinerary = offer["itineraries"][0]
+    segments = itinerary["segments"]
+    carrier_code = segments[0].get("carrierCode", "Unknown")
+    carrier = airline_name(carrier_code)
+    duration = _duration_to_human(itinerary.get("duration", ""))
+    is_nonstop = len(segments) == 1
+    dep = datetime.fromisoformat(segments[0]["departure"]["at"])
+
+    city_origin, country_origin = IATA_TO_CITY.get(origin_iata, (origin, "Unknown"))
+    city_destination, country_destination = IATA_TO_CITY.get(destination_iata, (destination, "Unknown"))
+
+    return {
+        "uuid": _stable_uuid(origin_iata, destination_iata, dep.isoformat(), str(offer["price"]["total"]).split(".")[0], carrier_code),
+        "airline": carrier,
+        "date": dep.date().isoformat(),
+        "departureTime": dep.strftime("%H:%M"),
+        "duration": duration,
+        "flightType": "Nonstop" if is_nonstop else "Connecting",
+        "price": int(float(offer["price"]["total"])),
+        "origin": city_origin,
+        "destination": city_destination,
+        "originCountry": country_origin,
+        "destinationCountry": country_destination,
+        "link": "",
+        "rainProbability": None,
+        "freeMeal": None,
+    }
+
+
+def _fetch_day(
+    amadeus: Any,
+    origin: str,
+    destination: str,
+    departure_date: date,
+    adults: int,
+    max_results: int,
+) -> List[Dict[str, Any]]:
+    origin_iata = city_to_iata(origin)
+    destination_iata = city_to_iata(destination)
+    response = amadeus.shopping.flight_offers_search.get(
+        originLocationCode=origin_iata,
+        destinationLocationCode=destination_iata,
+        departureDate=departure_date.isoformat(),
+        adults=adults,
+        max=max_results,
+        currencyCode="HUF",
+    )
+    offers = response.data or []
+    return [offer_to_row(offer, origin_iata, destination_iata, origin, destination) for offer in offers]
+
+
 def fetch_flights(
     origin: str,
     destination: str,
@@ -132,54 +194,38 @@ def fetch_flights(
     adults: int = 1,
     max_per_day: int = 10,
 ) -> List[Dict[str, Any]]:
-    origin_iata = city_to_iata(origin)
-    destination_iata = city_to_iata(destination)
-
     amadeus = _build_amadeus_client()
 
     rows: List[Dict[str, Any]] = []
     current = start_date
     while current <= end_date:
-        response = amadeus.shopping.flight_offers_search.get(
-            originLocationCode=origin_iata,
-            destinationLocationCode=destination_iata,
-            departureDate=current.isoformat(),
-            adults=adults,
-            max=max_per_day,
-            currencyCode="HUF",
-        )
-        print(response.data)
-        offers = response.data or []
-        for offer in offers:
-            itinerary = offer["itineraries"][0]
-            segments = itinerary["segments"]
-            carrier_code = segments[0].get("carrierCode", "Unknown")
-            carrier = _airline_name_for_code(carrier_code)
-            duration = _duration_to_human(itinerary.get("duration", ""))
-            is_nonstop = len(segments) == 1
-            dep = datetime.fromisoformat(segments[0]["departure"]["at"])
-
-            city_origin, country_origin = IATA_TO_CITY.get(origin_iata, (origin, "Unknown"))
-            city_destination, country_destination = IATA_TO_CITY.get(destination_iata, (destination, "Unknown"))
-
-            rows.append(
-                {
-                    "uuid": _stable_uuid(origin_iata, destination_iata, dep.isoformat(), str(offer["price"]["total"]).split(".")[0], carrier_code),
-                    "airline": carrier,
-                    "date": dep.date().isoformat(),
-                    "duration": duration,
-                    "flightType": "Nonstop" if is_nonstop else "Connecting",
-                    "price": int(float(offer["price"]["total"])),
-                    "origin": city_origin,
-                    "destination": city_destination,
-                    "originCountry": country_origin,
-                    "destinationCountry": country_destination,
-                    "link": "",
-                    "rainProbability": None,
-                    "freeMeal": None,
-                }
-            )
-
+        rows.extend(_fetch_day(amadeus, origin, destination, current, adults, max_per_day))
         current += timedelta(days=1)
 
     return rows
+
+
+class AmadeusProvider(FlightProvider):
+    """The Amadeus Flight Offers Search API; a failed day is skipped instead of aborting the route."""
+
+    name = "amadeus"
+
+    def __init__(self):
+        self._client = None
+
+    def fetch_day(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        adults: int,
+        max_results: int,
+    ) -> List[Dict[str, Any]]:
+        if self._client is None:
+            self._client = _build_amadeus_client()
+        from amadeus import ResponseError
+
+        try:
+            return _fetch_day(self._client, origin, destination, departure_date, adults, max_results)
+        except ResponseError as exc:
+            raise ProviderError(f"Amadeus request failed: {exc}") from exc
@@ -0,0 +1,62 @@
+import abc
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+
+class ProviderError(RuntimeError):
+    """One provider request failed (HTTP error, timeout, ...); the sync skips that day and carries on."""
+
+
+class FetchResult(NamedTuple):
+    rows: List[Dict[str, Any]]
+    requests: int
+    failed_requests: List[Tuple[str, str]]  # (departure date, error)
+
+
+class FlightProvider(abc.ABC):
+    """
+    A source of flight rows for `sync_online_flights`.
+
+    Implementations fetch one route and departure day per `fetch_day` call
+    and return rows shaped like `data/flight_data.json` records; the
+    day-by-day loop, per-day error handling and tagging rows with the
+    provider's `name` as their source live here. Instances may be called
+    from several threads at once.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def fetch_day(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        adults: int,
+        max_results: int,
+    ) -> List[Dict[str, Any]]:
+        """Rows for one route and departure day; raises ProviderError when the request fails."""
+
+    def fetch_flights(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        adults: int = 1,
+        max_per_day: int = 10,
+    ) -> FetchResult:
+        rows: List[Dict[str, Any]] = []
+        failed: List[Tuple[str, str]] = []
+        requests = 0
+        current = start_date
+        while current <= end_date:
+            requests += 1
+            try:
+                for row in self.fetch_day(origin, destination, current, adults, max_per_day):
+                    row.setdefault("source", self.name)
+                    rows.append(row)
+            except ProviderError as exc:
+                failed.append((current.isoformat(), str(exc)))
+            current += timedelta(days=1)
+        return FetchResult(rows, requests, failed)
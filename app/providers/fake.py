@@ -0,0 +1,158 @@
+import os
+import random
+import string
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from providers.amadeus import AIRLINE_CODE_FALLBACKS, CITY_TO_IATA, offer_to_row
+from providers.base import FlightProvider, ProviderError
+
+# Carriers the fake provider picks from, named without an Amadeus lookup
+FAKE_CARRIERS = {
+    "VN": "Vietnam Airlines",
+    "VJ": "Vietjet",
+    "AI": "Air India",
+    "6E": "IndiGo",
+    "SQ": "Singapore Airlines",
+    "TG": "Thai Airways",
+    **AIRLINE_CODE_FALLBACKS,
+}
+_CARRIER_CODES = sorted(FAKE_CARRIERS)
+_CONNECTION_HUBS = ("SIN", "BKK", "DOH", "IST", "PEK", "ICN")
+_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+def _iso_duration(minutes: int) -> str:
+    return f"PT{minutes // 60}H{minutes % 60}M"
+
+
+def _location_code(city: str) -> str:
+    code = CITY_TO_IATA.get(city.strip().lower())
+    if code:
+        return code
+    # Unknown cities get a stable made-up code so any route can be synced
+    value = zlib.crc32(city.lower().encode("utf-8"))
+    return "Z" + _CODE_ALPHABET[value % 36] + _CODE_ALPHABET[value // 36 % 36]
+
+
+class FakeFlightProvider(FlightProvider):
+    """
+    Offline stand-in for Amadeus: generates Flight Offers Search payloads and
+    converts them with the same `offer_to_row` as the real provider.
+
+    Offers are deterministic per (seed, route, day), so repeated syncs update
+    rows instead of inserting new ones. Each request sleeps `latency_ms` and
+    fails with probability `error_rate`.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self._error_random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeFlightProvider":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_PROVIDER_LATENCY_MS", "0")),
+            error_rate=float(os.getenv("FAKE_PROVIDER_ERROR_RATE", "0")),
+            seed=int(os.getenv("FAKE_PROVIDER_SEED", "0")),
+        )
+
+    def generate_offers(
+        self,
+        origin_code: str,
+        destination_code: str,
+        departure_date: date,
+        max_results: int,
+    ) -> List[Dict[str, Any]]:
+        route_seed = zlib.crc32(f"{self.seed}|{origin_code}|{destination_code}".encode("utf-8"))
+        route_random = random.Random(route_seed)
+        base_minutes = route_random.randint(90, 720)
+        base_price = base_minutes * route_random.uniform(250, 450)  # HUF
+
+        day_random = random.Random(route_seed ^ departure_date.toordinal())
+        offers = []
+        for index in range(day_random.randint(max(max_results // 2, 1), max(max_results, 1))):
+            carrier = day_random.choice(_CARRIER_CODES)
+            departure = datetime.combine(departure_date, datetime.min.time()) + timedelta(
+                minutes=day_random.randrange(0, 24 * 60, 5)
+            )
+            if day_random.random() < 0.6:
+                legs = [(origin_code, destination_code, base_minutes)]
+            else:
+                hub = day_random.choice(_CONNECTION_HUBS)
+                first = base_minutes // 2 + day_random.randint(0, 90)
+                legs = [(origin_code, hub, first), (hub, destination_code, base_minutes - base_minutes // 2 + 60)]
+
+            segments = []
+            at = departure
+            for number, (leg_from, leg_to, minutes) in enumerate(legs):
+                arrival = at + timedelta(minutes=minutes)
+                segments.append({
+                    "departure": {"iataCode": leg_from, "at": at.isoformat()},
+                    "arrival": {"iataCode": leg_to, "at": arrival.isoformat()},
+                    "carrierCode": carrier,
+                    "number": str(100 + day_random.randrange(900)),
+                    "aircraft": {"code": day_random.choice(("320", "321", "359", "789"))},
+                    "duration": _iso_duration(minutes),
+                    "numberOfStops": 0,
+                })
+                at = arrival + timedelta(minutes=day_random.randint(60, 180)) if number < len(legs) - 1 else arrival
+
+            total = base_price * day_random.uniform(0.7, 1.8) * (1.0 if len(legs) == 1 else 0.85)
+            offers.append({
+                "type": "flight-offer",
+                "id": str(index + 1),
+                "source": "GDS",
+                "numberOfBookableSeats": day_random.randint(1, 9),
+                "itineraries": [{
+                    "duration": _iso_duration(int((at - departure).total_seconds() // 60)),
+                    "segments": segments,
+                }],
+                "price": {
+                    "currency": "HUF",
+                    "total": f"{total:.2f}",
+                    "base": f"{total * 0.8:.2f}",
+                    "grandTotal": f"{total:.2f}",
+                },
+                "validatingAirlineCodes": [carrier],
+            })
+        return offers
+
+    def _should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._error_random.random() < self.error_rate
+
+    def fetch_day(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        adults: int,
+        max_results: int,
+    ) -> List[Dict[str, Any]]:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        if self._should_fail():
+            raise ProviderError(f"fake provider: simulated HTTP 500 for {origin} -> {destination} on {departure_date}")
+
+        origin_code = _location_code(origin)
+        destination_code = _location_code(destination)
+        offers = self.generate_offers(origin_code, destination_code, departure_date, max_results)
+        return [
+            offer_to_row(offer, origin_code, destination_code, origin, destination, _airline_name)
+            for offer in offers
+        ]
+
+
+def _airline_name(carrier_code: str) -> str:
+    return FAKE_CARRIERS.get(carrier_code, carrier_code)
@@ -1,121 +1,251 @@
 import re
 import json
 import asyncio
-from typing import AsyncGenerator
+import time
+from contextlib import aclosing, nullcontext
+from typing import Any, AsyncContextManager, AsyncGenerator, Awaitable, Callable, Dict, Optional
 from sqlite3 import Error as SQLiteError
 from sqlalchemy.exc import SQLAlchemyError
 from langchain_core.messages import AIMessage
-from query_validator import is_flight_related_query, is_luggage_related_query
+from query_validator import QueryClassification, classify_query
 from luggage_extractor import extract_luggage_query
 from fastapi import HTTPException
-from response_prompt import response_prompt
+from response_prompt import itinerary_response_prompt, response_prompt, round_trip_response_prompt
 from generate_and_verify_sql import generate_sql
-from config import flight_llm, db, logger
+from intent_extractor import ENABLE_INTENT_EXTRACTION, extract_intent
+from sql_builder import build_flight_query, is_searchable
+from config import SQLITE_DB_PATH, get_flight_llm, get_db, logger, trace_logger
+from itineraries import find_itineraries, itineraries_for_prompt
+from roundtrip import (
+    describe_round_trip_search,
+    detect_round_trip,
+    find_round_trips,
+    round_trip_from_intent,
+    round_trips_for_prompt,
+)
 from vector_db import search_policy
 from util import parse_tuple_list
+from metrics import (
+    ANSWERED_SECONDS,
+    ENABLE_TRACE_IDS,
+    REQUESTS_TOTAL,
+    Trace,
+    mark_first_token,
+    record_cancellation,
+    record_llm_tokens,
+    record_stage,
+    stage_timer,
+    start_trace,
+)
 from airlines import VALID_AIRLINES
 
-async def stream_response(question: str) -> AsyncGenerator[str, None]:
+def _event(trace: Trace, event_type: str, content) -> str:
+    event = {"type": event_type, "content": content}
+    if ENABLE_TRACE_IDS:
+        event["trace_id"] = trace.trace_id
+    return json.dumps(event)
+
+async def stream_response(
+    question: str,
+    *,
+    classification: Optional[QueryClassification] = None,
+    llm_slot: Optional[AsyncContextManager] = None,
+    execute: Optional[Callable[[str, Optional[Dict[str, Any]]], Awaitable[str]]] = None,
+    stream_sql: bool = True,
+) -> AsyncGenerator[str, None]:
+    """
+    Answer one question as JSON events. The keyword arguments let the batch
+    endpoint pass a classification it already computed, a limiter held
+    around the SQL-planning and response LLM stages, a shared query
+    executor, and turn off streaming the SQL in small chunks.
+    """
+    trace = start_trace()
+    outcome = "error"
+    # Chunks streamed by the response call so far (about one token each); None until it starts
+    response_tokens = None
+    llm_slot = llm_slot or nullcontext()
+    execute = execute or execute_query
     try:
-        if not is_flight_related_query(question):
-            yield json.dumps({
-                "type": "error",
-                "content": "Query not related to flight data. Please ask about flights, prices, routes, or travel dates."
-            })
+        if classification is None:
+            with stage_timer("classify"):
+                classification = classify_query(question)
+        if not classification.is_flight:
+            outcome = "not_flight"
+            yield _event(trace, "error", "Query not related to flight data. Please ask about flights, prices, routes, or travel dates.")
             return
 
-        # Step 1: Generate and verify SQL query
-        cleaned_query = await generate_sql(question)
-
-        # Step 2: Stream SQL query in chunks
-        sql_chunks = [cleaned_query[i:i+10] for i in range(0, len(cleaned_query), 10)]
-        for chunk in sql_chunks:
-            yield json.dumps({
-                "type": "sql",
-                "content": chunk
-            })
-            await asyncio.sleep(0.05)
-
-        # Step 3: Execute SQL query
-        query_results_str = await execute_query(cleaned_query)
-
-        # Step 4: Parse query results
-        flight_data = parse_tuple_list(query_results_str)
-
-        if not flight_data:
-            yield json.dumps({
-                "type": "error",
-                "content": "No flights found for the given route."
-            })
-            return
+        async with llm_slot:
+            intent = await extract_intent(question) if ENABLE_INTENT_EXTRACTION else None
+        round_trip = round_trip_from_intent(intent) if intent is not None else detect_round_trip(question)
+        itineraries = []
+
+        if round_trip is not None:
+            # Round trips are paired in-process from the route/date index; no SQL LLM involved
+            cleaned_query = describe_round_trip_search(round_trip)
+            yield _event(trace, "sql", cleaned_query)
+            with stage_timer("round_trip"):
+                round_trips = await asyncio.to_thread(find_round_trips, round_trip, SQLITE_DB_PATH)
+            if not round_trips:
+                outcome = "no_results"
+                yield _event(trace, "error", "No round trips found for the given route and stay length.")
+                return
+            flight_data = [leg for trip in round_trips for leg in (trip.outbound, trip.inbound)]
+        else:
+            # Step 1: Build the SQL query. With intent extraction one structured LLM
+            # call yields the query parameters and the luggage sub-question; the
+            # generate/verify SQL loop is the fallback.
+            query_parameters = None
+            if intent is not None and is_searchable(intent):
+                built_query = build_flight_query(intent)
+                cleaned_query, query_parameters = built_query.display_sql, built_query.parameters
+                sql_to_execute = built_query.sql
+            else:
+                async with llm_slot:
+                    cleaned_query = await generate_sql(question)
+                sql_to_execute = cleaned_query
+
+            # Step 2: Stream SQL query in chunks
+            if stream_sql:
+                sql_chunks = [cleaned_query[i:i+10] for i in range(0, len(cleaned_query), 10)]
+                for chunk in sql_chunks:
+                    yield _event(trace, "sql", chunk)
+                    await asyncio.sleep(0.05)
+            else:
+                yield _event(trace, "sql", cleaned_query)
+
+            # Step 3: Execute SQL query
+            with stage_timer("execute_query"):
+                query_results_str = await execute(sql_to_execute, query_parameters)
+
+            # Step 4: Parse query results (SQLDatabase.run returns "" when nothing matched)
+            with stage_timer("parse"):
+                flight_data = parse_tuple_list(query_results_str) if query_results_str else []
+
+            # No direct flights: look for connecting itineraries in the flights graph
+            if not flight_data:
+                with stage_timer("itineraries"):
+                    itineraries = await asyncio.to_thread(find_itineraries, question, intent, SQLITE_DB_PATH)
+                flight_data = [leg for itinerary in itineraries for leg in itinerary.legs]
+
+            if not flight_data:
+                outcome = "no_results"
+                yield _event(trace, "error", "No flights found for the given route.")
+                return
 
         # Step 5: Extract valid airline names
         airline_names = {flight[1] for flight in flight_data if flight[1] in VALID_AIRLINES}
 
         # Step 6: Handle luggage-related queries
         luggage_policies = {}
-        if is_luggage_related_query(question):
-            luggage_query = await extract_luggage_query(question)
+        if classification.is_luggage:
+            if intent is not None:
+                luggage_query = intent.luggage_question
+            else:
+                async with llm_slot:
+                    luggage_query = await extract_luggage_query(question)
             if luggage_query:
                 for airline in airline_names:
                     policy = await search_policy(airline, luggage_query)
                     luggage_policies[airline] = f"{policy} ({airline})"
 
         # Step 7: Generate response using streaming
-        response_input = {
-            "question": question,
-            "sql_query": cleaned_query,
-            "query_result": flight_data,
-            "luggage_policies": luggage_policies
-        }
-        formatted_response_prompt = response_prompt.format(**response_input)
+        if round_trip is not None:
+            formatted_response_prompt = round_trip_response_prompt.format(
+                question=question,
+                search=cleaned_query,
+                round_trips=round_trips_for_prompt(round_trips),
+            )
+        elif itineraries:
+            formatted_response_prompt = itinerary_response_prompt.format(
+                question=question,
+                itineraries=itineraries_for_prompt(itineraries),
+            )
+        else:
+            response_input = {
+                "question": question,
+                "sql_query": cleaned_query,
+                "query_result": flight_data,
+                "luggage_policies": luggage_policies
+            }
+            formatted_response_prompt = response_prompt.format(**response_input)
 
         buffer = ""
         current_think = False
-
-        # Step 8: Stream AI-generated response
-        async for chunk in flight_llm.astream(formatted_response_prompt):
-            if isinstance(chunk, AIMessage):
-                content = chunk.content
-            else:
-                content = str(chunk)
-
-            if "<think>" in content:
-                current_think = True
-                continue
-            elif "</think>" in content:
-                current_think = False
-                continue
-
-            if current_think:
-                continue
-
-            buffer += content
-
-            if re.search(r'[.,!?\s]$', buffer):
-                if buffer.strip():
-                    yield json.dumps({"type": "answer", "content": buffer})
-                buffer = ""
+        prompt_tokens = completion_tokens = 0
+
+        # Step 8: Stream AI-generated response. When the client goes away the
+        # cancellation lands here; aclosing closes the provider's HTTP stream
+        # right then, which stops generation on the model server, instead of
+        # whenever the abandoned generator is collected.
+        response_tokens = 0
+        async with llm_slot:
+            with stage_timer("response"):
+                async with aclosing(get_flight_llm().astream(formatted_response_prompt)) as chunks:
+                    async for chunk in chunks:
+                        if isinstance(chunk, AIMessage):
+                            content = chunk.content
+                            # Providers report usage on one (usually the last) chunk
+                            if chunk.usage_metadata:
+                                prompt_tokens += chunk.usage_metadata.get("input_tokens", 0)
+                                completion_tokens += chunk.usage_metadata.get("output_tokens", 0)
+                        else:
+                            content = str(chunk)
+                        if content:
+                            response_tokens += 1
+
+                        if "<think>" in content:
+                            current_think = True
+                            continue
+                        elif "</think>" in content:
+                            current_think = False
+                            continue
+
+                        if current_think:
+                            continue
+
+                        buffer += content
+
+                        if re.search(r'[.,!?\s]$', buffer):
+                            if buffer.strip():
+                                mark_first_token()
+                                yield _event(trace, "answer", buffer)
+                            buffer = ""
+        record_llm_tokens("response", prompt_tokens, completion_tokens)
 
         # Step 9: Append luggage policy at the end
         if luggage_policies:
             luggage_info = "\n\nLuggage Policies:\n" + "\n".join(
                 [f"- {policy}" for policy in luggage_policies.values()]
             )
-            yield json.dumps({"type": "answer", "content": luggage_info})
+            mark_first_token()
+            yield _event(trace, "answer", luggage_info)
 
         # Send any remaining buffered content
         if buffer.strip():
-            yield json.dumps({"type": "answer", "content": buffer})
-
+            mark_first_token()
+            yield _event(trace, "answer", buffer)
+        outcome = "ok"
+
+    except (asyncio.CancelledError, GeneratorExit):
+        # Client went away mid-stream; the cancellation has already stopped the awaited LLM call
+        outcome = "cancelled"
+        record_cancellation(trace, response_tokens)
+        trace_logger.info("Client disconnected during %s after %.2fs", trace.stage, time.perf_counter() - trace.started)
+        raise
     except Exception as e:
         logger.error("Error in stream_response: %s", str(e))
-        yield json.dumps({"type": "error", "content": str(e)})
-
-async def execute_query(query: str):
-    """Execute SQL query and return results"""
+        yield _event(trace, "error", str(e))
+    finally:
+        record_stage("total", time.perf_counter() - trace.started)
+        if outcome == "ok":
+            ANSWERED_SECONDS.observe(time.perf_counter() - trace.started)
+        REQUESTS_TOTAL.inc(outcome=outcome)
+        trace_logger.info("Request trace: %s", trace.summary())
+
+async def execute_query(query: str, parameters: Optional[Dict[str, Any]] = None):
+    """Execute SQL query (with optional bound parameters) and return results"""
     try:
-        return db.run(query)
+        return get_db().run(query, parameters=parameters)
     except (SQLAlchemyError, SQLiteError) as e:
         raise HTTPException(
             status_code=500,
@@ -1,74 +1,164 @@
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Set
 
-from difflib import get_close_matches
-from typing import Set
+FLIGHT = "flight"
+LUGGAGE = "luggage"
 
-def get_fuzzy_matches(word: str, vocabulary: Set[str], cutoff: float = 0.75) -> bool:
+# Same similarity threshold difflib.get_close_matches was called with
+FUZZY_CUTOFF = 0.75
+
+# Core flight-related keywords
+FLIGHT_KEYWORDS = frozenset({
+    'flight', 'air', 'airline', 'airport', 'airways',
+    'travel', 'trip', 'journey',
+    'destination', 'dest',
+    'origin', 'route', 'path', 'connection',
+    'price', 'fare', 'cost', 'expensive', 'cheap', 'grandtotal',
+    'direct', 'nonstop', 'connecting',
+    'departure', 'arrive', 'arriving', 'departing',
+    'domestic', 'international'
+})
+
+# Location indicators that strongly suggest a flight query (exact match only)
+LOCATION_INDICATORS = frozenset({'from', 'to', 'between', 'via'})
+
+# Currency symbols/codes indicating a price question (matched case-sensitively)
+_PRICE_PATTERN = re.compile(r"[₹$€]|\bFt\b")
+
+# Core luggage-related keywords
+LUGGAGE_KEYWORDS = frozenset({
+    'luggage', 'baggage', 'bag', 'suitcase', 'carry-on',
+    'carry on', 'check-in', 'checked bag', 'hand baggage',
+    'weight', 'kg', 'kilos', 'pounds', 'lbs',
+    'dimensions', 'size', 'allowance', 'restriction',
+    'prohibited', 'forbidden', 'allowed', 'limit',
+    'overweight', 'excess', 'cabin', 'hold', 'storage',
+    'pack', 'bring', 'carry', 'transport', 'stow'
+})
+
+# Common words that sit within typo distance of a keyword ('show' ~ 'stow',
+# 'does' ~ 'dest', 'are' ~ 'fare'); they are never fuzzy matched.
+EXACT_ONLY_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does',
+    'for', 'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or',
+    'show', 'the', 'their', 'there', 'what', 'when', 'where', 'which', 'with',
+})
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+class QueryClassification(NamedTuple):
+    is_flight: bool
+    is_luggage: bool
+
+
+def _bigrams(term: str) -> Set[str]:
+    padded = f"^{term}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class KeywordIndex:
     """
-    Check if a word closely matches any word in the vocabulary using fuzzy matching
+    Fuzzy keyword lookup with difflib ratio semantics, built once.
+    A padded-bigram index narrows each lookup to the keywords sharing a bigram
+    with the term; only those are scored with SequenceMatcher.
     """
-    return bool(get_close_matches(word, vocabulary, n=1, cutoff=cutoff))
 
-def is_flight_related_query(query: str) -> bool:
+    def __init__(self, labelled_keywords: Dict[str, Iterable[str]], cutoff: float = FUZZY_CUTOFF):
+        self.cutoff = cutoff
+        self.keywords: List[str] = sorted(labelled_keywords)
+        self.labels: List[FrozenSet[str]] = [frozenset(labelled_keywords[k]) for k in self.keywords]
+        self.exact: Dict[str, FrozenSet[str]] = dict(zip(self.keywords, self.labels))
+        self.bigram_index: Dict[str, List[int]] = defaultdict(list)
+        for keyword_id, keyword in enumerate(self.keywords):
+            for bigram in _bigrams(keyword):
+                self.bigram_index[bigram].append(keyword_id)
+
+    def lookup(self, term: str) -> FrozenSet[str]:
+        """Return the labels of every keyword whose similarity to `term` is at least the cutoff."""
+        labels = self.exact.get(term)
+        if labels is not None:
+            return labels
+
+        candidates: Set[int] = set()
+        for bigram in _bigrams(term):
+            candidates.update(self.bigram_index.get(bigram, ()))
+
+        matched: Set[str] = set()
+        matcher = SequenceMatcher()
+        matcher.set_seq2(term)
+        for keyword_id in candidates:
+            keyword = self.keywords[keyword_id]
+            if self.labels[keyword_id] <= matched:
+                continue
+            # Cheap upper bound on the ratio before the full comparison
+            if 2.0 * min(len(term), len(keyword)) / (len(term) + len(keyword)) < self.cutoff:
+                continue
+            matcher.set_seq1(keyword)
+            if (matcher.real_quick_ratio() >= self.cutoff
+                    and matcher.quick_ratio() >= self.cutoff
+                    and matcher.ratio() >= self.cutoff):
+                matched.update(self.labels[keyword_id])
+        return frozenset(matched)
+
+
+def _build_index() -> KeywordIndex:
+    labelled: Dict[str, Set[str]] = defaultdict(set)
+    for keyword in FLIGHT_KEYWORDS:
+        labelled[keyword].add(FLIGHT)
+    for keyword in LUGGAGE_KEYWORDS:
+        labelled[keyword].add(LUGGAGE)
+    return KeywordIndex(labelled)
+
+
+_KEYWORD_INDEX = _build_index()
+# Longest keyword phrase, in tokens ("hand baggage" -> 2)
+_MAX_PHRASE_TOKENS = max(len(keyword.split()) for keyword in _KEYWORD_INDEX.keywords)
+
+
+@lru_cache(maxsize=8192)
+def _term_labels(term: str) -> FrozenSet[str]:
+    if term in LOCATION_INDICATORS:
+        return frozenset({FLIGHT})
+    if term in EXACT_ONLY_WORDS:
+        return frozenset()
+    return _KEYWORD_INDEX.lookup(term)
+
+
+def classify_query(query: str) -> QueryClassification:
     """
-    Enhanced check for flight-related queries using fuzzy matching for typo tolerance
+    Decide in a single pass whether a query is about flights and/or luggage.
+    Matches single words and multi-word phrases (e.g. 'carry on') with typo tolerance.
     """
-    # Core flight-related keywords
-    flight_keywords = {
-        'flight', 'air', 'airline', 'airport', 'airways',
-        'travel', 'trip', 'journey',
-        'destination', 'dest',
-        'origin', 'route', 'path', 'connection',
-        'price', 'fare', 'cost', 'expensive', 'cheap', 'grandTotal'
-        'direct', 'nonstop', 'connecting',
-        'departure', 'arrive', 'arriving', 'departing',
-        'domestic', 'international'
-    }
-
-    # Location indicators that strongly suggest a flight query
-    location_indicators = {'from', 'to', 'between', 'via'}
-
-    # Clean and tokenize the query
-    query = query.lower().strip()
-    query_words = query.split()
-
-    # Check each word in the query for fuzzy matches
-    for word in query_words:
-        # Exact match for location indicators
-        if word in location_indicators:
-            return True
-
-        # Fuzzy match for flight keywords
-        if get_fuzzy_matches(word, flight_keywords):
-            return True
+    lowered = query.lower().strip()
+    tokens = _TOKEN_PATTERN.findall(lowered)
+
+    labels: Set[str] = set()
+    for n in range(1, _MAX_PHRASE_TOKENS + 1):
+        for i in range(len(tokens) - n + 1):
+            labels.update(_term_labels(" ".join(tokens[i:i + n])))
+            if len(labels) == 2:
+                return QueryClassification(True, True)
 
     # Check for price indicators
-    if any(char in query for char in ['₹', '$', '€', 'Ft']):
-        return True
+    if FLIGHT not in labels and _PRICE_PATTERN.search(query):
+        labels.add(FLIGHT)
+
+    return QueryClassification(FLIGHT in labels, LUGGAGE in labels)
+
+
+def is_flight_related_query(query: str) -> bool:
+    """
+    Check for flight-related queries using fuzzy matching for typo tolerance
+    """
+    return classify_query(query).is_flight
 
-    return False
 
 def is_luggage_related_query(query: str) -> bool:
     """
     Check if a query is related to luggage/baggage using fuzzy matching
     """
-    # Core luggage-related keywords
-    luggage_keywords = {
-        'luggage', 'baggage', 'bag', 'suitcase', 'carry-on',
-        'carry on', 'check-in', 'checked bag', 'hand baggage',
-        'weight', 'kg', 'kilos', 'pounds', 'lbs',
-        'dimensions', 'size', 'allowance', 'restriction',
-        'prohibited', 'forbidden', 'allowed', 'limit',
-        'overweight', 'excess', 'cabin', 'hold', 'storage',
-        'pack', 'bring', 'carry', 'transport', 'stow'
-    }
-
-    # Clean and tokenize the query
-    query = query.lower().strip()
-    query_words = query.split()
-
-    # Check each word in the query for fuzzy matches
-    for word in query_words:
-        if get_fuzzy_matches(word, luggage_keywords):
-            return True
-
-    return False
\ No newline at end of file
+    return classify_query(query).is_luggage
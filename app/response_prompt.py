@@ -1,4 +1,4 @@
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 
 response_prompt = PromptTemplate(
     input_variables=["question", "sql_query", "query_result"],
@@ -54,3 +54,69 @@ If data exists (example for one-way flights):
 Note: All data displayed must be exclusively from the 'query_result'. Do not show any placeholder or example data in the final response.
 """
 )
+
+
+round_trip_response_prompt = PromptTemplate(
+    input_variables=["question", "search", "round_trips"],
+    template="""
+Present round-trip flight options based on the following:
+
+User Query: {question}
+Search: {search}
+Round Trips (cheapest first, each with an outbound and a return flight): {round_trips}
+
+Instructions:
+- Format the results as a series of cards, one per round trip, separated by a horizontal rule (`---`).
+- Format prices with a 'Ft' symbol and comma separators (e.g., 32,621 Ft).
+- For each flight's 'link', create a clickable markdown link with the text "Book Now".
+- Mark the first (cheapest) round trip with "**(Cheapest)**" and bold its total price.
+- End with a one or two sentence summary of the best choice for the user's query.
+
+Response Format:
+
+### Round Trip Options
+
+---
+**🔁 [Total Price] Ft total, [Stay Days]-day stay**
+- **Outbound:** [Airline], [Origin] → [Destination], [Date], [Price] Ft, [Duration] ([Book Now]([link]))
+- **Return:** [Airline], [Origin] → [Destination], [Date], [Price] Ft, [Duration] ([Book Now]([link]))
+---
+
+**Summary:** [Your concise overview]
+
+Note: All data displayed must be exclusively from the round trips above. Do not show any placeholder or example data in the final response.
+"""
+)
+
+
+itinerary_response_prompt = PromptTemplate(
+    input_variables=["question", "itineraries"],
+    template="""
+There are no direct flights for this route. Present connecting itineraries based on the following:
+
+User Query: {question}
+Itineraries (best first, each a list of legs flown in order): {itineraries}
+
+Instructions:
+- Start by saying that no direct flights were found and that these itineraries connect through other cities.
+- Format the results as a series of cards, one per itinerary, separated by a horizontal rule (`---`).
+- Format prices with a 'Ft' symbol and comma separators (e.g., 32,621 Ft).
+- For each leg's 'link', create a clickable markdown link with the text "Book Now".
+- Mark the first itinerary with "**(Best)**" and bold its total price.
+- End with a one or two sentence summary of the best choice for the user's query.
+
+Response Format:
+
+### Connecting Itineraries
+
+---
+**🛫 [Total Price] Ft total, [Total Hours] h, via [Connecting Cities]**
+- **Leg 1:** [Airline], [Origin] → [Destination], [Date], [Price] Ft, [Duration] ([Book Now]([link]))
+- **Leg 2:** [Airline], [Origin] → [Destination], [Date], [Price] Ft, [Duration] ([Book Now]([link]))
+---
+
+**Summary:** [Your concise overview]
+
+Note: All data displayed must be exclusively from the itineraries above. Do not show any placeholder or example data in the final response.
+"""
+)
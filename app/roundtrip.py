@@ -0,0 +1,216 @@
+import heapq
+import os
+import re
+import sqlite3
+from datetime import date, timedelta
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from models import FlightIntent
+from paths import resolve_database
+from sql_builder import CITY_ALIASES, FLIGHT_COLUMNS, KNOWN_CITIES, canonical_city
+
+# Stay length used when the question does not give one, in days
+ROUND_TRIP_MIN_STAY_DAYS = int(os.getenv("ROUND_TRIP_MIN_STAY_DAYS", "3"))
+ROUND_TRIP_MAX_STAY_DAYS = int(os.getenv("ROUND_TRIP_MAX_STAY_DAYS", "14"))
+# Cheapest pairs passed to the response LLM
+ROUND_TRIP_TOP_K = int(os.getenv("ROUND_TRIP_TOP_K", "5"))
+
+# Position of the price in a flight row (FLIGHT_COLUMNS order)
+PRICE = FLIGHT_COLUMNS.index("price")
+
+_ROUND_TRIP_WORDS = re.compile(
+    r"\b(round[\s-]?trip|return (?:flight|ticket|trip)s?|both ways|(?:and|then) (?:fly(?:ing)? )?back|come back|coming back)\b",
+    re.IGNORECASE,
+)
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fourteen": 14, "fifteen": 15,
+}
+_NUMBER = r"(\d+|" + "|".join(_NUMBER_WORDS) + r")"
+_STAY_RANGE = re.compile(_NUMBER + r"\s*(?:-|to|or)\s*" + _NUMBER + r"\s*(day|night|week)s?\b", re.IGNORECASE)
+_STAY_SINGLE = re.compile(r"\b" + _NUMBER + r"\s*(day|night|week)s?\b", re.IGNORECASE)
+_CITY_NAMES = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, [*KNOWN_CITIES, *CITY_ALIASES]), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+
+class RoundTripRequest(NamedTuple):
+    origin: str
+    destination: str
+    min_stay_days: int
+    max_stay_days: int
+    date_from: Optional[date] = None  # outbound departure window
+    date_to: Optional[date] = None
+
+
+class RoundTrip(NamedTuple):
+    total_price: int
+    stay_days: int
+    outbound: Tuple[Any, ...]  # flight row in FLIGHT_COLUMNS order
+    inbound: Tuple[Any, ...]
+
+
+def _number(token: str) -> int:
+    return int(token) if token.isdigit() else _NUMBER_WORDS[token.lower()]
+
+
+def parse_stay_days(question: str) -> Optional[Tuple[int, int]]:
+    """(min, max) stay from phrases like "for 5 days", "5-7 nights" or "two weeks"."""
+    match = _STAY_RANGE.search(question)
+    if match:
+        scale = 7 if match.group(3).lower() == "week" else 1
+        low, high = sorted((_number(match.group(1)) * scale, _number(match.group(2)) * scale))
+        return low, high
+    match = _STAY_SINGLE.search(question)
+    if match:
+        days = _number(match.group(1)) * (7 if match.group(2).lower() == "week" else 1)
+        return days, days
+    return None
+
+
+def detect_round_trip(question: str) -> Optional[RoundTripRequest]:
+    """A round-trip request when the question asks for one and names both cities; None otherwise."""
+    if not _ROUND_TRIP_WORDS.search(question):
+        return None
+    cities: List[str] = []
+    for match in _CITY_NAMES.finditer(question):
+        city = canonical_city(match.group())
+        if city not in cities:
+            cities.append(city)
+    if len(cities) < 2:
+        return None
+    low, high = parse_stay_days(question) or (ROUND_TRIP_MIN_STAY_DAYS, ROUND_TRIP_MAX_STAY_DAYS)
+    return RoundTripRequest(cities[0], cities[1], low, high)
+
+
+def round_trip_from_intent(intent: FlightIntent) -> Optional[RoundTripRequest]:
+    if not (intent.round_trip and intent.origin and intent.destination):
+        return None
+    low = intent.stay_days_min if intent.stay_days_min is not None else ROUND_TRIP_MIN_STAY_DAYS
+    high = intent.stay_days_max if intent.stay_days_max is not None else max(low, ROUND_TRIP_MAX_STAY_DAYS)
+    return RoundTripRequest(
+        canonical_city(intent.origin),
+        canonical_city(intent.destination),
+        min(low, high),
+        max(low, high),
+        intent.date_from,
+        intent.date_to,
+    )
+
+
+def _day_buckets(rows: Sequence[Tuple[Any, ...]], k: int) -> Tuple[List[int], List[List[Tuple[Any, ...]]]]:
+    # rows are (departureDay, *flight) sorted by day then price; only the k
+    # cheapest of a day can be part of the k cheapest pairs
+    days: List[int] = []
+    buckets: List[List[Tuple[Any, ...]]] = []
+    for row in rows:
+        if not days or days[-1] != row[0]:
+            days.append(row[0])
+            buckets.append([])
+        if len(buckets[-1]) < k:
+            buckets[-1].append(row[1:])
+    return days, buckets
+
+
+def pair_round_trips(
+    outbound_rows: Sequence[Tuple[Any, ...]],
+    inbound_rows: Sequence[Tuple[Any, ...]],
+    min_stay_days: int,
+    max_stay_days: int,
+    k: int = ROUND_TRIP_TOP_K,
+) -> List[RoundTrip]:
+    """
+    The k cheapest (outbound, return) pairs whose return departs
+    min_stay_days..max_stay_days after the outbound.
+
+    Rows are (departureDay, *flight columns) sorted by (departureDay, price).
+    Each pair of departure days within the stay window is a cell whose two
+    price-sorted lists are merged lazily through one heap, so the cost is
+    O(n + cells + k log cells) instead of a self-join over every pair.
+    """
+    if k <= 0:
+        return []
+    out_days, out_buckets = _day_buckets(outbound_rows, k)
+    in_days, in_buckets = _day_buckets(inbound_rows, k)
+
+    heap = []
+    start = 0
+    for oi, day in enumerate(out_days):
+        # Both day lists ascend, so the window start only moves forward
+        while start < len(in_days) and in_days[start] < day + min_stay_days:
+            start += 1
+        ri = start
+        while ri < len(in_days) and in_days[ri] <= day + max_stay_days:
+            heap.append((out_buckets[oi][0][PRICE] + in_buckets[ri][0][PRICE], oi, ri, 0, 0))
+            ri += 1
+    heapq.heapify(heap)
+
+    pairs: List[RoundTrip] = []
+    while heap and len(pairs) < k:
+        total, oi, ri, i, j = heapq.heappop(heap)
+        outbound, inbound = out_buckets[oi], in_buckets[ri]
+        pairs.append(RoundTrip(total, in_days[ri] - out_days[oi], outbound[i], inbound[j]))
+        # Successors (i, j+1) always and (i+1, 0) from the first column visit every index pair once
+        if j + 1 < len(inbound):
+            heapq.heappush(heap, (outbound[i][PRICE] + inbound[j + 1][PRICE], oi, ri, i, j + 1))
+        if j == 0 and i + 1 < len(outbound):
+            heapq.heappush(heap, (outbound[i + 1][PRICE] + inbound[0][PRICE], oi, ri, i + 1, 0))
+    return pairs
+
+
+def _load_leg(
+    conn: sqlite3.Connection,
+    origin: str,
+    destination: str,
+    date_from: Optional[date],
+    date_to: Optional[date],
+) -> List[Tuple[Any, ...]]:
+    sql = (
+        f'SELECT "departureDay", {", ".join(FLIGHT_COLUMNS)} FROM flights '
+        'WHERE origin=? AND destination=? AND price IS NOT NULL AND "departureDay" IS NOT NULL'
+    )
+    parameters: List[Any] = [origin, destination]
+    if date_from:
+        sql += " AND date >= ?"
+        parameters.append(date_from.isoformat())
+    if date_to:
+        sql += " AND date <= ?"
+        parameters.append(date_to.isoformat())
+    # ix_flights_route_date serves the route and date order; only the price tie-break is sorted
+    return conn.execute(sql + ' ORDER BY date, price', parameters).fetchall()
+
+
+def find_round_trips(request: RoundTripRequest, sqlite_file: str, k: int = ROUND_TRIP_TOP_K) -> List[RoundTrip]:
+    return_from = request.date_from + timedelta(days=request.min_stay_days) if request.date_from else None
+    return_to = request.date_to + timedelta(days=request.max_stay_days) if request.date_to else None
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        outbound = _load_leg(conn, request.origin, request.destination, request.date_from, request.date_to)
+        inbound = _load_leg(conn, request.destination, request.origin, return_from, return_to)
+    finally:
+        conn.close()
+    return pair_round_trips(outbound, inbound, request.min_stay_days, request.max_stay_days, k)
+
+
+def describe_round_trip_search(request: RoundTripRequest) -> str:
+    """Human-readable summary shown in place of the SQL for round-trip searches."""
+    window = ""
+    if request.date_from or request.date_to:
+        window = f", leaving {request.date_from or '...'} to {request.date_to or '...'}"
+    return (
+        f"Round trip {request.origin} ⇄ {request.destination}, "
+        f"staying {request.min_stay_days}-{request.max_stay_days} days{window}"
+    )
+
+
+def round_trips_for_prompt(round_trips: Sequence[RoundTrip]) -> List[dict]:
+    return [
+        {
+            "total_price": trip.total_price,
+            "stay_days": trip.stay_days,
+            "outbound": dict(zip(FLIGHT_COLUMNS, trip.outbound)),
+            "return": dict(zip(FLIGHT_COLUMNS, trip.inbound)),
+        }
+        for trip in round_trips
+    ]
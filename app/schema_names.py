@@ -0,0 +1,18 @@
+from typing import Dict, Tuple
+
+# Tables and columns of the models in database.py, for modules that need the
+# names without importing SQLAlchemy. tests/test_clean_sql_query.py keeps the
+# two in step.
+SCHEMA_TABLES: Dict[str, Tuple[str, ...]] = {
+    "flights": (
+        "uuid", "airline", "date", "departureTime", "duration", "flightType", "price",
+        "origin", "destination", "originCountry", "destinationCountry", "link",
+        "rainProbability", "freeMeal", "canonicalKey", "source", "durationMinutes", "departureDay",
+    ),
+    "price_observations": ("flightUuid", "observedAt", "price"),
+    "route_fare_calendar": (
+        "origin", "destination", "date", "departureDay", "minPrice", "airline", "flightUuid",
+        "flights", "updatedAt",
+    ),
+    "route_daily_prices": ("origin", "destination", "day", "minPrice", "medianPrice", "flights", "updatedAt"),
+}
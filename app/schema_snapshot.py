@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from database import add_data_change_listener
+from paths import resolve_database
+
+# Tables used for bookkeeping only; they are never shown to the SQL LLM.
+# price_observations is per-flight history; trend questions go to route_daily_prices.
+SCHEMA_IGNORED_TABLES = {"sync_metadata", "price_observations"}
+
+# Low-cardinality text columns whose distinct values are listed in the snapshot.
+DOMAIN_COLUMNS = {
+    "flights": ["origin", "destination", "airline", "flightType"],
+}
+# Columns summarised as a min/max range instead of a value list.
+RANGE_COLUMNS = {
+    "flights": ["date", "price", "durationMinutes"],
+    "route_daily_prices": ["day"],
+    "route_fare_calendar": ["date"],
+}
+
+SAMPLE_ROWS = 3
+MAX_DOMAIN_VALUES = 50
+MAX_SAMPLE_VALUE_LENGTH = 100
+
+_snapshots: Dict[str, str] = {}
+_generation = 0
+_lock = threading.Lock()
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _render_sample_rows(cursor: sqlite3.Cursor, table: str) -> str:
+    cursor.execute(f"SELECT * FROM {_quote(table)} LIMIT {SAMPLE_ROWS}")
+    columns = [description[0] for description in cursor.description]
+    lines = ["\t".join(columns)]
+    for row in cursor.fetchall():
+        lines.append("\t".join(str(value)[:MAX_SAMPLE_VALUE_LENGTH] for value in row))
+    body = "\n".join(lines)
+    return f"/*\n{SAMPLE_ROWS} rows from {table} table:\n{body}\n*/"
+
+
+def _render_column_values(cursor: sqlite3.Cursor, table: str, columns: List[str]) -> Optional[str]:
+    lines = []
+    for column in DOMAIN_COLUMNS.get(table, []):
+        if column not in columns:
+            continue
+        cursor.execute(
+            f"SELECT DISTINCT {_quote(column)} FROM {_quote(table)} "
+            f"WHERE {_quote(column)} IS NOT NULL ORDER BY 1 LIMIT {MAX_DOMAIN_VALUES + 1}"
+        )
+        values = [str(row[0]) for row in cursor.fetchall()]
+        if len(values) > MAX_DOMAIN_VALUES:
+            values = values[:MAX_DOMAIN_VALUES] + ["..."]
+        lines.append(f"{column}: {', '.join(values)}")
+
+    for column in RANGE_COLUMNS.get(table, []):
+        if column not in columns:
+            continue
+        cursor.execute(f"SELECT MIN({_quote(column)}), MAX({_quote(column)}) FROM {_quote(table)}")
+        low, high = cursor.fetchone()
+        if low is not None:
+            lines.append(f"{column}: {low} to {high}")
+
+    if not lines:
+        return None
+    body = "\n".join(lines)
+    return f"/*\nColumn values in {table} table:\n{body}\n*/"
+
+
+def build_schema_snapshot(sqlite_file: str) -> str:
+    """Render table definitions, sample rows and column value domains for the SQL prompt."""
+    conn = sqlite3.connect(resolve_database(sqlite_file))
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+        tables = [(name, sql) for name, sql in cursor.fetchall() if name not in SCHEMA_IGNORED_TABLES]
+
+        blocks = []
+        for table, create_sql in tables:
+            cursor.execute(f"PRAGMA table_info({_quote(table)})")
+            columns = [row[1] for row in cursor.fetchall()]
+            parts = [create_sql.strip(), _render_sample_rows(cursor, table)]
+            column_values = _render_column_values(cursor, table, columns)
+            if column_values:
+                parts.append(column_values)
+            blocks.append("\n\n".join(parts))
+        return "\n\n".join(blocks)
+    finally:
+        conn.close()
+
+
+def get_schema_snapshot(sqlite_file: str) -> str:
+    """Return the cached snapshot for `sqlite_file`, building it on first use."""
+    key = os.path.realpath(sqlite_file)
+    snapshot = _snapshots.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    with _lock:
+        generation = _generation
+    snapshot = build_schema_snapshot(sqlite_file)
+    with _lock:
+        # Drop the result if the data changed while it was being built.
+        if generation == _generation:
+            _snapshots[key] = snapshot
+    return snapshot
+
+
+def invalidate_schema_snapshot(sqlite_file: Optional[str] = None) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        if sqlite_file is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(os.path.realpath(sqlite_file), None)
+
+
+add_data_change_listener(invalidate_schema_snapshot)
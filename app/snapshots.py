@@ -0,0 +1,137 @@
+import os
+import re
+import sqlite3
+from typing import List, Tuple
+
+from database import notify_data_changed
+from paths import close_removed_generations, current_generation, generation_pointer_path
+
+# Sync runs write to a copy of the database and publish it when done, instead
+# of holding a write transaction on the file requests are reading
+FLIGHT_SYNC_SNAPSHOT = os.getenv("FLIGHT_SYNC_SNAPSHOT", "false").lower() == "true"
+# Generation files kept on disk, the published one included. Requests that
+# started on the previous generation finish on it, so keep at least 2.
+FLIGHT_SYNC_SNAPSHOT_KEEP = int(os.getenv("FLIGHT_SYNC_SNAPSHOT_KEEP", "2"))
+
+_SQLITE_SIDE_FILES = ("", "-wal", "-shm", "-journal")
+# The sync_metadata rows a snapshot started with; dropped when it is published
+_BASE_METADATA_TABLE = "snapshot_base_metadata"
+
+
+def list_generations(sqlite_file: str) -> List[Tuple[int, str]]:
+    """Snapshot generation files of `sqlite_file` (`flights.db.g<N>`) as (N, path), oldest first."""
+    directory, name = os.path.split(sqlite_file)
+    pattern = re.compile(re.escape(name) + r"\.g(\d+)")
+    generations = []
+    for entry in os.listdir(directory or "."):
+        match = pattern.fullmatch(entry)
+        if match:
+            generations.append((int(match.group(1)), os.path.join(directory, entry)))
+    return sorted(generations)
+
+
+def _has_table(conn: sqlite3.Connection, schema: str, name: str) -> bool:
+    query = f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?"
+    return conn.execute(query, (name,)).fetchone() is not None
+
+
+def discard_snapshot(snapshot: str) -> None:
+    for suffix in _SQLITE_SIDE_FILES:
+        try:
+            os.remove(snapshot + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def build_snapshot(sqlite_file: str) -> str:
+    """
+    Copy the published generation of `sqlite_file` to a new generation file
+    and return its path. The copy uses SQLite's online backup, which reads
+    one consistent view of the source without blocking its readers. The
+    copied `sync_metadata` rows are kept aside for `publish_snapshot`.
+    """
+    generations = list_generations(sqlite_file)
+    snapshot = f"{sqlite_file}.g{generations[-1][0] + 1 if generations else 1}"
+    # Leftovers of a run that failed before publishing
+    discard_snapshot(snapshot)
+
+    source = sqlite3.connect(current_generation(sqlite_file))
+    target = sqlite3.connect(snapshot)
+    try:
+        source.backup(target)
+        target.execute(f"CREATE TABLE {_BASE_METADATA_TABLE} (key TEXT, value TEXT, updated_at INTEGER)")
+        if _has_table(target, "main", "sync_metadata"):
+            target.execute(f"INSERT INTO {_BASE_METADATA_TABLE} SELECT key, value, updated_at FROM sync_metadata")
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+    return snapshot
+
+
+def publish_snapshot(sqlite_file: str, snapshot: str) -> None:
+    """
+    Make `snapshot` the generation of `sqlite_file` that requests read from
+    their next one on. Refreshes the planner statistics first, then replaces
+    the pointer file in one rename; requests already running keep their
+    generation.
+
+    `sync_metadata` rows the sync run wrote to the snapshot are published as
+    they are. Every other row, the sync lease included, is taken from the
+    live file, so metadata written there while the snapshot was built (such
+    as lease heartbeats) is not reverted.
+    """
+    live = current_generation(sqlite_file)
+    conn = sqlite3.connect(snapshot)
+    try:
+        conn.execute("ANALYZE")
+        conn.execute("ATTACH DATABASE ? AS live", (live,))
+        if all(
+            _has_table(conn, schema, name)
+            for schema, name in (("main", _BASE_METADATA_TABLE), ("main", "sync_metadata"), ("live", "sync_metadata"))
+        ):
+            # Rows that differ from what build_snapshot copied were written by the sync run
+            written = f"""
+                SELECT key FROM main.sync_metadata
+                EXCEPT SELECT m.key FROM main.sync_metadata AS m
+                JOIN {_BASE_METADATA_TABLE} AS b
+                  ON b.key = m.key AND b.value = m.value AND b.updated_at = m.updated_at
+            """
+            conn.execute(
+                f"DELETE FROM main.sync_metadata WHERE key NOT IN ({written}) "
+                "AND key NOT IN (SELECT key FROM live.sync_metadata)"
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO main.sync_metadata "
+                f"SELECT * FROM live.sync_metadata WHERE key NOT IN ({written})"
+            )
+        conn.execute(f"DROP TABLE IF EXISTS main.{_BASE_METADATA_TABLE}")
+        conn.commit()
+        conn.execute("DETACH DATABASE live")
+    finally:
+        conn.close()
+
+    pointer = generation_pointer_path(sqlite_file)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as handle:
+        handle.write(os.path.basename(snapshot))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(pointer + ".tmp", pointer)
+    notify_data_changed(sqlite_file)
+
+
+def remove_old_generations(sqlite_file: str, keep: int = FLIGHT_SYNC_SNAPSHOT_KEEP) -> List[str]:
+    """
+    Delete all but the newest `keep` generation files; never the published
+    one. Cached engines opened on the deleted files are closed.
+    """
+    live = current_generation(sqlite_file)
+    generations = list_generations(sqlite_file)
+    removed = []
+    for _, path in generations[:max(len(generations) - max(keep, 1), 0)]:
+        if path == live:
+            continue
+        discard_snapshot(path)
+        removed.append(path)
+    close_removed_generations()
+    return removed
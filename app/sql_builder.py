@@ -0,0 +1,136 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from database import departure_day
+from models import FlightIntent
+from sql_prompt import SQL_TOP_K
+
+# Same columns, in the same order, as sql_prompt rule 1; stream_response reads
+# the airline from the second column.
+FLIGHT_COLUMNS = (
+    "uuid", "airline", "date", "duration", "flightType", "price",
+    "origin", "destination", "link", "rainProbability", "freeMeal",
+)
+
+# flightType values counted as direct (sql_prompt rule 5)
+DIRECT_FLIGHT_TYPES = ("Nonstop", "Direct", "Non-stop", "Non stop", "Direct flight")
+
+KNOWN_CITIES = (
+    "New Delhi", "Mumbai", "Bangalore", "Kolkata", "Ahmedabad",
+    "Hanoi", "Ho Chi Minh City", "Da Nang",
+)
+
+CITY_ALIASES = {
+    "delhi": "New Delhi",
+    "bombay": "Mumbai",
+    "bengaluru": "Bangalore",
+    "calcutta": "Kolkata",
+    "saigon": "Ho Chi Minh City",
+    "hcmc": "Ho Chi Minh City",
+    "ho chi minh": "Ho Chi Minh City",
+    "danang": "Da Nang",
+}
+
+# Generic trailing words dropped before matching an airline ("VietJet Air" is stored as "Vietjet")
+_AIRLINE_SUFFIXES = {"air", "airline", "airlines", "airways"}
+
+_ORDER_BY = {
+    "price_asc": "price ASC, departureDay ASC",
+    "price_desc": "price DESC, departureDay ASC",
+    "date_asc": "departureDay ASC, price ASC",
+    "date_desc": "departureDay DESC, price ASC",
+}
+
+MAX_LIMIT = 50
+
+_PLACEHOLDER = re.compile(r":([A-Za-z_]\w*)")
+
+
+class BuiltQuery(NamedTuple):
+    sql: str
+    parameters: Dict[str, Any]
+    # The same query with values inlined, for display and the response prompt
+    display_sql: str
+
+
+def canonical_city(name: str) -> str:
+    key = " ".join(name.lower().split())
+    for city in KNOWN_CITIES:
+        if city.lower() == key:
+            return city
+    return CITY_ALIASES.get(key, name.strip())
+
+
+def airline_pattern(name: str) -> str:
+    words = name.split()
+    while len(words) > 1 and words[-1].lower() in _AIRLINE_SUFFIXES:
+        words.pop()
+    return " ".join(words) + "%"
+
+
+def is_searchable(intent: FlightIntent) -> bool:
+    """Whether the intent is specific enough to build a query without the SQL LLM."""
+    return bool(intent.origin or intent.destination)
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+
+def inline_parameters(sql: str, parameters: Dict[str, Any]) -> str:
+    # One pass, so an inlined value is never scanned for placeholders itself
+    return _PLACEHOLDER.sub(
+        lambda m: _literal(parameters[m.group(1)]) if m.group(1) in parameters else m.group(), sql
+    )
+
+
+def build_flight_query(intent: FlightIntent, top_k: Optional[int] = None) -> BuiltQuery:
+    """Deterministic, parameterized SELECT over the flights table for an extracted intent."""
+    conditions: List[str] = []
+    parameters: Dict[str, Any] = {}
+    filters = intent.filters
+
+    if intent.origin:
+        conditions.append("origin = :origin")
+        parameters["origin"] = canonical_city(intent.origin)
+    if intent.destination:
+        conditions.append("destination = :destination")
+        parameters["destination"] = canonical_city(intent.destination)
+    if intent.date_from:
+        conditions.append("departureDay >= :day_from")
+        parameters["day_from"] = departure_day(intent.date_from.isoformat())
+    if intent.date_to:
+        conditions.append("departureDay <= :day_to")
+        parameters["day_to"] = departure_day(intent.date_to.isoformat())
+    if filters.airline:
+        # LIKE is case-insensitive for ASCII in SQLite
+        conditions.append("airline LIKE :airline")
+        parameters["airline"] = airline_pattern(filters.airline)
+    if filters.direct_only:
+        conditions.append("flightType IN (" + ", ".join(_literal(t) for t in DIRECT_FLIGHT_TYPES) + ")")
+    if filters.free_meal:
+        conditions.append("freeMeal = 1")
+    if filters.min_price is not None:
+        conditions.append("price >= :min_price")
+        parameters["min_price"] = filters.min_price
+    if filters.max_price is not None:
+        conditions.append("price <= :max_price")
+        parameters["max_price"] = filters.max_price
+    if filters.max_duration_minutes is not None:
+        conditions.append("durationMinutes <= :max_duration_minutes")
+        parameters["max_duration_minutes"] = filters.max_duration_minutes
+    if filters.max_rain_probability is not None:
+        conditions.append("rainProbability < :max_rain_probability")
+        parameters["max_rain_probability"] = filters.max_rain_probability
+
+    limit = min(intent.limit or top_k or SQL_TOP_K, MAX_LIMIT)
+    parameters["limit"] = limit
+
+    sql = f"SELECT {', '.join(FLIGHT_COLUMNS)} FROM flights"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    # uuid last keeps the order stable between identical requests
+    sql += f" ORDER BY {_ORDER_BY.get(intent.sort or 'price_asc')}, uuid LIMIT :limit;"
+    return BuiltQuery(sql, parameters, inline_parameters(sql, parameters))
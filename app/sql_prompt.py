@@ -1,11 +1,18 @@
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 
+# Number of rows the generated query should return. Kept constant so the
+# rendered prompt prefix stays byte-identical between requests.
+SQL_TOP_K = 10
+
+# Everything up to "User Input" is static for the lifetime of the process
+# (rules, routes and the cached schema), so local servers such as LM Studio,
+# Ollama or llama.cpp can reuse their KV cache for it. The question must stay
+# at the very end of the template.
 sql_prompt = PromptTemplate(
     input_variables=["input", "top_k", "table_info"],
     template="""
 Convert the user's flight search request into a comprehensive SQL query based on the rules below.
 
-User Input: {input}
 Top Results to Retrieve: {top_k}
 
 Allowed Routes:
@@ -20,18 +27,24 @@ Allowed Routes:
 - Ahmedabad ↔ Ho Chi Minh City
 - Ahmedabad ↔ Da Nang
 
-Database Schema:
-{table_info}
-
 Query Generation Rules:
 1.  **Column Selection:** Always select all available columns: `uuid, airline, date, duration, flightType, price, origin, destination, link, rainProbability, freeMeal`.
-2.  **Trip Type:** Default to a one-way flight search unless a round-trip is explicitly requested (e.g., "round trip," "return flight," "both ways"). For round-trip queries, you will need to construct two separate queries or a more complex join, but for this task, focus on generating the query for the outbound flight first.
+2.  **Trip Type:** Always generate a one-way flight search. Round trips naming both cities are paired by a separate engine; if a round-trip request still reaches you, generate the query for the outbound flight only.
 3.  **Free Meal Filter:** If the user asks for a "free meal" or "included meal," add the condition `WHERE freeMeal = 1`.
 4.  **Weather Filter:** If the user specifies a condition on rain or weather (e.g., "low chance of rain"), use the `rainProbability` column. For example, for a low chance of rain, you might use `WHERE rainProbability < 40`.
 5.  **Direct Flights:** For "direct" or "non-stop" flight requests, match ANY of these values in the `flightType` column: 'Nonstop', 'Direct', 'Non-stop', 'Non stop', 'Direct flight'.
 6.  **Sorting:** If the user asks for the "cheapest" or "best price," add `ORDER BY price ASC`.
 7.  **Limit:** Always limit the number of results to `{top_k}`.
+8.  **Price Trends:** For questions comparing fares with an earlier time (e.g., "is it cheaper than last week", "have prices dropped"), query the `route_daily_prices` table instead of `flights`. It has one row per route and day with `minPrice` and `medianPrice`; filter on `origin`, `destination` and `day` (YYYY-MM-DD) and select `day, minPrice, medianPrice, flights`. Rule 1 does not apply to these queries.
+9.  **Duration:** For flight length (e.g., "under 5 hours"), filter on the integer `durationMinutes` column, e.g. `WHERE durationMinutes < 300`. Never parse the text `duration` column.
+10. **Dates:** For a departure date or date range, filter on the integer `departureDay` column (days since 1970-01-01), e.g. `WHERE departureDay BETWEEN CAST(julianday('2025-08-01') - 2440587.5 AS INTEGER) AND CAST(julianday('2025-08-31') - 2440587.5 AS INTEGER)`. Use `ORDER BY departureDay` for date sorting.
+11. **Fare Calendar:** For "which day is cheapest" or calendar-style questions (e.g., "cheapest day to fly Delhi to Hanoi this month"), query the `route_fare_calendar` table instead of `flights`. It has one row per route and departure `date` with the cheapest fare in `minPrice` and its `airline`; filter on `origin`, `destination` and `departureDay` as in rule 10, select `date, minPrice, airline, flights` and `ORDER BY minPrice ASC`. Rule 1 does not apply to these queries.
 
 STRICTLY output only the SQL query. Do not include any additional information, comments, or explanations.
-"""
+
+Database Schema:
+{table_info}
+
+User Input: {input}
+SQLQuery: """
 )
@@ -1,8 +1,9 @@
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from database import (
     SYNC_KEY_LAST_SUCCESS_EPOCH,
@@ -12,7 +13,18 @@ from database import (
     upsert_flights,
 )
 from paths import get_sqlite_db_path
-from providers.amadeus import fetch_flights
+from price_history import compact_price_history
+from providers import FetchResult, FlightProvider, get_provider
+from snapshots import (
+    FLIGHT_SYNC_SNAPSHOT,
+    build_snapshot,
+    discard_snapshot,
+    publish_snapshot,
+    remove_old_generations,
+)
+
+# Concurrent (provider, route) fetches; provider calls are I/O bound
+FLIGHT_SYNC_CONCURRENCY = int(os.getenv("FLIGHT_SYNC_CONCURRENCY", "4"))
 
 
 def _default_routes() -> List[Tuple[str, str]]:
@@ -35,6 +47,17 @@ def _load_routes() -> List[Tuple[str, str]]:
     return routes
 
 
+def _load_providers() -> List[FlightProvider]:
+    names = os.getenv("FLIGHT_SYNC_PROVIDERS") or os.getenv("FLIGHT_SYNC_PROVIDER", "amadeus")
+    return [get_provider(name) for name in names.split(",") if name.strip()]
+
+
+def _sync_start_date() -> date:
+    """First departure day to fetch: FLIGHT_SYNC_START_DATE (YYYY-MM-DD) if set, else today."""
+    raw = os.getenv("FLIGHT_SYNC_START_DATE")
+    return date.fromisoformat(raw) if raw else date.today()
+
+
 def _get_last_success_epoch(sqlite_file: str) -> int:
     raw = get_sync_metadata(SYNC_KEY_LAST_SUCCESS_EPOCH, sqlite_file)
     if not raw:
@@ -45,7 +68,11 @@ def _get_last_success_epoch(sqlite_file: str) -> int:
         return 0
 
 
-def sync_online_flights(sqlite_file: str | None = None) -> Dict[str, Any]:
+def sync_online_flights(
+    sqlite_file: str | None = None,
+    providers: Optional[Sequence[FlightProvider]] = None,
+    routes: Optional[List[Tuple[str, str]]] = None,
+) -> Dict[str, Any]:
     sqlite_file = sqlite_file or get_sqlite_db_path()
     min_gap_minutes = int(os.getenv("FLIGHT_SYNC_MIN_UPDATE_GAP_MINUTES", "10"))
     min_gap_seconds = max(min_gap_minutes, 0) * 60
@@ -70,33 +97,77 @@ def sync_online_flights(sqlite_file: str | None = None) -> Dict[str, Any]:
             "cached_flight_count": cached_flight_count,
         }
 
-    routes = _load_routes()
+    providers = providers or _load_providers()
+    routes = routes if routes is not None else _load_routes()
     print("loaded routes")
     days_ahead = int(os.getenv("FLIGHT_SYNC_DAYS_AHEAD", "21"))
     max_per_day = int(os.getenv("FLIGHT_SYNC_MAX_PER_DAY", "8"))
 
-    start = date(2026, 8, 8)
+    start = _sync_start_date()
     end = start + timedelta(days=days_ahead)
 
-    all_rows = []
+    def fetch(task: Tuple[FlightProvider, str, str]) -> Optional[FetchResult]:
+        provider, origin, destination = task
+        # One bad route (unknown city, auth error, ...) should not cost the others their update
+        try:
+            result = provider.fetch_flights(
+                origin=origin,
+                destination=destination,
+                start_date=start,
+                end_date=end,
+                max_per_day=max_per_day,
+            )
+        except Exception as exc:
+            print(f"Fetching {origin} -> {destination} from {provider.name} failed: {exc}")
+            return None
+        if result.failed_requests:
+            print(
+                f"{origin} -> {destination} from {provider.name}: "
+                f"{len(result.failed_requests)}/{result.requests} days failed"
+            )
+        return result
+
+    tasks = [(provider, origin, destination) for provider in providers for origin, destination in routes]
     print("fetching flights")
-    for origin, destination in routes:
-        rows = fetch_flights(
-            origin=origin,
-            destination=destination,
-            start_date=start,
-            end_date=end,
-            max_per_day=max_per_day,
-        )
-        all_rows.extend(rows)
+    with ThreadPoolExecutor(max_workers=max(FLIGHT_SYNC_CONCURRENCY, 1)) as executor:
+        # map keeps task order, so precedence ties resolve the same way on every run
+        results = list(executor.map(fetch, tasks))
     print("fetched flights")
 
-    stats = upsert_flights(all_rows, sqlite_file)
-    set_sync_metadata(SYNC_KEY_LAST_SUCCESS_EPOCH, str(int(time.time())), sqlite_file)
+    all_rows = []
+    failed_routes = 0
+    failed_requests = 0
+    for result in results:
+        if result is None:
+            failed_routes += 1
+            continue
+        failed_requests += len(result.failed_requests)
+        all_rows.extend(result.rows)
+
+    if tasks and failed_routes == len(tasks):
+        raise RuntimeError(f"All {failed_routes} route fetches failed")
+
+    # In snapshot mode the writes go to a copy that requests never see until it is published
+    target = build_snapshot(sqlite_file) if FLIGHT_SYNC_SNAPSHOT else sqlite_file
+    try:
+        stats = upsert_flights(all_rows, target)
+        stats["price_history"] = compact_price_history(target)
+        set_sync_metadata(SYNC_KEY_LAST_SUCCESS_EPOCH, str(int(time.time())), target)
+    except BaseException:
+        if target != sqlite_file:
+            discard_snapshot(target)
+        raise
+    if target != sqlite_file:
+        publish_snapshot(sqlite_file, target)
+        stats["snapshot"] = os.path.basename(target)
+        stats["removed_generations"] = len(remove_old_generations(sqlite_file))
     stats.update({
         "skipped": False,
+        "providers": [provider.name for provider in providers],
+        "failed_routes": failed_routes,
+        "failed_requests": failed_requests,
         "last_success_epoch": int(time.time()),
         "remaining_seconds": 0,
-        "cached_flight_count": get_flight_count(sqlite_file),
+        "cached_flight_count": get_flight_count(target),
     })
     return stats
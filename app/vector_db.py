@@ -1,19 +1,35 @@
+import asyncio
 import json
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
-import openai
-import tiktoken
-from config import luggage_llm
+from typing import List, Dict, Optional, Tuple
+from config import get_luggage_llm
+from http_client import get_async_http_client
 from strip_think_tags import strip_think_tags
 from luggage_prompt import luggage_prompt
+from metrics import record_llm_usage, stage_timer
+from hybrid_retriever import HybridRetriever
+from luggage_answer_cache import (
+    LUGGAGE_ANSWER_CACHE_ENABLED,
+    AnswerKey,
+    answer_key,
+    get_luggage_answer_cache,
+)
+from policy_store import PolicyStore
 
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-nomic-embed-text-v1.5")
 
-client = openai.AsyncOpenAI(
-    api_key=os.getenv("LMSTUDIO_API_KEY", os.getenv("OPENAI_API_KEY", "lm-studio")),
-    base_url=os.getenv("LMSTUDIO_OPENAI_BASE_URL", os.getenv("OPENAI_BASE_URL", "http://127.0.0.1:1234/v1")),
-)
+@lru_cache(maxsize=None)
+def get_embedding_client():
+    import openai
+
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("LMSTUDIO_API_KEY", os.getenv("OPENAI_API_KEY", "lm-studio")),
+        base_url=os.getenv("LMSTUDIO_OPENAI_BASE_URL", os.getenv("OPENAI_BASE_URL", "http://127.0.0.1:1234/v1")),
+        http_client=get_async_http_client(),
+    )
 
 # Usage example:
 documents = [
@@ -36,43 +52,191 @@ def read_file(file_path: str) -> str:
         print(f"Trying to read file at: {absolute_path}")
         raise
 
-def split_document(text: str, max_tokens: int = 500) -> List[str]:
-    # Initialize tokenizer for ada-002
-    enc = tiktoken.encoding_for_model("text-embedding-ada-002")
-
-    chunks = []
-    current_chunk = []
-    current_size = 0
-
-    # Split into sentences (basic implementation)
-    sentences = text.replace('\n', ' ').split('. ')
-
-    for sentence in sentences:
-        sentence = sentence.strip() + '. '
-        sentence_tokens = len(enc.encode(sentence))
-
-        if current_size + sentence_tokens > max_tokens:
-            # Join the current chunk and add to chunks
-            chunks.append(''.join(current_chunk))
-            current_chunk = [sentence]
-            current_size = sentence_tokens
+# Tokens of text that count toward a chunk's size are measured with the
+# embedding model's tokenizer; loaded once per process on first use.
+@lru_cache(maxsize=None)
+def get_encoder():
+    import tiktoken
+
+    return tiktoken.encoding_for_model("text-embedding-ada-002")
+
+
+# Words ending in '.' that do not end a sentence
+ABBREVIATIONS = frozenset({
+    "approx", "co", "dr", "e.g", "eg", "etc", "excl", "i.e", "ie", "inc", "incl",
+    "ltd", "max", "min", "mr", "mrs", "ms", "no", "nos", "rs", "st", "vs",
+})
+
+_BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+_NUMBERED_LABEL = re.compile(r"\d+[.)]\s+[A-Za-z]")
+# Whitespace after terminal punctuation that is followed by the start of a new
+# sentence, or any line break. "7.5 kg" never matches (no whitespace after '.').
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\s*\n\s*")
+
+
+def _is_heading(block: str) -> bool:
+    """A short single-line block such as '2. Hand luggage dimensions:' or 'Maximum Weight'."""
+    if "\n" in block or len(block) > 80:
+        return False
+    if block.endswith(":"):
+        return True
+    # Short label without punctuation; values such as '25kg per person' are not headings
+    starts_like_label = block[0].isalpha() or _NUMBERED_LABEL.match(block) is not None
+    return starts_like_label and block[-1] not in ".!?;," and len(block.split()) <= 8
+
+
+def _split_sentences(block: str) -> List[str]:
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(block):
+        candidate = block[start:match.start()].strip()
+        if not candidate:
+            continue
+        if "\n" not in match.group():
+            last_word = candidate.rsplit(None, 1)[-1].rstrip(".!?").lower()
+            # Abbreviations, list numbering ("1.") and initials ("a.") do not end a sentence
+            if last_word in ABBREVIATIONS or last_word.isdigit() or len(last_word) == 1:
+                continue
+        sentences.append(candidate)
+        start = match.end()
+    tail = block[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _split_sections(text: str) -> List[Tuple[str, List[str]]]:
+    """Group blank-line separated blocks into (heading, sentences) sections."""
+    sections: List[Tuple[str, List[str]]] = []
+    heading = ""
+    sentences: List[str] = []
+    for raw_block in _BLOCK_SEPARATOR.split(text):
+        block = raw_block.strip()
+        if not block:
+            continue
+        # A heading directly after another heading is treated as that section's content
+        if _is_heading(block) and (sentences or not heading):
+            if sentences:
+                sections.append((heading, sentences))
+                sentences = []
+            heading = block
+            continue
+        sentences.extend(_split_sentences(block))
+    if sentences:
+        sections.append((heading, sentences))
+    elif heading:
+        # A trailing heading with nothing under it (or a one-line document) is kept as text
+        sections.append(("", [heading]))
+    return sections
+
+
+def _windows(pieces: List[Tuple[str, int]], budget: int, overlap_tokens: int) -> List[List[Tuple[str, int]]]:
+    """Greedily pack (text, tokens) pieces into windows, repeating trailing pieces as overlap."""
+    windows = []
+    current: List[Tuple[str, int]] = []
+    size = 0
+    for text, tokens in pieces:
+        if current and size + tokens > budget:
+            windows.append(current)
+            carry: List[Tuple[str, int]] = []
+            carry_size = 0
+            for previous in reversed(current[1:]):
+                if carry_size + previous[1] > overlap_tokens or carry_size + previous[1] + tokens > budget:
+                    break
+                carry.insert(0, previous)
+                carry_size += previous[1]
+            current, size = carry, carry_size
+        current.append((text, tokens))
+        size += tokens
+    if current:
+        windows.append(current)
+    return windows
+
+
+def split_document(text: str, max_tokens: int = 500, overlap_tokens: int = 50) -> List[str]:
+    """
+    Split a policy document into chunks of at most `max_tokens` tokens.
+
+    Chunks never cut across a section and start with the section heading;
+    short neighbouring sections are packed into one chunk. Consecutive chunks
+    of a long section share up to `overlap_tokens` tokens of trailing sentences.
+    All sentences and headings are tokenized in a single batch call; the
+    separators the pieces are joined with count toward the budget too.
+    """
+    enc = get_encoder()
+    sections = _split_sections(text)
+    if not sections:
+        return []
+
+    headings = [heading for heading, _ in sections]
+    token_lists = enc.encode_ordinary_batch(
+        headings + [sentence for _, sentences in sections for sentence in sentences]
+    )
+    sentence_tokens = iter(token_lists[len(sections):])
+
+    # (text, tokens, packable) per rendered section window
+    rendered: List[Tuple[str, int, bool]] = []
+    for (heading, sentences), heading_tokens in zip(sections, token_lists):
+        sentence_token_lists = [next(sentence_tokens) for _ in sentences]
+        # "heading\n": the heading and its line break
+        heading_cost = len(heading_tokens) + 1 if heading else 0
+        if heading_cost > max_tokens // 2:
+            # Too long to repeat on every chunk; it becomes the section's first sentence
+            sentences = [heading] + sentences
+            sentence_token_lists = [heading_tokens] + sentence_token_lists
+            heading, heading_cost = "", 0
+        # Each piece is charged its tokens plus the " " joining it to the
+        # previous one; the first piece has no separator, hence the + 1
+        budget = max(max_tokens - heading_cost + 1, 2)
+        pieces = []
+        for sentence, tokens in zip(sentences, sentence_token_lists):
+            if len(tokens) + 1 <= budget:
+                pieces.append((sentence, len(tokens) + 1))
+            else:
+                # A single sentence larger than a chunk is cut into token windows
+                for i in range(0, len(tokens), budget - 1):
+                    window = tokens[i:i + budget - 1]
+                    pieces.append((enc.decode(window), len(window) + 1))
+
+        windows = _windows(pieces, budget, overlap_tokens)
+        for window in windows:
+            body = " ".join(piece for piece, _ in window)
+            rendered.append((
+                f"{heading}\n{body}" if heading else body,
+                heading_cost + sum(tokens for _, tokens in window) - 1,
+                len(windows) == 1,
+            ))
+
+    chunks: List[str] = []
+    chunk_size = 0
+    previous_packable = False
+    for chunk_text, tokens, packable in rendered:
+        # "\n\n" between packed sections is charged two tokens, one per line break
+        if chunks and packable and previous_packable and chunk_size + 2 + tokens <= max_tokens:
+            chunks[-1] = f"{chunks[-1]}\n\n{chunk_text}"
+            chunk_size += 2 + tokens
         else:
-            current_chunk.append(sentence)
-            current_size += sentence_tokens
-
-    # Add the last chunk if it exists
-    if current_chunk:
-        chunks.append(''.join(current_chunk))
-
+            chunks.append(chunk_text)
+            chunk_size = tokens
+        previous_packable = packable
     return chunks
 
+
 async def get_embedding(text: str) -> List[float]:
-    response = await client.embeddings.create(
+    response = await get_embedding_client().embeddings.create(
         model=EMBEDDING_MODEL,
         input=text
     )
     return response.data[0].embedding
 
+async def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed several texts in one request, in input order."""
+    response = await get_embedding_client().embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts
+    )
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
 async def process_documents(documents: List[Dict], embedding_cache_dir: str = "./embeddings_cache"):
     # Create cache directory if it doesn't exist
     Path(embedding_cache_dir).mkdir(parents=True, exist_ok=True)
@@ -133,48 +297,67 @@ async def process_documents(documents: List[Dict], embedding_cache_dir: str = ".
         'metadata': chunk_metadata
     }
 
-async def generate_llm_response(airline: str, query: str, relevant_text: str) -> str:
+async def generate_llm_response(
+    airline: str, query: str, relevant_text: str, cache_key: Optional[AnswerKey] = None
+) -> str:
     prompt = luggage_prompt.format(airline=airline, query=query, relevant_text=relevant_text)
 
     try:
-        response = await luggage_llm.ainvoke(prompt)
-        return strip_think_tags(response).strip()
+        with stage_timer("luggage_answer"):
+            response = await get_luggage_llm().ainvoke(prompt)
+        record_llm_usage("luggage_answer", response)
+        answer = strip_think_tags(response).strip()
     except Exception:
-        # Fallback to a basic response if LLM fails
+        # Fallback to a basic response if LLM fails; never cached
         return f"According to {airline}'s policy: {relevant_text}"
 
-def search_policy(airline: str, query: str) -> str:
-    policy_file = next((doc["policy_file"] for doc in documents
-                       if doc["name"].lower() == airline.lower()), None)
-
-    script_dir = Path(__file__).parent.absolute()
-    absolute_path = os.path.join(script_dir, policy_file)
-
-    if not policy_file:
+    if cache_key is not None:
+        await asyncio.to_thread(get_luggage_answer_cache().put, cache_key, answer)
+    return answer
+
+@lru_cache(maxsize=None)
+def get_policy_store() -> PolicyStore:
+    """The in-memory policy corpus, built from `documents` and POLICY_DIR on first use."""
+    store = PolicyStore(
+        documents,
+        base_dir=str(Path(__file__).parent.absolute()),
+        policy_dir=os.getenv("POLICY_DIR"),
+    )
+    if LUGGAGE_ANSWER_CACHE_ENABLED:
+        cache = get_luggage_answer_cache()
+        # Answers from policies edited while the server was down are dropped now,
+        # later edits as soon as the store reloads the file
+        cache.retain_versions(store.versions())
+        store.add_change_listener(cache.invalidate_airline)
+    return store
+
+@lru_cache(maxsize=None)
+def get_retriever() -> HybridRetriever:
+    return HybridRetriever(get_policy_store(), chunker=split_document, embed=get_embeddings)
+
+async def search_policy(airline: str, query: str) -> str:
+    policy = get_policy_store().get(airline)
+    if policy is None:
         return f"I apologize, but I don't have any policy information available for {airline}."
 
-    try:
-        with open(absolute_path, 'r', encoding='utf-8') as file:
-            policy_text = file.read()
-    except FileNotFoundError:
-        return f"I apologize, but I couldn't find the policy document for {airline}."
-
-    query_keywords = query.lower().split()
-
-    # Searching for the most relevant section
-    sections = policy_text.split("\n\n")
-    relevant_sections = []
+    cache_key = None
+    if LUGGAGE_ANSWER_CACHE_ENABLED:
+        cache_key = answer_key(airline, query, policy.sha256)
+        cached = await asyncio.to_thread(get_luggage_answer_cache().get, cache_key)
+        if cached is not None:
+            return cached
 
-    for section in sections:
-        if any(keyword in section.lower() for keyword in query_keywords):
-            relevant_sections.append(section)
+    # Retrieval stage: BM25 and embedding search fused per LUGGAGE_RETRIEVAL_MODE
+    with stage_timer("policy_retrieval"):
+        sections = await get_retriever().retrieve(airline, query, k=3)
 
-    if relevant_sections:
-        relevant_text = "\n\n".join(relevant_sections[:3])
-        return generate_llm_response(airline, query, relevant_text)
+    if sections:
+        relevant_text = "\n\n".join(sections)
+        return await generate_llm_response(airline, query, relevant_text, cache_key)
     else:
-        return generate_llm_response(
+        return await generate_llm_response(
             airline,
             query,
-            "No specific information found in the policy document."
+            "No specific information found in the policy document.",
+            cache_key,
         )
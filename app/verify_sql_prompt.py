@@ -1,4 +1,4 @@
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 
 # Define luggage-related keywords for reference in the prompt
 LUGGAGE_KEYWORDS = [
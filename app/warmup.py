@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from config import (
+    FLIGHT_LLM_MODEL,
+    FLIGHT_LLM_PLATFORM,
+    LUGGAGE_LLM_MODEL,
+    LUGGAGE_LLM_PLATFORM,
+    get_flight_llm,
+    get_luggage_llm,
+)
+from hybrid_retriever import LUGGAGE_RETRIEVAL_MODE
+from vector_db import EMBEDDING_MODEL, get_embeddings
+
+# Send every configured model a one-token request at startup; /ready waits for it
+LLM_WARMUP = os.getenv("LLM_WARMUP", "true").lower() == "true"
+# Loading a large local model can take minutes; give up on the warm-up after this
+LLM_WARMUP_TIMEOUT_SECONDS = float(os.getenv("LLM_WARMUP_TIMEOUT_SECONDS", "180"))
+
+WARMUP_PROMPT = "Reply with OK."
+
+
+def _one_token(platform: str) -> Dict:
+    # ChatOllama passes unknown keyword arguments to the ollama SDK, which takes options instead
+    return {"options": {"num_predict": 1}} if platform == "OLLAMA" else {"max_tokens": 1}
+
+
+def _targets() -> List[Tuple[str, Callable[[], Awaitable]]]:
+    targets = [(
+        f"{FLIGHT_LLM_PLATFORM}:{FLIGHT_LLM_MODEL}",
+        lambda: get_flight_llm().ainvoke(WARMUP_PROMPT, **_one_token(FLIGHT_LLM_PLATFORM)),
+    )]
+    if (LUGGAGE_LLM_PLATFORM, LUGGAGE_LLM_MODEL) != (FLIGHT_LLM_PLATFORM, FLIGHT_LLM_MODEL):
+        targets.append((
+            f"{LUGGAGE_LLM_PLATFORM}:{LUGGAGE_LLM_MODEL}",
+            lambda: get_luggage_llm().ainvoke(WARMUP_PROMPT, **_one_token(LUGGAGE_LLM_PLATFORM)),
+        ))
+    if LUGGAGE_RETRIEVAL_MODE != "bm25":
+        targets.append((f"embedding:{EMBEDDING_MODEL}", lambda: get_embeddings([WARMUP_PROMPT])))
+    return targets
+
+
+async def _warm(call: Callable[[], Awaitable]) -> str:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(call(), LLM_WARMUP_TIMEOUT_SECONDS)
+    except Exception as exc:
+        return f"failed after {time.perf_counter() - start:.1f}s: {exc!r}"
+    return f"ok in {time.perf_counter() - start:.1f}s"
+
+
+async def warm_up_models() -> Dict[str, str]:
+    """
+    Send a one-token completion to each configured chat model, and one
+    embedding if luggage retrieval uses them, all at once. The model server
+    loads the models and the shared HTTP pool opens its connections before
+    the first question. Returns a status per model; failures are reported,
+    not raised, so a model server that is down does not block the app.
+    """
+    targets = _targets()
+    statuses = await asyncio.gather(*(_warm(call) for _, call in targets))
+    return {name: status for (name, _), status in zip(targets, statuses)}
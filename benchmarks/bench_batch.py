@@ -0,0 +1,114 @@
+"""
+POST /batch against one /stream request per question, with the stub LLM server.
+
+Starts the stub LLM server and main.app like bench_stream_load.py, then
+answers --questions questions twice: one /stream request after another (how
+evaluation jobs ran before), and as a single /batch request. Questions are
+made distinct by numbering them, so the batch cannot dedupe them, but
+questions about the same route still share their SQL. Pass --repeat to send
+the raw question list with its repeats instead.
+
+    python benchmarks/bench_batch.py --questions 48 --llm-concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench_common import DATA_DIR, use_temp_database, write_results
+from bench_stream_load import QUESTIONS, ServerThread, free_port, run_load
+from stub_llm_server import StubConfig, build_app
+
+
+async def run_batch_request(base_url: str, questions):
+    start = time.perf_counter()
+    first_result = None
+    results, stats = [], None
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        async with client.stream("POST", "/batch", json={"questions": questions}) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                if item["type"] == "stats":
+                    stats = item
+                    continue
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+                results.append(item)
+    return time.perf_counter() - start, first_result, results, stats
+
+
+def main(args):
+    stub_port, app_port = free_port(), free_port()
+    stub = ServerThread(build_app(StubConfig(
+        first_token_ms=args.first_token_ms,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    )), stub_port)
+    stub.start()
+    stub.wait_started()
+
+    if args.repeat:
+        questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    else:
+        questions = [f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})" for i in range(args.questions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        os.environ.update({
+            "DEFAULT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "FLIGHT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LUGGAGE_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LMSTUDIO_OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+            "LUGGAGE_CACHE_DB_PATH": str(Path(tmp) / "luggage_cache.db"),
+            "ENABLE_ONLINE_FLIGHT_SYNC": "false",
+            "BATCH_LLM_CONCURRENCY": str(args.llm_concurrency),
+        })
+        from database import json_to_sqlite
+
+        json_to_sqlite(str(DATA_DIR / "flight_data.json"), db_path)
+        import main as app_main
+
+        server = ServerThread(app_main.app, app_port)
+        server.start()
+        server.wait_started()
+        base_url = f"http://127.0.0.1:{app_port}"
+        try:
+            asyncio.run(run_load(base_url, 1, 2))
+            serial = asyncio.run(run_load(base_url, 1, len(questions)))
+            batch_seconds, first_result, results, stats = asyncio.run(run_batch_request(base_url, questions))
+        finally:
+            server.stop()
+            stub.stop()
+
+    results = {
+        "questions": len(questions),
+        "llm_concurrency": args.llm_concurrency,
+        "first_token_ms": args.first_token_ms,
+        "serial_stream_s": round(serial["elapsed"], 2),
+        "serial_questions_per_s": round(len(questions) / serial["elapsed"], 2),
+        "batch_s": round(batch_seconds, 2),
+        "batch_questions_per_s": round(len(questions) / batch_seconds, 2),
+        "batch_first_result_s": round(first_result, 2) if first_result else None,
+        "batch_errors": sum(1 for item in results if item["error"]),
+        "batch_stats": stats,
+    }
+    print(json.dumps(results, indent=2))
+    write_results("batch", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=48)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--repeat", action="store_true", help="send repeated questions unnumbered")
+    parser.add_argument("--first-token-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    main(parser.parse_args())
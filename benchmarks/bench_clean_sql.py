@@ -0,0 +1,101 @@
+"""
+Speed and correctness of `clean_sql_query` against the previous regex pipeline.
+
+Runs both normalizers over the LLM outputs in benchmarks/data/llm_sql_outputs.json,
+reports µs/query, and counts how many cleaned queries actually execute against
+a database seeded from data/flight_data.json.
+
+    python benchmarks/bench_clean_sql.py --repeat 500
+"""
+import argparse
+import json
+import re
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import BENCH_DIR, DATA_DIR, use_temp_database, write_results
+
+CORPUS_PATH = BENCH_DIR / "data" / "llm_sql_outputs.json"
+
+
+def legacy_clean_sql_query(query: str) -> str:
+    """The multi-pass re.sub pipeline clean_sql_query used before the tokenizer."""
+    if not isinstance(query, str):
+        return ""
+    query = re.sub(r'<\|END_RESPONSE\|>', '', query)
+    query = re.sub(r'<\|.*?\|>', '', query)
+    query = re.sub(r'```sql\s*', '', query)
+    query = re.sub(r'```.*', '', query)
+    query = query.replace('`', '')
+    query = re.sub(r'--.*$', '', query, flags=re.MULTILINE)
+    query = re.sub(r'/\*.*?\*/', '', query, flags=re.DOTALL)
+    query = re.sub(r'\s+', ' ', query)
+    query = re.sub(r',(?!\s)', ', ', query)
+    query = re.sub(r'\s+,', ',', query).strip()
+    query = re.sub(r'"([^"]*)"', r"'\1'", query)
+    query = re.sub(r"''", "'", query)
+    keywords = ['SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'ORDER BY',
+                'GROUP BY', 'LIMIT', 'JOIN', 'LEFT JOIN', 'RIGHT JOIN',
+                'INNER JOIN', 'HAVING', 'UPDATE', 'DELETE', 'INSERT INTO']
+    pattern = r'\b(' + '|'.join(re.escape(word) for word in keywords) + r')\b'
+    return re.sub(pattern, lambda m: m.group(0).upper(), query, flags=re.IGNORECASE)
+
+
+def executes(conn: sqlite3.Connection, query: str) -> bool:
+    try:
+        conn.execute(query).fetchall()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def evaluate(clean, corpus, conn, repeat: int):
+    cleaned = [clean(output) for output in corpus]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for output in corpus:
+            clean(output)
+    elapsed = time.perf_counter() - start
+    return {
+        "queries": len(corpus),
+        "executable": sum(executes(conn, query) for query in cleaned),
+        "us_per_query": round(elapsed / (repeat * len(corpus)) * 1e6, 2),
+    }, cleaned
+
+
+def main(repeat: int):
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        from clean_sql_query import clean_sql_query, sql_cache_key
+        from database import json_to_sqlite
+
+        json_to_sqlite(str(DATA_DIR / "flight_data.json"), db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            tokenizer_stats, _ = evaluate(clean_sql_query, corpus, conn, repeat)
+            legacy_stats, _ = evaluate(legacy_clean_sql_query, corpus, conn, repeat)
+        finally:
+            conn.close()
+
+    results = {
+        "repeat": repeat,
+        "tokenizer": tokenizer_stats,
+        "legacy_regex": legacy_stats,
+        "distinct_cache_keys": len({sql_cache_key(output) for output in corpus}),
+    }
+    for name in ("tokenizer", "legacy_regex"):
+        print(f"{name:>12}: {results[name]}")
+    print(f"distinct cache keys: {results['distinct_cache_keys']} of {len(corpus)} outputs")
+    write_results("clean_sql", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    main(args.repeat)
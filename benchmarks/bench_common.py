@@ -0,0 +1,99 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+APP_DIR = REPO_ROOT / "app"
+DATA_DIR = REPO_ROOT / "data"
+RESULTS_DIR = BENCH_DIR / "results"
+
+# The application modules import each other by bare name (they are run from app/).
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+
+def use_temp_database(path: Path) -> str:
+    """Point the app at a throwaway SQLite file. Must run before importing `config`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    os.environ["FLIGHTS_DB_PATH"] = str(path)
+    return str(path)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def write_results(name: str, results: Dict[str, Any]) -> Path:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = RESULTS_DIR / f"{name}.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out_path}")
+    return out_path
+
+
+# City pairs of the synthetic flights table; each is generated in both directions
+SYNTHETIC_CITY_PAIRS = [
+    ("New Delhi", "Hanoi"), ("Mumbai", "Ho Chi Minh City"), ("Kolkata", "Hanoi"),
+    ("Ahmedabad", "Da Nang"), ("Bangalore", "Ho Chi Minh City"), ("New Delhi", "Ho Chi Minh City"),
+    ("Mumbai", "Hanoi"), ("Kolkata", "Ho Chi Minh City"), ("Ahmedabad", "Hanoi"), ("Bangalore", "Hanoi"),
+]
+SYNTHETIC_START = date(2026, 1, 1)
+SYNTHETIC_DAYS = 365
+
+
+def build_synthetic_flights(db_path: str, rows: int, routes: int, seed: int) -> float:
+    """
+    Fill a fresh database with `rows` random flights over the first `routes`
+    SYNTHETIC_CITY_PAIRS and 365 days, bypassing upsert_flights for speed.
+    Returns the seconds spent inserting.
+    """
+    from database import departure_day, ensure_schema
+
+    ensure_schema(db_path)
+    rng = random.Random(seed)
+    directions = [
+        pair for origin, destination in SYNTHETIC_CITY_PAIRS[:routes] for pair in ((origin, destination), (destination, origin))
+    ]
+    airlines = ["Vietjet", "Vietnam Airlines", "IndiGo", "Air India"]
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    def generate():
+        for index in range(rows):
+            origin, destination = directions[index % len(directions)]
+            day = SYNTHETIC_START + timedelta(days=rng.randrange(SYNTHETIC_DAYS))
+            minutes = rng.randint(180, 720)
+            yield (
+                uuid.UUID(int=rng.getrandbits(128)).hex, rng.choice(airlines), day.isoformat(),
+                f"{minutes // 60}h {minutes % 60}m", "Nonstop", rng.randint(6000, 60000),
+                origin, destination, "", round(rng.uniform(0, 100), 2), rng.randint(0, 1),
+                minutes, departure_day(day.isoformat()),
+            )
+
+    conn.executemany(
+        'INSERT INTO flights (uuid, airline, date, duration, "flightType", price, origin, destination, link, '
+        '"rainProbability", "freeMeal", "durationMinutes", "departureDay") VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)',
+        generate(),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return time.perf_counter() - start
@@ -0,0 +1,122 @@
+"""
+LLM work done for /stream clients that disconnect, against the stub LLM server.
+
+Starts the stub LLM server and main.app like bench_stream_load.py and answers
+--warmup questions in full, which also gives the app its averages for the
+saved-work estimates. Then --clients clients each open /stream, read up to
+the first answer event (or the first SQL event with --after sql) and close
+the connection. The stub counts the response tokens it actually streamed
+and the streams closed early; the app's cancellation metrics are read from
+/metrics.
+
+    python benchmarks/bench_disconnect.py --clients 8 --answer-tokens 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench_common import DATA_DIR, use_temp_database, write_results
+from bench_stream_load import QUESTIONS, ServerThread, free_port, run_load
+from stub_llm_server import StubConfig, build_app
+
+METRIC_PREFIXES = (
+    "flight_query_cancelled_total",
+    "flight_query_cancelled_seconds_saved_total",
+    "llm_tokens_saved_total",
+    'flight_query_requests_total{outcome="cancelled"}',
+)
+
+
+async def abandon(base_url: str, question: str, after: str) -> float:
+    """Read /stream up to the first `after` event, then hang up; returns seconds until then."""
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async with client.stream("GET", "/stream", params={"question": question}) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data:") and json.loads(line[len("data:"):])["type"] == after:
+                    break
+    return time.perf_counter() - start
+
+
+async def run_abandoned(base_url: str, clients: int, after: str):
+    return await asyncio.gather(*(abandon(base_url, QUESTIONS[i % len(QUESTIONS)], after) for i in range(clients)))
+
+
+def main(args):
+    stub_port, app_port = free_port(), free_port()
+    stub_app = build_app(StubConfig(
+        first_token_ms=args.first_token_ms,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    ))
+    stub = ServerThread(stub_app, stub_port)
+    stub.start()
+    stub.wait_started()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        os.environ.update({
+            "DEFAULT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "FLIGHT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LUGGAGE_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LMSTUDIO_OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+            "LUGGAGE_CACHE_DB_PATH": str(Path(tmp) / "luggage_cache.db"),
+            "ENABLE_ONLINE_FLIGHT_SYNC": "false",
+        })
+        from database import json_to_sqlite
+
+        json_to_sqlite(str(DATA_DIR / "flight_data.json"), db_path)
+        import main as app_main
+
+        server = ServerThread(app_main.app, app_port)
+        server.start()
+        server.wait_started()
+        base_url = f"http://127.0.0.1:{app_port}"
+        try:
+            tokens_before = stub_app.state.tokens_streamed
+            asyncio.run(run_load(base_url, 1, args.warmup))
+            full_tokens = (stub_app.state.tokens_streamed - tokens_before) / args.warmup
+
+            tokens_before = stub_app.state.tokens_streamed
+            cancelled_before = stub_app.state.streams_cancelled
+            abandoned_after = asyncio.run(run_abandoned(base_url, args.clients, args.after))
+            # Give the app time to notice the disconnects and the stub to stop streaming
+            time.sleep(args.settle_seconds)
+            abandoned_tokens = (stub_app.state.tokens_streamed - tokens_before) / args.clients
+            streams_cancelled = stub_app.state.streams_cancelled - cancelled_before
+            metrics = httpx.get(f"{base_url}/metrics").text
+        finally:
+            server.stop()
+            stub.stop()
+
+    results = {
+        "clients": args.clients,
+        "hang_up_after": args.after,
+        "answer_tokens": args.answer_tokens,
+        "tokens_per_second": args.tokens_per_second,
+        "stub_tokens_per_full_request": round(full_tokens, 1),
+        "stub_tokens_per_abandoned_request": round(abandoned_tokens, 1),
+        "stub_streams_closed_early": streams_cancelled,
+        "mean_seconds_to_hang_up": round(sum(abandoned_after) / len(abandoned_after), 2),
+        "app_metrics": [line for line in metrics.splitlines() if line.startswith(METRIC_PREFIXES)],
+    }
+    print(json.dumps(results, indent=2))
+    write_results("disconnect", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--after", choices=["answer", "sql"], default="answer", help="event to hang up after")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--first-token-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--answer-tokens", type=int, default=400)
+    parser.add_argument("--settle-seconds", type=float, default=1.0)
+    main(parser.parse_args())
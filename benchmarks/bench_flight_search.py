@@ -0,0 +1,105 @@
+"""
+Deep pagination of /flights/search on a synthetic flights table.
+
+Builds --rows flights, then reads pages of one route at increasing depths
+two ways: `search_flights` with keyset cursors (walking the route page by
+page) and the same SELECT with LIMIT/OFFSET. It also times the endpoint
+in-process, for a full response and for a 304 answered from the ETag.
+
+    python benchmarks/bench_flight_search.py --rows 1000000 --page-size 50
+"""
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import SYNTHETIC_CITY_PAIRS, build_synthetic_flights, percentile, use_temp_database, write_results
+
+
+def offset_page(db_path: str, origin: str, destination: str, limit: int, offset: int):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT uuid, airline, date, duration, flightType, price, origin, destination, link, "
+            "rainProbability, freeMeal FROM flights WHERE price IS NOT NULL AND origin=? AND destination=? "
+            "ORDER BY price, uuid LIMIT ? OFFSET ?",
+            (origin, destination, limit, offset),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        build_seconds = build_synthetic_flights(db_path, args.rows, args.routes, args.seed)
+        print(f"Built {args.rows} flights in {build_seconds:.1f}s")
+
+        from fastapi.testclient import TestClient
+
+        import main as app_main
+        from flight_search import search_flights
+        from models import FlightSearchRequest
+
+        origin, destination = SYNTHETIC_CITY_PAIRS[0]
+        depths = sorted(set(args.depths))
+        keyset_ms, offset_ms = {}, {}
+        request = FlightSearchRequest(origin=origin, destination=destination, limit=args.page_size)
+        page_number = 0
+        while page_number <= depths[-1]:
+            start = time.perf_counter()
+            page = search_flights(request, db_path)
+            elapsed = time.perf_counter() - start
+            if page_number in depths:
+                keyset_ms[page_number] = round(elapsed * 1000, 2)
+                start = time.perf_counter()
+                rows = offset_page(db_path, origin, destination, args.page_size, page_number * args.page_size)
+                offset_ms[page_number] = round((time.perf_counter() - start) * 1000, 2)
+                assert [row[0] for row in rows] == [flight["uuid"] for flight in page["flights"]]
+            if not page["next_cursor"]:
+                break
+            request = request.model_copy(update={"cursor": page["next_cursor"]})
+            page_number += 1
+
+        body = {"origin": origin, "destination": destination, "limit": args.page_size}
+        full, not_modified = [], []
+        with TestClient(app_main.app) as client:
+            etag = client.post("/flights/search", json=body).headers["etag"]
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                client.post("/flights/search", json=body)
+                full.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                assert client.post("/flights/search", json=body, headers={"If-None-Match": etag}).status_code == 304
+                not_modified.append(time.perf_counter() - start)
+
+    results = {
+        "rows": args.rows,
+        "page_size": args.page_size,
+        "pages_walked": page_number,
+        "keyset_page_ms": keyset_ms,
+        "offset_page_ms": offset_ms,
+        "endpoint_ms": {
+            "p50": round(percentile(full, 50) * 1000, 2),
+            "p99": round(percentile(full, 99) * 1000, 2),
+        },
+        "endpoint_304_ms": {
+            "p50": round(percentile(not_modified, 50) * 1000, 2),
+            "p99": round(percentile(not_modified, 99) * 1000, 2),
+        },
+    }
+    print(json.dumps(results, indent=2))
+    write_results("flight_search", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--routes", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10, 100, 1000])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,95 @@
+"""
+Import-time profile of the FastAPI app (`python -X importtime -c "import main"`).
+
+Each run uses a fresh interpreter. Reports the cumulative import time of
+`main`, the slowest modules, and which optional provider SDKs were loaded
+during import (they should only load when a provider is first used).
+
+    python benchmarks/bench_import_time.py --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Tuple
+
+from bench_common import APP_DIR, write_results
+
+# Packages that should not be imported just by importing the app
+LAZY_PACKAGES = [
+    "langchain_ollama",
+    "langchain_groq",
+    "langchain_openai",
+    "langchain_community",
+    "openai",
+    "tiktoken",
+]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) rows with indentation removed."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_once(db_path: str) -> Dict[str, int]:
+    env = dict(os.environ, FLIGHTS_DB_PATH=db_path)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {name: cumulative for name, _, cumulative in parse_importtime(proc.stderr)}
+
+
+def main(runs: int, top: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "flights.db")
+        profiles = [profile_once(db_path) for _ in range(runs)]
+
+    # Top-level package cost: the largest cumulative time recorded for any of its modules
+    packages: Dict[str, List[int]] = {}
+    for profile in profiles:
+        per_package: Dict[str, int] = {}
+        for name, cumulative in profile.items():
+            package = name.split(".")[0]
+            per_package[package] = max(per_package.get(package, 0), cumulative)
+        for package, cumulative in per_package.items():
+            packages.setdefault(package, []).append(cumulative)
+
+    slowest = sorted(
+        ((package, median(times)) for package, times in packages.items() if package != "main"),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+
+    results = {
+        "runs": runs,
+        "main_import_ms": round(median(p["main"] for p in profiles) / 1000, 1),
+        "slowest_packages_ms": {package: round(us / 1000, 1) for package, us in slowest},
+        "lazy_packages_loaded": [p for p in LAZY_PACKAGES if p in profiles[-1]],
+    }
+    print(f"import main: {results['main_import_ms']} ms (median of {runs})")
+    for package, ms in results["slowest_packages_ms"].items():
+        print(f"  {package:<30} {ms:>8} ms")
+    print(f"provider SDKs loaded at import: {results['lazy_packages_loaded'] or 'none'}")
+    write_results("import_time", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.top)
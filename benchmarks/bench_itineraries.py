@@ -0,0 +1,111 @@
+"""
+Connecting-itinerary search over a synthetic flights graph.
+
+Generates --rows flights between --cities cities over 365 days. A few hub
+cities connect to everything and the other cities get a handful of random
+routes, so most city pairs need one or two connections. The script builds
+an `ItineraryIndex` from the rows, then times `search` for --queries random
+city pairs, optimising price and duration.
+
+    python benchmarks/bench_itineraries.py --rows 500000 --cities 60 --queries 200
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+from bench_common import percentile, write_results
+
+from database import departure_day
+from itineraries import ItineraryIndex
+
+START = date(2026, 1, 1)
+DAYS = 365
+AIRLINES = ["Vietjet", "Vietnam Airlines", "IndiGo", "Air India", "Wizz Air"]
+
+
+def make_routes(cities: int, hubs: int, spokes: int, rng: random.Random):
+    names = [f"City {index:03d}" for index in range(cities)]
+    routes = set()
+    for hub in names[:hubs]:
+        for city in names:
+            if city != hub:
+                routes.update({(hub, city), (city, hub)})
+    for city in names[hubs:]:
+        for other in rng.sample(names[hubs:], min(spokes, cities - hubs)):
+            if other != city:
+                routes.update({(city, other), (other, city)})
+    return names, sorted(routes)
+
+
+def make_rows(routes, rows: int, rng: random.Random):
+    generated = []
+    for index in range(rows):
+        origin, destination = routes[index % len(routes)]
+        day = (START + timedelta(days=rng.randrange(DAYS))).isoformat()
+        minutes = rng.randint(60, 780)
+        generated.append((
+            departure_day(day), minutes,
+            uuid.UUID(int=rng.getrandbits(128)).hex, rng.choice(AIRLINES), day,
+            f"{minutes // 60}h {minutes % 60}m", "Nonstop", rng.randint(3000, 90000),
+            origin, destination, "", 10.0, 0,
+        ))
+    return generated
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    cities, routes = make_routes(args.cities, args.hubs, args.spokes, rng)
+    rows = make_rows(routes, args.rows, rng)
+
+    start = time.perf_counter()
+    index = ItineraryIndex(rows)
+    build_seconds = time.perf_counter() - start
+    # Only the index stays alive in the app; the rows would skew GC pauses
+    del rows
+    print(f"Indexed {index.flights} flights on {len(routes)} routes in {build_seconds * 1000:.0f} ms")
+
+    results = {
+        "rows": args.rows,
+        "cities": args.cities,
+        "routes": len(routes),
+        "k": args.k,
+        "index_build_ms": round(build_seconds * 1000, 1),
+    }
+    pairs = [tuple(rng.sample(cities[args.hubs:], 2)) for _ in range(args.queries)]
+    for optimize in ("price", "duration"):
+        samples, found, legs = [], 0, []
+        for origin, destination in pairs:
+            window_start = START + timedelta(days=rng.randrange(DAYS - 30))
+            begin = time.perf_counter()
+            itineraries = index.search(
+                origin, destination, window_start, window_start + timedelta(days=args.window_days),
+                optimize, args.k,
+            )
+            samples.append(time.perf_counter() - begin)
+            found += bool(itineraries)
+            legs.extend(len(itinerary.legs) for itinerary in itineraries)
+        results[optimize] = {
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            "max_ms": round(max(samples) * 1000, 2),
+            "queries_with_results": found,
+            "mean_legs": round(sum(legs) / len(legs), 2) if legs else 0,
+        }
+    print(json.dumps(results, indent=2))
+    write_results("itineraries", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--cities", type=int, default=60)
+    parser.add_argument("--hubs", type=int, default=3)
+    parser.add_argument("--spokes", type=int, default=2, help="random routes per non-hub city")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--window-days", type=int, default=7, help="first-leg departure window")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,143 @@
+"""
+Throughput of the policy chunker `vector_db.split_document`.
+
+Builds a corpus of airline policies by repeating data/indigo_policy.txt and
+data/vietjet_policy.txt under different airline names, then chunks it with
+the current section-aware chunker and with the previous sentence splitter
+(reproduced below as `legacy_split_document`, which looked the encoder up on
+every call and encoded sentence by sentence). Reports policies/s, chunk
+counts, empty chunks and chunks over the token budget.
+
+    python benchmarks/bench_policy_chunker.py --policies 300 --max-tokens 500
+"""
+import argparse
+import re
+import time
+from typing import List
+
+from bench_common import DATA_DIR, write_results
+
+SOURCE_POLICIES = {
+    "IndiGo": DATA_DIR / "indigo_policy.txt",
+    "VietJet Air": DATA_DIR / "vietjet_policy.txt",
+}
+
+
+class RegexEncoder:
+    """Word/punctuation stand-in for tiktoken when its encoding files cannot be downloaded."""
+
+    _pattern = re.compile(r"\w+|[^\w\s]")
+
+    def encode(self, text: str) -> List[str]:
+        return self._pattern.findall(text)
+
+    encode_ordinary = encode
+
+    def encode_ordinary_batch(self, texts: List[str]) -> List[List[str]]:
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens: List[str]) -> str:
+        return " ".join(tokens)
+
+
+def load_encoder():
+    import vector_db
+
+    try:
+        encoder = vector_db.get_encoder()
+        encoder.encode_ordinary("warm up")
+        return encoder, encoder.name
+    except Exception:
+        # Offline: point the chunker at the stand-in so both sides use the same tokenizer
+        encoder = RegexEncoder()
+        vector_db.get_encoder = lambda: encoder
+        return encoder, "regex"
+
+
+def legacy_split_document(text: str, resolve_encoder, max_tokens: int = 500) -> List[str]:
+    """The '. ' splitter split_document used before the section-aware chunker."""
+    # The old code resolved the encoding on every call
+    encoder = resolve_encoder()
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    for sentence in text.replace('\n', ' ').split('. '):
+        sentence = sentence.strip() + '. '
+        sentence_tokens = len(encoder.encode(sentence))
+        if current_size + sentence_tokens > max_tokens:
+            chunks.append(''.join(current_chunk))
+            current_chunk = [sentence]
+            current_size = sentence_tokens
+        else:
+            current_chunk.append(sentence)
+            current_size += sentence_tokens
+    if current_chunk:
+        chunks.append(''.join(current_chunk))
+    return chunks
+
+
+def build_corpus(policies: int) -> List[str]:
+    sources = [(name, path.read_text(encoding="utf-8")) for name, path in SOURCE_POLICIES.items()]
+    corpus = []
+    for i in range(policies):
+        name, text = sources[i % len(sources)]
+        corpus.append(text.replace(name, f"{name} {i}"))
+    return corpus
+
+
+def evaluate(split, corpus: List[str], encoder, max_tokens: int, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunked = [split(text) for text in corpus]
+    elapsed = (time.perf_counter() - start) / repeat
+
+    chunks = [chunk for doc_chunks in chunked for chunk in doc_chunks]
+    sizes = [len(tokens) for tokens in encoder.encode_ordinary_batch(chunks)]
+    return {
+        "policies": len(corpus),
+        "policies_per_s": round(len(corpus) / elapsed, 1),
+        "mb_per_s": round(sum(len(text.encode("utf-8")) for text in corpus) / elapsed / 1e6, 3),
+        "chunks": len(chunks),
+        "empty_chunks": sum(not chunk.strip() for chunk in chunks),
+        "chunks_over_budget": sum(size > max_tokens for size in sizes),
+        "mean_chunk_tokens": round(sum(sizes) / max(len(sizes), 1), 1),
+    }
+
+
+def main(policies: int, max_tokens: int, overlap: int, repeat: int):
+    encoder, encoding_name = load_encoder()
+    if encoding_name == "regex":
+        resolve_encoder = lambda: encoder
+    else:
+        import tiktoken
+
+        resolve_encoder = lambda: tiktoken.encoding_for_model("text-embedding-ada-002")
+    from vector_db import split_document
+
+    corpus = build_corpus(policies)
+    results = {
+        "encoding": encoding_name,
+        "max_tokens": max_tokens,
+        "overlap_tokens": overlap,
+        "repeat": repeat,
+        "section_aware": evaluate(
+            lambda text: split_document(text, max_tokens, overlap), corpus, encoder, max_tokens, repeat
+        ),
+        "legacy": evaluate(
+            lambda text: legacy_split_document(text, resolve_encoder, max_tokens), corpus, encoder, max_tokens, repeat
+        ),
+    }
+    print(f"encoding: {encoding_name}, {policies} policies, max_tokens={max_tokens}")
+    for name in ("section_aware", "legacy"):
+        print(f"{name:>14}: {results[name]}")
+    write_results("policy_chunker", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", type=int, default=300)
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.policies, args.max_tokens, args.overlap, args.repeat)
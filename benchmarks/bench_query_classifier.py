@@ -0,0 +1,105 @@
+"""
+Accuracy and per-query latency of the flight/luggage query classifiers.
+
+Compares `query_validator.classify_query` (precompiled bigram index, phrase
+matching, single pass) with the previous difflib implementation, reproduced
+below as `legacy_classify`, over the labelled corpus in
+benchmarks/data/labeled_queries.json.
+
+    python benchmarks/bench_query_classifier.py --repeat 200
+"""
+import argparse
+import json
+import time
+from difflib import get_close_matches
+
+from bench_common import BENCH_DIR, write_results
+
+CORPUS_PATH = BENCH_DIR / "data" / "labeled_queries.json"
+
+
+def legacy_classify(query: str):
+    """The per-call difflib scan query_validator used before the precompiled index."""
+    flight_keywords = {
+        'flight', 'air', 'airline', 'airport', 'airways',
+        'travel', 'trip', 'journey',
+        'destination', 'dest',
+        'origin', 'route', 'path', 'connection',
+        'price', 'fare', 'cost', 'expensive', 'cheap', 'grandTotal'
+        'direct', 'nonstop', 'connecting',
+        'departure', 'arrive', 'arriving', 'departing',
+        'domestic', 'international'
+    }
+    location_indicators = {'from', 'to', 'between', 'via'}
+    luggage_keywords = {
+        'luggage', 'baggage', 'bag', 'suitcase', 'carry-on',
+        'carry on', 'check-in', 'checked bag', 'hand baggage',
+        'weight', 'kg', 'kilos', 'pounds', 'lbs',
+        'dimensions', 'size', 'allowance', 'restriction',
+        'prohibited', 'forbidden', 'allowed', 'limit',
+        'overweight', 'excess', 'cabin', 'hold', 'storage',
+        'pack', 'bring', 'carry', 'transport', 'stow'
+    }
+
+    words = query.lower().strip().split()
+    is_flight = any(
+        word in location_indicators or get_close_matches(word, flight_keywords, n=1, cutoff=0.75)
+        for word in words
+    ) or any(char in query.lower() for char in ['₹', '$', '€', 'Ft'])
+    is_luggage = any(get_close_matches(word, luggage_keywords, n=1, cutoff=0.75) for word in words)
+    return is_flight, is_luggage
+
+
+def evaluate(classify, corpus, repeat: int):
+    correct_flight = correct_luggage = correct_both = 0
+    for item in corpus:
+        is_flight, is_luggage = classify(item["query"])
+        correct_flight += is_flight == item["flight"]
+        correct_luggage += is_luggage == item["luggage"]
+        correct_both += (is_flight, is_luggage) == (item["flight"], item["luggage"])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in corpus:
+            classify(item["query"])
+    elapsed = time.perf_counter() - start
+
+    n = len(corpus)
+    return {
+        "queries": n,
+        "flight_accuracy": round(correct_flight / n, 4),
+        "luggage_accuracy": round(correct_luggage / n, 4),
+        "joint_accuracy": round(correct_both / n, 4),
+        "us_per_query": round(elapsed / (repeat * n) * 1e6, 2),
+    }
+
+
+def main(repeat: int):
+    from query_validator import _term_labels, classify_query
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    # Cold = first pass through the corpus, before the per-term cache is warm
+    _term_labels.cache_clear()
+    start = time.perf_counter()
+    for item in corpus:
+        classify_query(item["query"])
+    cold_us = (time.perf_counter() - start) / len(corpus) * 1e6
+
+    results = {
+        "repeat": repeat,
+        "indexed": evaluate(classify_query, corpus, repeat),
+        "legacy_difflib": evaluate(legacy_classify, corpus, repeat),
+    }
+    results["indexed"]["cold_us_per_query"] = round(cold_us, 2)
+    for name in ("indexed", "legacy_difflib"):
+        print(f"{name:>15}: {results[name]}")
+    write_results("query_classifier", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
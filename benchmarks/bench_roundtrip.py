@@ -0,0 +1,112 @@
+"""
+Round-trip pairing on a synthetic flights table (default one million rows).
+
+Builds a throwaway SQLite file with --rows flights spread over --routes city
+pairs (both directions) and 365 days, then times `find_round_trips`:
+loading both legs through the route/date index, plus the heap-based top-k.
+On a --baseline-days outbound window it also times the SQL self-join
+(`JOIN ... ORDER BY o.price + r.price LIMIT k`) and checks both return the
+same totals.
+
+    python benchmarks/bench_roundtrip.py --rows 1000000 --routes 5 --baseline-days 14
+"""
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from bench_common import (
+    SYNTHETIC_CITY_PAIRS,
+    SYNTHETIC_START,
+    build_synthetic_flights,
+    percentile,
+    use_temp_database,
+    write_results,
+)
+
+from roundtrip import RoundTripRequest, find_round_trips
+
+def self_join(db_path: str, request: RoundTripRequest, k: int):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            """
+            SELECT o.price + r.price AS total
+            FROM flights o
+            JOIN flights r
+              ON r.origin = o.destination AND r.destination = o.origin
+             AND r."departureDay" BETWEEN o."departureDay" + ? AND o."departureDay" + ?
+            WHERE o.origin = ? AND o.destination = ? AND o.date BETWEEN ? AND ?
+            ORDER BY total LIMIT ?
+            """,
+            (request.min_stay_days, request.max_stay_days, request.origin, request.destination,
+             request.date_from.isoformat(), request.date_to.isoformat(), k),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def timed(fn, repeat: int):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        build_seconds = build_synthetic_flights(db_path, args.rows, args.routes, args.seed)
+        print(f"Built {args.rows} flights in {build_seconds:.1f}s")
+
+        full_year = []
+        for origin, destination in SYNTHETIC_CITY_PAIRS[:args.routes]:
+            request = RoundTripRequest(origin, destination, args.min_stay, args.max_stay)
+            trips, samples = timed(lambda: find_round_trips(request, db_path, args.k), args.repeat)
+            full_year.extend(samples)
+            print(f"{origin} -> {destination}: cheapest {trips[0].total_price} in {min(samples) * 1000:.1f} ms")
+
+        origin, destination = SYNTHETIC_CITY_PAIRS[0]
+        window = RoundTripRequest(
+            origin, destination, args.min_stay, args.max_stay,
+            SYNTHETIC_START + timedelta(days=60), SYNTHETIC_START + timedelta(days=60 + args.baseline_days - 1),
+        )
+        heap_trips, heap_samples = timed(lambda: find_round_trips(window, db_path, args.k), args.repeat)
+        join_rows, join_samples = timed(lambda: self_join(db_path, window, args.k), 1)
+        matches = [trip.total_price for trip in heap_trips] == [row[0] for row in join_rows]
+
+    results = {
+        "rows": args.rows,
+        "routes": args.routes,
+        "stay_days": [args.min_stay, args.max_stay],
+        "k": args.k,
+        "build_s": round(build_seconds, 1),
+        "full_year_ms": {
+            "p50": round(percentile(full_year, 50) * 1000, 1),
+            "max": round(max(full_year) * 1000, 1),
+        },
+        "baseline_window_days": args.baseline_days,
+        "window_heap_ms": round(min(heap_samples) * 1000, 1),
+        "window_self_join_ms": round(min(join_samples) * 1000, 1),
+        "same_totals_as_self_join": matches,
+    }
+    print(json.dumps(results, indent=2))
+    write_results("roundtrip", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--routes", type=int, default=5, help="city pairs, each in both directions (max 10)")
+    parser.add_argument("--min-stay", type=int, default=3)
+    parser.add_argument("--max-stay", type=int, default=14)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--baseline-days", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,151 @@
+"""
+Reader latency while a sync writes, in place vs through a snapshot generation.
+
+Builds a synthetic flights table of --rows rows, then upserts --sync-rows new
+flights twice while a reader thread runs a route query in a loop: once with
+`upsert_flights` on the live file (the default sync) and once into a
+snapshot built by `build_snapshot` and swapped in by `publish_snapshot`
+(FLIGHT_SYNC_SNAPSHOT=true). Each read pins the generation like a request
+does. Pass --wal to measure with the journal mode used by multiple workers.
+
+    python benchmarks/bench_snapshot_sync.py --rows 500000 --sync-rows 100000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from bench_common import (
+    SYNTHETIC_CITY_PAIRS,
+    SYNTHETIC_DAYS,
+    SYNTHETIC_START,
+    build_synthetic_flights,
+    percentile,
+    use_temp_database,
+    write_results,
+)
+
+READ_SQL = "SELECT MIN(price), COUNT(*) FROM flights WHERE origin=? AND destination=? AND date BETWEEN ? AND ?"
+
+
+def make_sync_rows(count: int, routes: int, seed: int):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        origin, destination = SYNTHETIC_CITY_PAIRS[index % routes]
+        minutes = rng.randint(180, 720)
+        rows.append({
+            "uuid": uuid.UUID(int=rng.getrandbits(128)).hex,
+            "airline": "Vietjet",
+            "date": (SYNTHETIC_START + timedelta(days=rng.randrange(SYNTHETIC_DAYS))).isoformat(),
+            "duration": f"{minutes // 60}h {minutes % 60}m",
+            "flightType": "Nonstop",
+            "price": rng.randint(6000, 60000),
+            "origin": origin,
+            "destination": destination,
+            "link": "",
+            "rainProbability": 10.0,
+            "freeMeal": 0,
+        })
+    return rows
+
+
+class Reader(threading.Thread):
+    def __init__(self, db_path: str):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.samples = []
+        self.errors = 0
+        self.generations = set()
+        self.running = True
+
+    def run(self):
+        from paths import pinned_generation
+
+        origin, destination = SYNTHETIC_CITY_PAIRS[0]
+        while self.running:
+            start = time.perf_counter()
+            try:
+                with pinned_generation(self.db_path) as generation:
+                    conn = sqlite3.connect(generation, timeout=60)
+                    try:
+                        conn.execute(READ_SQL, (origin, destination, "2026-03-01", "2026-03-14")).fetchone()
+                    finally:
+                        conn.close()
+                self.generations.add(generation)
+            except sqlite3.Error:
+                self.errors += 1
+            self.samples.append(time.perf_counter() - start)
+
+
+def measure(db_path: str, rows, sync) -> dict:
+    reader = Reader(db_path)
+    reader.start()
+    time.sleep(0.5)
+    baseline = len(reader.samples)
+    start = time.perf_counter()
+    sync(rows)
+    sync_seconds = time.perf_counter() - start
+    during = reader.samples[baseline:]
+    # Long enough for the reader to move on to the published generation
+    time.sleep(0.5)
+    reader.running = False
+    reader.join()
+    return {
+        "sync_s": round(sync_seconds, 2),
+        "reads": len(during),
+        "reads_per_s": round(len(during) / sync_seconds, 1),
+        "read_p50_ms": round(percentile(during, 50) * 1000, 2),
+        "read_p99_ms": round(percentile(during, 99) * 1000, 2),
+        "read_max_ms": round(max(during) * 1000, 2),
+        "reads_over_100ms": sum(1 for sample in during if sample > 0.1),
+        "read_errors": reader.errors,
+        "generations_read": len(reader.generations),
+    }
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        build_seconds = build_synthetic_flights(db_path, args.rows, args.routes, args.seed)
+        print(f"Built {args.rows} flights in {build_seconds:.1f}s")
+        if args.wal:
+            conn = sqlite3.connect(db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.close()
+
+        from database import upsert_flights
+        from snapshots import build_snapshot, publish_snapshot
+
+        def in_place(rows):
+            upsert_flights(rows, db_path)
+
+        def snapshot(rows):
+            target = build_snapshot(db_path)
+            upsert_flights(rows, target)
+            publish_snapshot(db_path, target)
+
+        results = {"rows": args.rows, "sync_rows": args.sync_rows, "wal": args.wal}
+        results["in_place"] = measure(db_path, make_sync_rows(args.sync_rows, args.routes, args.seed), in_place)
+        print("in place", results["in_place"])
+        results["snapshot"] = measure(db_path, make_sync_rows(args.sync_rows, args.routes, args.seed + 1), snapshot)
+        print("snapshot", results["snapshot"])
+
+    print(json.dumps(results, indent=2))
+    write_results("snapshot_sync", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--sync-rows", type=int, default=100_000)
+    parser.add_argument("--routes", type=int, default=5)
+    parser.add_argument("--wal", action="store_true", help="put the database in WAL mode first")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
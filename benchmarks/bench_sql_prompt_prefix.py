@@ -0,0 +1,137 @@
+"""
+Measure prompt tokens a local LLM server has to process per SQL-generation request.
+
+Local servers (llama.cpp, LM Studio, Ollama) keep the KV cache of the previous
+prompt and only evaluate the tokens after the longest common prefix. This
+benchmark drives `LoggingSQLChain` against a stub LLM that emulates such a
+single-slot prefix cache, and compares the current prompt layout (static
+content first, question last) with the previous layout (question near the top).
+
+    python benchmarks/bench_sql_prompt_prefix.py
+"""
+import argparse
+import asyncio
+import re
+import tempfile
+from pathlib import Path
+from typing import List
+
+from bench_common import DATA_DIR, use_temp_database, write_results
+
+QUESTIONS = [
+    "What is the cheapest flight from New Delhi to Hanoi?",
+    "Find the lowest price flight from Mumbai to Ho Chi Minh City",
+    "Show me all direct flights from New Delhi to Ho Chi Minh City",
+    "List connecting flights from Hanoi to Mumbai",
+    "Find flights from Mumbai to Hanoi with a free meal",
+    "Show flights from Kolkata to Hanoi with low chance of rain",
+    "Compare prices of flights from New Delhi to all Vietnamese cities",
+    "What's the average price of flights from New Delhi to Vietnamese cities?",
+]
+
+# SQL generation is retried when verification fails; retries resend the same prompt.
+ATTEMPTS_PER_QUESTION = [1, 1, 2, 1, 3]
+
+CANNED_SQL = "SELECT * FROM flights WHERE origin = 'New Delhi' AND destination = 'Hanoi' ORDER BY price ASC LIMIT 10"
+
+
+class RegexTokenizer:
+    """Rough word/punctuation tokenizer used when tiktoken's encoding files are unavailable offline."""
+
+    _pattern = re.compile(r"\w+|[^\w\s]|\s+")
+
+    def encode(self, text: str) -> List[str]:
+        return self._pattern.findall(text)
+
+
+def load_tokenizer():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base"), "cl100k_base"
+    except Exception:
+        return RegexTokenizer(), "regex"
+
+
+class PrefixCachingStubLLM:
+    """Stand-in for a local server with a single-slot KV cache."""
+
+    def __init__(self, encoding, layout):
+        self.encoding = encoding
+        self.layout = layout
+        self.cached_tokens: List = []
+        self.prompt_tokens: List[int] = []
+        self.processed_tokens: List[int] = []
+
+    async def ainvoke(self, prompt, stop=None):
+        from langchain_core.messages import AIMessage
+
+        tokens = self.encoding.encode(self.layout(str(prompt)))
+        reused = 0
+        for cached, new in zip(self.cached_tokens, tokens):
+            if cached != new:
+                break
+            reused += 1
+
+        self.prompt_tokens.append(len(tokens))
+        self.processed_tokens.append(len(tokens) - reused)
+        self.cached_tokens = tokens
+        return AIMessage(content=CANNED_SQL)
+
+
+def current_layout(prompt: str) -> str:
+    return prompt
+
+
+def question_first_layout(prompt: str) -> str:
+    """Move the trailing question up under the first instruction line, as the old template did."""
+    static, question = prompt.rsplit("\nUser Input: ", 1)
+    question = question.rsplit("\nSQLQuery:", 1)[0]
+    header, rest = static.lstrip("\n").split("\n", 1)
+    return f"\n{header}\n\nUser Input: {question}\n{rest}"
+
+
+async def run_layout(layout, encoding):
+    from generate_and_verify_sql import LoggingSQLChain
+
+    stub = PrefixCachingStubLLM(encoding, layout)
+    chain = LoggingSQLChain(stub)
+    for i, question in enumerate(QUESTIONS):
+        for _ in range(ATTEMPTS_PER_QUESTION[i % len(ATTEMPTS_PER_QUESTION)]):
+            await chain.ainvoke({"question": question})
+
+    requests = len(stub.prompt_tokens)
+    total_prompt = sum(stub.prompt_tokens)
+    total_processed = sum(stub.processed_tokens)
+    return {
+        "requests": requests,
+        "prompt_tokens_per_request": round(total_prompt / requests, 1),
+        "processed_tokens_per_request": round(total_processed / requests, 1),
+        "kv_cache_reuse_ratio": round(1 - total_processed / total_prompt, 4),
+    }
+
+
+async def main(rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        from database import json_to_sqlite
+
+        json_to_sqlite(str(DATA_DIR / "flight_data.json"), db_path)
+
+        encoding, tokenizer_name = load_tokenizer()
+        results = {"rounds": rounds, "tokenizer": tokenizer_name}
+        for name, layout in (("question_last", current_layout), ("question_first", question_first_layout)):
+            stats = None
+            for _ in range(rounds):
+                stats = await run_layout(layout, encoding)
+            results[name] = stats
+            print(f"{name:>15}: {stats}")
+
+    write_results("sql_prompt_prefix", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds))
@@ -0,0 +1,223 @@
+"""
+End-to-end load test of the /stream endpoint against the stub LLM server.
+
+Starts benchmarks/stub_llm_server.py and main.app under uvicorn (each in its
+own thread and event loop), seeds a throwaway database from
+data/flight_data.json, then opens --concurrency SSE clients that send
+--requests questions in total. Reports requests/sec, p50/p95/p99 end-to-end
+latency, time to first answer event, and the app event loop's scheduling lag
+while under load.
+
+    python benchmarks/bench_stream_load.py --concurrency 16 --requests 64 --first-token-ms 150
+
+The client runs in the same process as the servers, so absolute numbers
+include some GIL contention; compare runs made with the same settings.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+
+from bench_common import DATA_DIR, percentile, use_temp_database, write_results
+from stub_llm_server import StubConfig, build_app
+
+QUESTIONS = [
+    "What are the cheapest flights from New Delhi to Hanoi?",
+    "Show me flights from Mumbai to Ho Chi Minh City",
+    "Cheapest flight from Kolkata to Hanoi with a free meal",
+    "Flights from Ahmedabad to Hanoi and the baggage allowance",
+    "Direct flights from Bangalore to Ho Chi Minh City",
+    "Flights from Hanoi to New Delhi and can I bring a 10kg cabin bag?",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread(threading.Thread):
+    """uvicorn in a background thread; optionally samples the loop's scheduling lag."""
+
+    def __init__(self, app, port: int, lag_interval: Optional[float] = None):
+        super().__init__(daemon=True)
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.lag_interval = lag_interval
+        self.lag_samples: List[float] = []
+
+    async def _monitor_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.lag_samples.append(max(loop.time() - start - self.lag_interval, 0.0))
+
+    async def _serve(self):
+        monitor = asyncio.create_task(self._monitor_lag()) if self.lag_interval else None
+        try:
+            await self.server.serve()
+        finally:
+            if monitor:
+                monitor.cancel()
+
+    def run(self):
+        asyncio.run(self._serve())
+
+    def wait_started(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("server did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join(timeout=10)
+
+
+async def one_request(client: httpx.AsyncClient, question: str) -> Dict:
+    start = time.perf_counter()
+    first_answer = None
+    events = errors = 0
+    async with client.stream("GET", "/stream", params={"question": question}) as response:
+        status = response.status_code
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):].strip())
+            events += 1
+            if event.get("type") == "answer" and first_answer is None:
+                first_answer = time.perf_counter() - start
+            elif event.get("type") == "error":
+                errors += 1
+    return {
+        "status": status,
+        "latency": time.perf_counter() - start,
+        "ttft": first_answer,
+        "events": events,
+        "errors": errors,
+    }
+
+
+async def run_load(base_url: str, concurrency: int, requests: int) -> Dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(QUESTIONS[i % len(QUESTIONS)])
+    results: List[Dict] = []
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            try:
+                question = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results.append(await one_request(client, question))
+            except httpx.HTTPError as exc:
+                results.append({"status": 0, "latency": None, "ttft": None, "events": 0, "errors": 1, "exc": str(exc)})
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "results": results}
+
+
+def summarize(elapsed: float, results: List[Dict], lag_samples: List[float]) -> Dict:
+    ok = [r for r in results if r["status"] == 200 and not r["errors"]]
+    latencies = [r["latency"] for r in ok]
+    ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+
+    def ms(values, pct):
+        return round(percentile(values, pct) * 1000, 1)
+
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {f"p{p}": ms(latencies, p) for p in (50, 95, 99)},
+        "ttft_ms": {f"p{p}": ms(ttfts, p) for p in (50, 95, 99)},
+        "event_loop_lag_ms": {
+            "p50": ms(lag_samples, 50),
+            "p99": ms(lag_samples, 99),
+            "max": round(max(lag_samples, default=0.0) * 1000, 1),
+        },
+    }
+
+
+def main(args):
+    stub_port, app_port = free_port(), free_port()
+    stub = ServerThread(build_app(StubConfig(
+        first_token_ms=args.first_token_ms,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    )), stub_port)
+    stub.start()
+    stub.wait_started()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = use_temp_database(Path(tmp) / "flights.db")
+        os.environ.update({
+            "DEFAULT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "FLIGHT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LUGGAGE_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LMSTUDIO_OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+            "LUGGAGE_CACHE_DB_PATH": str(Path(tmp) / "luggage_cache.db"),
+            "ENABLE_ONLINE_FLIGHT_SYNC": "false",
+            "ENABLE_INTENT_EXTRACTION": "true" if args.intent else "false",
+        })
+        from database import json_to_sqlite
+
+        json_to_sqlite(str(DATA_DIR / "flight_data.json"), db_path)
+        import main as app_main
+
+        server = ServerThread(app_main.app, app_port, lag_interval=0.01)
+        server.start()
+        server.wait_started()
+        base_url = f"http://127.0.0.1:{app_port}"
+        try:
+            # Warm-up requests load the LLM clients, schema snapshot and policy index
+            asyncio.run(run_load(base_url, 1, args.warmup))
+            server.lag_samples.clear()
+            load = asyncio.run(run_load(base_url, args.concurrency, args.requests))
+            lag_samples = list(server.lag_samples)
+        finally:
+            server.stop()
+            stub.stop()
+
+    results = {
+        "concurrency": args.concurrency,
+        "first_token_ms": args.first_token_ms,
+        "tokens_per_second": args.tokens_per_second,
+        "answer_tokens": args.answer_tokens,
+        "intent_extraction": args.intent,
+        **summarize(load["elapsed"], load["results"], lag_samples),
+        "stub_llm_requests": stub.server.config.app.state.requests,
+    }
+    print(json.dumps(results, indent=2))
+    write_results(args.name, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--first-token-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--intent", action="store_true", help="run with ENABLE_INTENT_EXTRACTION=true")
+    parser.add_argument("--name", default="stream_load", help="results file name under benchmarks/results/")
+    main(parser.parse_args())
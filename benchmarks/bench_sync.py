@@ -0,0 +1,132 @@
+"""
+End-to-end cost of `sync_online_flights` with the offline fake provider.
+
+For each --routes count, syncs that many routes x --days departure days into
+a fresh SQLite file twice: the first run inserts every row, the second
+re-fetches the same (deterministic) offers and updates them. Reports rows/s
+and the split between fetching (offer generation + `offer_to_row`),
+`_coerce_flight` and `upsert_flights`, plus peak RSS.
+
+    python benchmarks/bench_sync.py --routes 10 100 1000 --days 365
+    python benchmarks/bench_sync.py --routes 10 --latency-ms 20 --error-rate 0.02
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bench_common import use_temp_database, write_results
+
+import database
+import sync_flights
+from providers.amadeus import IATA_TO_CITY
+from providers.fake import FakeFlightProvider
+
+
+class TimedProvider(FakeFlightProvider):
+    """FakeFlightProvider that accumulates the time spent in fetch_flights."""
+
+    fetch_seconds = 0.0
+
+    def fetch_flights(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().fetch_flights(*args, **kwargs)
+        finally:
+            self.fetch_seconds += time.perf_counter() - start
+
+
+def make_routes(count: int) -> List[Tuple[str, str]]:
+    # One name per airport code; aliases such as Delhi/New Delhi would duplicate routes
+    cities = sorted(city for city, _country in IATA_TO_CITY.values())
+    index = 0
+    while len(cities) * (len(cities) - 1) < count:
+        index += 1
+        cities.append(f"Testcity {index:03d}")
+    pairs = [(a, b) for a in cities for b in cities if a != b]
+    return pairs[:count]
+
+
+def run_sync(db_path: str, routes, args) -> Dict:
+    provider = TimedProvider(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed)
+    timings = {"upsert": 0.0, "rows": 0}
+    original_upsert = sync_flights.upsert_flights
+
+    def timed_upsert(rows, sqlite_file):
+        timings["rows"] = len(rows)
+        # Coercion also runs inside upsert_flights; time it on its own for the split
+        start = time.perf_counter()
+        for row in rows:
+            database._coerce_flight(row)
+        timings["coerce"] = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            return original_upsert(rows, sqlite_file)
+        finally:
+            timings["upsert"] = time.perf_counter() - start
+
+    sync_flights.upsert_flights = timed_upsert
+    try:
+        start = time.perf_counter()
+        stats = sync_flights.sync_online_flights(db_path, providers=[provider], routes=routes)
+        total = time.perf_counter() - start
+    finally:
+        sync_flights.upsert_flights = original_upsert
+
+    return {
+        "rows": timings["rows"],
+        "inserted": stats["inserted"],
+        "updated": stats["updated"],
+        "failed_requests": stats["failed_requests"],
+        "total_s": round(total, 3),
+        "fetch_s": round(provider.fetch_seconds, 3),
+        "coerce_s": round(timings["coerce"], 3),
+        "upsert_s": round(timings["upsert"], 3),
+        "rows_per_s": round(timings["rows"] / total, 1) if total else 0.0,
+    }
+
+
+def main(args):
+    os.environ["FLIGHT_SYNC_MIN_UPDATE_GAP_MINUTES"] = "0"
+    os.environ["FLIGHT_SYNC_DAYS_AHEAD"] = str(args.days - 1)
+    os.environ["FLIGHT_SYNC_MAX_PER_DAY"] = str(args.max_per_day)
+
+    results = {
+        "days": args.days,
+        "max_per_day": args.max_per_day,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "runs": [],
+    }
+    for route_count in args.routes:
+        routes = make_routes(route_count)
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = use_temp_database(Path(tmp) / "flights.db")
+            first = run_sync(db_path, routes, args)
+            second = run_sync(db_path, routes, args)
+        run = {
+            "routes": route_count,
+            "first_sync": first,
+            "second_sync": second,
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        print(json.dumps(run, indent=2))
+        results["runs"].append(run)
+
+    write_results(args.name, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--max-per-day", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name", default="sync", help="results file name under benchmarks/results/")
+    main(parser.parse_args())
@@ -0,0 +1,118 @@
+"""
+First-question latency with and without the startup model warm-up.
+
+Runs the stub LLM server with --model-load-ms of load time on the first
+request per model, like LM Studio loading models on demand. The app then
+starts twice, as a uvicorn subprocess on a fresh database and a fresh stub:
+once with LLM_WARMUP=false and once with LLM_WARMUP=true. Each run waits
+for /ready, then asks --questions questions one after another and reports
+the time to ready, time to first answer token per question, and the TCP
+connections the stub saw.
+
+    python benchmarks/bench_warmup.py --model-load-ms 3000 --questions 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench_common import APP_DIR, DATA_DIR, REPO_ROOT, write_results
+from bench_stream_load import QUESTIONS, ServerThread, free_port, one_request
+from stub_llm_server import StubConfig, build_app
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 300.0) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError("app exited during startup")
+        try:
+            if httpx.get(f"{base_url}/ready").status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError("app did not become ready")
+
+
+async def ask(base_url: str, questions):
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        return [await one_request(client, question) for question in questions]
+
+
+def run(args, warmup: bool) -> dict:
+    stub_port, app_port = free_port(), free_port()
+    stub_app = build_app(StubConfig(
+        first_token_ms=args.first_token_ms,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+        model_load_ms=args.model_load_ms,
+    ))
+    stub = ServerThread(stub_app, stub_port)
+    stub.start()
+    stub.wait_started()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(APP_DIR),
+            "FLIGHTS_DB_PATH": str(Path(tmp) / "flights.db"),
+            "LUGGAGE_CACHE_DB_PATH": str(Path(tmp) / "luggage_cache.db"),
+            "DEFAULT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "FLIGHT_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LUGGAGE_LLM_PLATFORM": "LMSTUDIO_OPENAI",
+            "LMSTUDIO_OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+            "ENABLE_ONLINE_FLIGHT_SYNC": "false",
+            "LLM_WARMUP": "true" if warmup else "false",
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{app_port}"
+        try:
+            ready_seconds = wait_ready(base_url, process)
+            warmup_status = httpx.get(f"{base_url}/ready").json().get("warmup")
+            results = asyncio.run(ask(base_url, [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            stub.stop()
+
+    return {
+        "ready_s": round(ready_seconds, 2),
+        "warmup": warmup_status,
+        "ttft_s": [round(result["ttft"], 2) if result["ttft"] else None for result in results],
+        "latency_s": [round(result["latency"], 2) for result in results],
+        "stub_requests": stub_app.state.requests,
+        "stub_connections": len(stub_app.state.connections),
+    }
+
+
+def main(args):
+    assert (DATA_DIR / "flight_data.json").exists()
+    results = {
+        "model_load_ms": args.model_load_ms,
+        "questions": args.questions,
+        "cold": run(args, warmup=False),
+        "warm": run(args, warmup=True),
+    }
+    print(json.dumps(results, indent=2))
+    write_results("warmup", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-load-ms", type=float, default=3000.0)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--first-token-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    main(parser.parse_args())
@@ -0,0 +1,115 @@
+"""
+Offline evaluation of luggage-policy retrieval (`hybrid_retriever.HybridRetriever`).
+
+Runs the labelled questions in benchmarks/data/luggage_questions.json against
+the IndiGo and VietJet policies in each retrieval mode (bm25, dense, hybrid)
+and reports recall@k (a question counts as a hit when its expected answer text
+appears in one of the top k chunks) and p50/p99 retrieval latency.
+
+Embeddings come from a deterministic feature-hashing embedder so the harness
+runs without an embedding server; --embed-latency-ms simulates a server round
+trip and --live-embeddings uses the configured EMBEDDING_MODEL instead.
+
+    python benchmarks/eval_luggage_retrieval.py --k 1 3 5 --embed-latency-ms 15
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import zlib
+from typing import Dict, List
+
+from bench_common import BENCH_DIR, percentile, write_results
+from bench_policy_chunker import load_encoder
+
+QUESTIONS_PATH = BENCH_DIR / "data" / "luggage_questions.json"
+MODES = ("bm25", "dense", "hybrid")
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).lower()
+
+
+class HashingEmbedder:
+    """Bag of words and character trigrams hashed into a fixed-size vector."""
+
+    def __init__(self, dimensions: int = 512, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        features = words + [f"#{w[i:i + 3]}" for w in words for i in range(max(len(w) - 2, 1))]
+        for feature in features:
+            vector[zlib.crc32(feature.encode("utf-8")) % self.dimensions] += 1.0
+        return vector
+
+    async def __call__(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return [self.vector(text) for text in texts]
+
+
+async def evaluate(retriever, questions: List[Dict], ks: List[int]):
+    # Build chunk sets and chunk embeddings before timing
+    for airline in {q["airline"] for q in questions}:
+        await retriever.retrieve(airline, "baggage", max(ks))
+
+    hits = {k: 0 for k in ks}
+    latencies_ms = []
+    for q in questions:
+        start = time.perf_counter()
+        chunks = await retriever.retrieve(q["airline"], q["question"], max(ks))
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        answer = normalize_text(q["answer"])
+        ranked = [answer in normalize_text(chunk) for chunk in chunks or []]
+        for k in ks:
+            hits[k] += any(ranked[:k])
+
+    n = len(questions)
+    return {
+        **{f"recall@{k}": round(hits[k] / n, 4) for k in ks},
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+    }
+
+
+async def run(ks: List[int], embed_latency_ms: float, live_embeddings: bool, chunk_tokens: int, overlap: int):
+    _, encoding_name = load_encoder()
+    from hybrid_retriever import HybridRetriever
+    from vector_db import get_embeddings, get_policy_store, split_document
+
+    with open(QUESTIONS_PATH, encoding="utf-8") as f:
+        questions = json.load(f)
+
+    embed = get_embeddings if live_embeddings else HashingEmbedder(latency_ms=embed_latency_ms)
+    results = {
+        "questions": len(questions),
+        "encoding": encoding_name,
+        "embeddings": "live" if live_embeddings else "hashing",
+        "embed_latency_ms": 0 if live_embeddings else embed_latency_ms,
+        "chunk_tokens": chunk_tokens,
+        "overlap_tokens": overlap,
+    }
+    print(f"{len(questions)} questions, encoding={encoding_name}, embeddings={results['embeddings']}")
+    for mode in MODES:
+        retriever = HybridRetriever(
+            get_policy_store(), chunker=split_document, embed=embed,
+            mode=mode, chunk_tokens=chunk_tokens, overlap_tokens=overlap,
+        )
+        results[mode] = await evaluate(retriever, questions, ks)
+        print(f"{mode:>7}: {results[mode]}")
+    write_results("luggage_retrieval", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--live-embeddings", action="store_true")
+    parser.add_argument("--chunk-tokens", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.k), args.embed_latency_ms, args.live_embeddings, args.chunk_tokens, args.overlap))
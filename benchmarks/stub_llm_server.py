@@ -0,0 +1,271 @@
+"""
+OpenAI-compatible stub LLM server for offline benchmarks.
+
+Serves /v1/chat/completions (streaming and non-streaming) and /v1/embeddings
+with scripted latency: every reply waits --first-token-ms before its first
+token and then emits tokens at --tokens-per-second. The first request for
+each model also waits --model-load-ms, like a server that loads models on
+demand. Replies are canned and chosen by recognising the app's prompts:
+
+- SQL generation   -> a SELECT for the cities named in the question
+- SQL verification -> VALID
+- intent / luggage -> small JSON / extracted question / policy answer
+- anything else    -> an answer of --answer-tokens tokens
+
+    python benchmarks/stub_llm_server.py --port 1234 --first-token-ms 200 --tokens-per-second 60
+
+Point the app at it with LMSTUDIO_OPENAI_BASE_URL=http://127.0.0.1:1234/v1.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import re
+import struct
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CITIES = {
+    "new delhi": "New Delhi", "delhi": "New Delhi", "mumbai": "Mumbai", "bangalore": "Bangalore",
+    "kolkata": "Kolkata", "ahmedabad": "Ahmedabad", "hanoi": "Hanoi",
+    "ho chi minh city": "Ho Chi Minh City", "da nang": "Da Nang",
+}
+_CITY_PATTERN = re.compile("|".join(sorted(map(re.escape, CITIES), key=len, reverse=True)), re.IGNORECASE)
+_SQL_QUESTION = re.compile(r"User Input: (.*)\nSQLQuery:", re.DOTALL)
+_LUGGAGE_WORDS = re.compile(r"luggage|baggage|bag|suitcase|carry", re.IGNORECASE)
+
+FLIGHT_COLUMNS = "uuid, airline, date, duration, flightType, price, origin, destination, link, rainProbability, freeMeal"
+
+
+@dataclass
+class StubConfig:
+    first_token_ms: float = 200.0
+    tokens_per_second: float = 60.0
+    answer_tokens: int = 120
+    embedding_dimensions: int = 256
+    embedding_latency_ms: float = 10.0
+    model_load_ms: float = 0.0
+
+
+def _cities(question: str) -> List[str]:
+    found = []
+    for match in _CITY_PATTERN.finditer(question):
+        city = CITIES[match.group().lower()]
+        if city not in found:
+            found.append(city)
+    return found
+
+
+def canned_sql(question: str) -> str:
+    cities = _cities(question)
+    conditions = []
+    if cities:
+        conditions.append(f"origin = '{cities[0]}'")
+    if len(cities) > 1:
+        conditions.append(f"destination = '{cities[1]}'")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {FLIGHT_COLUMNS} FROM flights{where} ORDER BY price ASC LIMIT 10;"
+
+
+def canned_intent(question: str) -> str:
+    cities = _cities(question)
+    luggage = "what is the baggage allowance" if _LUGGAGE_WORDS.search(question) else None
+    return json.dumps({
+        "origin": cities[0] if cities else None,
+        "destination": cities[1] if len(cities) > 1 else None,
+        "date_from": None, "date_to": None, "sort": "price_asc", "limit": None,
+        "filters": {}, "luggage_question": luggage,
+    })
+
+
+def canned_answer(tokens: int) -> str:
+    words = []
+    for i in range(tokens):
+        words.append("flight" if i % 12 else "Option")
+        if i % 12 == 11:
+            words[-1] += "."
+    return " ".join(words) + "."
+
+
+def reply_for(prompt: str, config: StubConfig) -> str:
+    if "SQLQuery:" in prompt:
+        match = _SQL_QUESTION.search(prompt)
+        return canned_sql(match.group(1) if match else "")
+    if "verify if the query correctly answers" in prompt:
+        return "VALID"
+    if "Read a flight search question" in prompt:
+        # The prompt's worked example also has a "Question:" line; the real one is last
+        return canned_intent(prompt.rsplit("Question:", 1)[-1])
+    if "Extract the specific luggage-related question" in prompt:
+        question = prompt.rsplit("Now process this query:", 1)[-1]
+        return "what is the baggage allowance" if _LUGGAGE_WORDS.search(question) else "NONE"
+    if "official policy" in prompt:
+        return "One cabin bag up to 7 kg is allowed per passenger."
+    return canned_answer(config.answer_tokens)
+
+
+def _tokens(text: str) -> List[str]:
+    # Whitespace-preserving word pieces, roughly one per model token
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content or "")
+    return "\n".join(parts)
+
+
+def _usage(prompt: str, completion_tokens: int) -> dict:
+    prompt_tokens = max(len(prompt) // 4, 1)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _embedding(text: str, dimensions: int) -> List[float]:
+    vector = [0.0] * dimensions
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        vector[zlib.crc32(word.encode("utf-8")) % dimensions] += 1.0
+    return vector
+
+
+def build_app(config: Optional[StubConfig] = None) -> FastAPI:
+    config = config or StubConfig()
+    app = FastAPI(title="Stub LLM server")
+    app.state.requests = 0
+    # Streamed tokens actually sent, and streams the client closed before the end
+    app.state.tokens_streamed = 0
+    app.state.streams_cancelled = 0
+    # Client (host, port) pairs seen, i.e. TCP connections opened to the stub
+    app.state.connections = set()
+    model_loads = {}
+
+    async def load_model(model: str) -> None:
+        # Requests for a model that is still loading wait for the same load
+        if model not in model_loads:
+            model_loads[model] = asyncio.ensure_future(asyncio.sleep(config.model_load_ms / 1000))
+        await model_loads[model]
+
+    @app.middleware("http")
+    async def count_connections(request: Request, call_next):
+        if request.client:
+            app.state.connections.add((request.client.host, request.client.port))
+        return await call_next(request)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        prompt = _prompt_text(body)
+        tokens = _tokens(reply_for(prompt, config))
+        max_tokens = body.get("max_completion_tokens") or body.get("max_tokens")
+        if max_tokens:
+            tokens = tokens[:max_tokens]
+        model = body.get("model", "stub")
+        await load_model(model)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.first_token_ms / 1000 + token_delay * len(tokens))
+            return JSONResponse({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(prompt, len(tokens)),
+            })
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def stream():
+            def chunk(delta: dict, finish_reason=None) -> str:
+                payload = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            finished = False
+            try:
+                await asyncio.sleep(config.first_token_ms / 1000)
+                yield chunk({"role": "assistant", "content": ""})
+                for token in tokens:
+                    yield chunk({"content": token})
+                    app.state.tokens_streamed += 1
+                    if token_delay:
+                        await asyncio.sleep(token_delay)
+                finished = True
+            finally:
+                if not finished:
+                    app.state.streams_cancelled += 1
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                usage_chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": [], "usage": _usage(prompt, len(tokens)),
+                }
+                yield f"data: {json.dumps(usage_chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await load_model(body.get("model", "stub"))
+        await asyncio.sleep(config.embedding_latency_ms / 1000)
+        data = []
+        for index, text in enumerate(inputs):
+            vector = _embedding(str(text), config.embedding_dimensions)
+            if body.get("encoding_format") == "base64":
+                # The openai client asks for packed float32 when numpy is installed
+                embedding = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+            else:
+                embedding = vector
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(len(str(text)) // 4 for text in inputs)
+        return {
+            "object": "list", "data": data, "model": body.get("model", "stub"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--model-load-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    stub_config = StubConfig(
+        args.first_token_ms, args.tokens_per_second, args.answer_tokens, model_load_ms=args.model_load_ms
+    )
+    uvicorn.run(build_app(stub_config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from clean_sql_query import clean_sql_query
+from database import Base
+from schema_names import SCHEMA_TABLES
+
+
+def test_schema_names_match_the_models():
+    assert SCHEMA_TABLES == {
+        table.name: tuple(column.name for column in table.columns) for table in Base.metadata.tables.values()
+    }
+
+
+def test_double_quoted_identifiers_are_kept_and_literals_requoted():
+    sql = 'SELECT "durationMinutes" FROM flights WHERE airline = "IndiGo"'
+
+    assert clean_sql_query(sql) == "SELECT \"durationMinutes\" FROM flights WHERE airline = 'IndiGo'"
+
+
+def test_cleaner_does_not_import_sqlalchemy():
+    # Run in a fresh interpreter so modules other tests imported do not count
+    app_dir = Path(__file__).resolve().parent.parent / "app"
+    code = "import sys, clean_sql_query; print('sqlalchemy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=app_dir, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,129 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from database import MIGRATIONS, Base, canonical_flight_key, migrate_database, upsert_flights
+
+
+def _flight(uuid, **fields):
+    row = {
+        "uuid": uuid,
+        "airline": "Vietnam Airlines",
+        "date": "2025-07-21",
+        "duration": "4h 15m",
+        "flightType": "Nonstop",
+        "price": 120000,
+        "origin": "New Delhi",
+        "destination": "Hanoi",
+    }
+    row.update(fields)
+    return row
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT uuid, source, "departureTime" FROM flights ORDER BY uuid').fetchall()
+    finally:
+        conn.close()
+
+
+def test_static_and_provider_rows_for_the_same_flight_collapse(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    upsert_flights([_flight("2f1c1e1a-0000-4000-8000-000000000001")], db_path, source="static")
+
+    stats = upsert_flights(
+        [_flight("a" * 32, departureTime="10:30", price=121000)], db_path, source="amadeus"
+    )
+
+    assert stats["inserted"] == 0
+    assert stats["updated"] == 1
+    # The preferred source refreshes the stored row and keeps its uuid
+    assert _rows(db_path) == [("2f1c1e1a-0000-4000-8000-000000000001", "amadeus", "10:30")]
+
+
+def test_lower_precedence_source_is_deduplicated_against_stored_row(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    upsert_flights([_flight("a" * 32, departureTime="10:30")], db_path, source="amadeus")
+
+    stats = upsert_flights([_flight("2f1c1e1a-0000-4000-8000-000000000001")], db_path, source="static")
+
+    assert stats["deduplicated"] == 1
+    assert _rows(db_path) == [("a" * 32, "amadeus", "10:30")]
+
+
+def test_provider_rows_with_different_departure_times_stay_apart(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    upsert_flights([_flight("a" * 32, departureTime="10:30")], db_path, source="amadeus")
+
+    stats = upsert_flights([_flight("b" * 32, departureTime="18:05")], db_path, source="fake")
+
+    assert stats["inserted"] == 1
+    assert len(_rows(db_path)) == 2
+
+
+def test_same_source_rows_sharing_a_key_are_all_kept(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    stats = upsert_flights(
+        [_flight("a" * 32, departureTime="10:30"), _flight("b" * 32, departureTime="10:30")],
+        db_path,
+        source="amadeus",
+    )
+
+    assert stats == {"inserted": 2, "updated": 0, "deduplicated": 0, "price_changes": 2}
+
+
+def test_migrate_database_from_baseline_schema(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    conn = sqlite3.connect(db_path)
+    # The flights table as the first release created it
+    conn.execute(
+        "CREATE TABLE flights (uuid VARCHAR PRIMARY KEY, airline VARCHAR, date VARCHAR, duration VARCHAR, "
+        '"flightType" VARCHAR, price INTEGER, origin VARCHAR, destination VARCHAR, "originCountry" VARCHAR, '
+        '"destinationCountry" VARCHAR, link VARCHAR, "rainProbability" REAL, "freeMeal" INTEGER)'
+    )
+    rows = [
+        ("2f1c1e1a-0000-4000-8000-000000000001", "Vietnam Airlines", "2025-07-21", "4h 15m", 120000),
+        ("2f1c1e1a-0000-4000-8000-000000000002", "Vietnam Airlines", "2025-07-21", "4h 15m", 120500),
+        ("a" * 32, "Vietnam Airlines", "2025-07-21", "4h 15m", 120000),
+        ("2f1c1e1a-0000-4000-8000-000000000003", "IndiGo", "2025-07-22", "PT6H", 90000),
+    ]
+    conn.executemany(
+        'INSERT INTO flights (uuid, airline, date, duration, "flightType", price, origin, destination) '
+        "VALUES (?, ?, ?, ?, 'Nonstop', ?, 'New Delhi', 'Hanoi')",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    # The new tables come from create_all, as in ensure_schema
+    Base.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+
+    assert migrate_database(db_path) == len(MIGRATIONS) == 6
+    assert migrate_database(db_path) == 0
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 6
+        flights = conn.execute(
+            'SELECT uuid, source, "canonicalKey", "durationMinutes", "departureDay" FROM flights ORDER BY uuid'
+        ).fetchall()
+        calendar = conn.execute(
+            'SELECT date, "minPrice", flights FROM route_fare_calendar ORDER BY date'
+        ).fetchall()
+        observations = conn.execute("SELECT COUNT(*) FROM price_observations").fetchone()[0]
+    finally:
+        conn.close()
+
+    # Both static rows share the Amadeus row's key and lose to it; the other row is untouched
+    assert [(uuid, source) for uuid, source, *_ in flights] == [
+        ("2f1c1e1a-0000-4000-8000-000000000003", "static"),
+        ("a" * 32, "amadeus"),
+    ]
+    key = canonical_flight_key(
+        {"origin": "New Delhi", "destination": "Hanoi", "date": "2025-07-21", "airline": "Vietnam Airlines", "price": 120000}
+    )
+    assert flights[1][2:] == (key, 255, 20290)
+    assert flights[0][3:] == (360, 20291)
+    assert calendar == [("2025-07-21", 120000, 1), ("2025-07-22", 90000, 1)]
+    assert observations == 2
@@ -0,0 +1,82 @@
+import base64
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from database import upsert_flights
+from flight_search import InvalidCursor, decode_cursor, encode_cursor
+
+
+def _flights(count):
+    return [
+        {
+            "uuid": f"{number:04d}",
+            "airline": "IndiGo",
+            "date": "2025-07-21",
+            "price": 100 + number % 3,
+            "origin": "New Delhi",
+            "destination": "Hanoi",
+        }
+        for number in range(count)
+    ]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("price_asc", 120, "abc")
+
+    assert decode_cursor(cursor, "price_asc") == (120, "abc")
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", base64.urlsafe_b64encode(b"[1, 2]").decode()])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "price_asc")
+
+
+def test_cursor_from_another_sort_order_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor("price_desc", 120, "abc"), "price_asc")
+
+
+def test_tampered_cursor_types_are_rejected():
+    cursor = base64.urlsafe_b64encode(orjson.dumps(["price_asc", "120", "abc"])).decode()
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "price_asc")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import main
+
+    db_path = str(tmp_path / "flights.db")
+    upsert_flights(_flights(7), db_path)
+    monkeypatch.setattr(main, "SQLITE_DB_PATH", db_path)
+    monkeypatch.setattr(main, "data_ready", True)
+    # No `with`: the startup handlers (bootstrap, sync, warm-up) are not run
+    return TestClient(main.app)
+
+
+def test_pages_cover_every_flight_once(client):
+    seen, cursor = [], None
+    while True:
+        body = {"origin": "New Delhi", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.post("/flights/search", json=body).json()
+        seen.extend((flight["price"], flight["uuid"]) for flight in page["flights"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted((100 + number % 3, f"{number:04d}") for number in range(7))
+
+
+@pytest.mark.parametrize("cursor", [
+    "garbage",
+    encode_cursor("price_desc", 101, "0001"),
+    encode_cursor("price_asc", 101, "0001")[:-4] + "AAAA",
+])
+def test_bad_cursor_returns_400(client, cursor):
+    response = client.post("/flights/search", json={"sort": "price_asc", "cursor": cursor})
+
+    assert response.status_code == 400
@@ -0,0 +1,73 @@
+from datetime import date
+
+from database import departure_day
+from itineraries import ItineraryIndex
+from sql_builder import FLIGHT_COLUMNS
+
+DAY0 = departure_day("2025-07-01")
+
+
+def _row(uuid, origin, destination, day, minutes, price):
+    flight = dict.fromkeys(FLIGHT_COLUMNS)
+    flight.update(uuid=uuid, origin=origin, destination=destination, price=price)
+    return (DAY0 + day, minutes, *(flight[column] for column in FLIGHT_COLUMNS))
+
+
+ROWS = [
+    _row("direct", "Delhi", "Budapest", 0, 600, 900),
+    _row("del-ist", "Delhi", "Istanbul", 0, 400, 200),
+    _row("ist-bud-same-day", "Istanbul", "Budapest", 0, 150, 50),  # leaves before the first leg lands
+    _row("ist-bud", "Istanbul", "Budapest", 1, 150, 150),
+    _row("ist-bud-late", "Istanbul", "Budapest", 4, 150, 10),  # past the layover window
+    _row("del-doh", "Delhi", "Doha", 0, 240, 150),
+    _row("doh-bud", "Doha", "Budapest", 2, 360, 300),
+    _row("del-sin", "Delhi", "Singapore", 0, 300, 100),
+    _row("sin-hkg", "Singapore", "Hong Kong", 1, 240, 100),
+    _row("hkg-bud", "Hong Kong", "Budapest", 2, 700, 100),
+]
+
+
+def _uuids(itineraries):
+    return [[leg[FLIGHT_COLUMNS.index("uuid")] for leg in itinerary.legs] for itinerary in itineraries]
+
+
+def test_cheapest_itineraries_first():
+    index = ItineraryIndex(ROWS)
+
+    itineraries = index.search("Delhi", "Budapest", k=10)
+
+    assert _uuids(itineraries) == [
+        ["del-sin", "sin-hkg", "hkg-bud"],
+        ["del-ist", "ist-bud"],
+        ["del-doh", "doh-bud"],
+        ["direct"],
+    ]
+    assert [itinerary.total_price for itinerary in itineraries] == [300, 350, 450, 900]
+    assert itineraries[1].total_minutes == 24 * 60 + 150
+
+
+def test_k_and_max_legs_limit_results():
+    index = ItineraryIndex(ROWS)
+
+    assert _uuids(index.search("Delhi", "Budapest", k=2)) == [["del-sin", "sin-hkg", "hkg-bud"], ["del-ist", "ist-bud"]]
+    assert _uuids(index.search("Delhi", "Budapest", k=10, max_legs=2)) == [
+        ["del-ist", "ist-bud"],
+        ["del-doh", "doh-bud"],
+        ["direct"],
+    ]
+
+
+def test_fastest_itineraries_first():
+    index = ItineraryIndex(ROWS)
+
+    itineraries = index.search("Delhi", "Budapest", optimize="duration", k=2)
+
+    assert _uuids(itineraries) == [["direct"], ["del-ist", "ist-bud"]]
+
+
+def test_date_window_applies_to_the_first_leg():
+    index = ItineraryIndex(ROWS)
+
+    assert index.search("Delhi", "Budapest", date_from=date(2025, 7, 2)) == []
+    assert index.search("Budapest", "Delhi") == []
+    assert index.search("Delhi", "Delhi") == []
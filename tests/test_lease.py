@@ -0,0 +1,45 @@
+import sqlite3
+
+from database import SYNC_KEY_SYNC_LEASE, get_sync_metadata, release_lease, try_acquire_lease
+
+
+def _age_lease(db_path, seconds):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE sync_metadata SET updated_at = updated_at - ? WHERE key = ?", (seconds, SYNC_KEY_SYNC_LEASE))
+    conn.commit()
+    conn.close()
+
+
+def test_only_one_worker_holds_the_lease(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+
+    assert try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+    assert not try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-2", 60, db_path)
+    # Renewing is the heartbeat
+    assert try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+    assert get_sync_metadata(SYNC_KEY_SYNC_LEASE, db_path) == "worker-1"
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+
+    _age_lease(db_path, 30)
+    assert not try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-2", 60, db_path)
+
+    _age_lease(db_path, 31)
+    assert try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-2", 60, db_path)
+    assert get_sync_metadata(SYNC_KEY_SYNC_LEASE, db_path) == "worker-2"
+    # The old leader's next heartbeat finds it lost the lease
+    assert not try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+
+
+def test_released_lease_is_free_at_once(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+
+    release_lease(SYNC_KEY_SYNC_LEASE, "worker-2", db_path)
+    assert not try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-2", 60, db_path)
+
+    release_lease(SYNC_KEY_SYNC_LEASE, "worker-1", db_path)
+    assert try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-2", 60, db_path)
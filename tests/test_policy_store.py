@@ -0,0 +1,15 @@
+from policy_store import PolicyStore
+
+
+def test_unreadable_file_keeps_previous_version_and_others_reload(tmp_path):
+    (tmp_path / "indigo_policy.txt").write_text("Cabin bag\n\n7 kg per person.", encoding="utf-8")
+    (tmp_path / "vietjet_policy.txt").write_text("Cabin bag\n\n7 kg carry-on.", encoding="utf-8")
+    store = PolicyStore([], base_dir=str(tmp_path), policy_dir=str(tmp_path))
+
+    (tmp_path / "indigo_policy.txt").write_bytes(b"\xff\xfe not utf-8 \x80")
+    (tmp_path / "vietjet_policy.txt").write_text("Cabin bag\n\n10 kg carry-on.", encoding="utf-8")
+    stats = store.refresh()
+
+    assert stats == {"loaded": 1, "removed": 0}
+    assert store.get("indigo").sections == ["Cabin bag", "7 kg per person."]
+    assert store.get("vietjet").sections == ["Cabin bag", "10 kg carry-on."]
@@ -0,0 +1,57 @@
+import random
+
+from roundtrip import PRICE, pair_round_trips
+from sql_builder import FLIGHT_COLUMNS
+
+
+def _rows(rng, origin, destination, count):
+    rows = []
+    for number in range(count):
+        flight = dict.fromkeys(FLIGHT_COLUMNS)
+        flight.update(
+            uuid=f"{origin}-{number}",
+            price=rng.randrange(50, 500, 5),
+            origin=origin,
+            destination=destination,
+        )
+        rows.append((rng.randrange(20000, 20030), *(flight[column] for column in FLIGHT_COLUMNS)))
+    # pair_round_trips expects (departureDay, price) order, as _load_leg returns it
+    return sorted(rows, key=lambda row: (row[0], row[1 + PRICE]))
+
+
+def _brute_force(outbound, inbound, min_stay, max_stay, k):
+    pairs = [
+        (out[1 + PRICE] + back[1 + PRICE], back[0] - out[0])
+        for out in outbound
+        for back in inbound
+        if min_stay <= back[0] - out[0] <= max_stay
+    ]
+    return sorted(pairs)[:k]
+
+
+def test_pairs_match_a_brute_force_self_join():
+    rng = random.Random(7)
+    for _ in range(50):
+        outbound = _rows(rng, "Hanoi", "Budapest", rng.randrange(0, 40))
+        inbound = _rows(rng, "Budapest", "Hanoi", rng.randrange(0, 40))
+        min_stay = rng.randrange(0, 6)
+        max_stay = min_stay + rng.randrange(0, 8)
+        k = rng.randrange(1, 12)
+
+        pairs = pair_round_trips(outbound, inbound, min_stay, max_stay, k)
+
+        assert [pair.total_price for pair in pairs] == [
+            total for total, _ in _brute_force(outbound, inbound, min_stay, max_stay, k)
+        ]
+        for pair in pairs:
+            assert min_stay <= pair.stay_days <= max_stay
+            assert pair.total_price == pair.outbound[PRICE] + pair.inbound[PRICE]
+
+
+def test_no_pairs_outside_the_stay_window():
+    rng = random.Random(1)
+    outbound = [(20000, *row[1:]) for row in _rows(rng, "Hanoi", "Budapest", 3)]
+    inbound = [(20001, *row[1:]) for row in _rows(rng, "Budapest", "Hanoi", 3)]
+
+    assert pair_round_trips(outbound, inbound, 3, 14) == []
+    assert pair_round_trips(outbound, inbound, 1, 1, k=0) == []
@@ -0,0 +1,115 @@
+import os
+
+import flight_search
+from database import (
+    SYNC_KEY_DATA_VERSION,
+    SYNC_KEY_SYNC_LEASE,
+    get_sync_metadata,
+    release_lease,
+    set_sync_metadata,
+    try_acquire_lease,
+)
+from paths import current_generation
+from snapshots import build_snapshot, list_generations, publish_snapshot, remove_old_generations
+
+
+def _publish(sqlite_file):
+    snapshot = build_snapshot(sqlite_file)
+    publish_snapshot(sqlite_file, snapshot)
+    return snapshot
+
+
+def test_publish_switches_the_current_generation(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "1", db_path)
+
+    snapshot = build_snapshot(db_path)
+    assert snapshot == db_path + ".g1"
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "2", snapshot)
+    # Not visible until published
+    assert get_sync_metadata(SYNC_KEY_DATA_VERSION, db_path) == "1"
+
+    publish_snapshot(db_path, snapshot)
+    assert current_generation(db_path) == snapshot
+    assert get_sync_metadata(SYNC_KEY_DATA_VERSION, db_path) == "2"
+    assert build_snapshot(db_path) == db_path + ".g2"
+
+
+def test_publish_keeps_metadata_written_to_the_live_file(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "1", db_path)
+    set_sync_metadata("stale_key", "x", db_path)
+    try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+
+    snapshot = build_snapshot(db_path)
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "2", snapshot)
+    # Written to the live file while the snapshot was being built
+    try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+    set_sync_metadata("written_live", "yes", db_path)
+    set_sync_metadata("stale_key", "y", db_path)
+
+    publish_snapshot(db_path, snapshot)
+    assert get_sync_metadata(SYNC_KEY_DATA_VERSION, db_path) == "2"
+    assert get_sync_metadata(SYNC_KEY_SYNC_LEASE, db_path) == "worker-1"
+    assert get_sync_metadata("written_live", db_path) == "yes"
+    assert get_sync_metadata("stale_key", db_path) == "y"
+
+
+def test_publish_drops_metadata_deleted_from_the_live_file(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    try_acquire_lease(SYNC_KEY_SYNC_LEASE, "worker-1", 60, db_path)
+
+    snapshot = build_snapshot(db_path)
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "2", snapshot)
+    # The leader shut down and released its lease meanwhile
+    release_lease(SYNC_KEY_SYNC_LEASE, "worker-1", db_path)
+
+    publish_snapshot(db_path, snapshot)
+    assert get_sync_metadata(SYNC_KEY_SYNC_LEASE, db_path) is None
+    assert get_sync_metadata(SYNC_KEY_DATA_VERSION, db_path) == "2"
+
+
+def test_remove_old_generations_keeps_the_newest(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "1", db_path)
+    for _ in range(4):
+        _publish(db_path)
+
+    removed = remove_old_generations(db_path, keep=2)
+    assert removed == [db_path + ".g1", db_path + ".g2"]
+    assert [n for n, _ in list_generations(db_path)] == [3, 4]
+    assert not os.path.exists(db_path + ".g1")
+    assert current_generation(db_path) == db_path + ".g4"
+
+
+def test_remove_old_generations_never_deletes_the_live_one(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "1", db_path)
+    live = _publish(db_path)
+    # Later runs that built their snapshot but never published it
+    for _ in range(3):
+        build_snapshot(db_path)
+
+    removed = remove_old_generations(db_path, keep=1)
+    assert live not in removed
+    assert os.path.exists(live)
+    assert current_generation(db_path) == live
+    assert [n for n, _ in list_generations(db_path)] == [1, 4]
+
+    # keep=0 still leaves the live generation
+    remove_old_generations(db_path, keep=0)
+    assert os.path.exists(live)
+
+
+def test_remove_old_generations_disposes_cached_engines(tmp_path):
+    db_path = str(tmp_path / "flights.db")
+    set_sync_metadata(SYNC_KEY_DATA_VERSION, "1", db_path)
+    old = _publish(db_path)
+    engine = flight_search._engines.get(old)
+    pool = engine.pool
+
+    _publish(db_path)
+    remove_old_generations(db_path, keep=1)
+    # Engine.dispose swaps in a fresh pool
+    assert engine.pool is not pool
+    assert flight_search._engines.get(current_generation(db_path)) is not engine
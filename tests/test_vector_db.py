@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+import vector_db
+from vector_db import split_document
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+class CharEncoder:
+    """One token per character, so every separator's cost is exact."""
+
+    def encode_ordinary(self, text):
+        return [ord(char) for char in text]
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens):
+        return "".join(chr(token) for token in tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_encoder(monkeypatch):
+    monkeypatch.setattr(vector_db, "get_encoder", CharEncoder)
+
+
+def test_one_line_document_is_one_chunk():
+    assert split_document("Hello") == ["Hello"]
+
+
+def test_trailing_heading_is_kept():
+    chunks = split_document("Baggage:\n\nTwo bags of 7 kg each.\n\nContact us")
+
+    assert "Contact us" in "\n".join(chunks)
+    assert "Two bags of 7 kg each." in "\n".join(chunks)
+
+
+@pytest.mark.parametrize("max_tokens", [40, 120, 500])
+@pytest.mark.parametrize("policy", ["indigo_policy.txt", "vietjet_policy.txt"])
+def test_chunks_fit_the_token_budget(policy, max_tokens):
+    text = (DATA_DIR / policy).read_text(encoding="utf-8")
+
+    chunks = split_document(text, max_tokens=max_tokens, overlap_tokens=10)
+
+    assert chunks
+    assert max(len(chunk) for chunk in chunks) <= max_tokens
+
+
+@pytest.mark.parametrize("policy", ["indigo_policy.txt", "vietjet_policy.txt"])
+def test_no_policy_text_is_lost(policy):
+    text = (DATA_DIR / policy).read_text(encoding="utf-8")
+
+    # Large enough that no sentence is cut mid-word
+    chunks = split_document(text, max_tokens=2000, overlap_tokens=0)
+
+    assert set(text.split()) <= set(" ".join(chunks).split())